@@ -0,0 +1,52 @@
+"""
+Reports the slowest modules imported by a statement, using python -X
+importtime in a new interpreter for each run. Times are cumulative, the best
+of several runs.
+
+    python benchmarks/import_time.py "import settings_manager.ui"
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PYTHON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python')
+
+
+def import_times(statement):
+    # type: (str) -> dict[str, int]
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=dict(os.environ, PYTHONPATH=PYTHON_PATH),
+        universal_newlines=True)
+    _, stderr = process.communicate()
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('statement', nargs='?', default='import settings_manager')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    best = {}
+    for _ in range(args.repeat):
+        for name, cumulative in import_times(args.statement).items():
+            best[name] = min(best.get(name, cumulative), cumulative)
+
+    print(args.statement)
+    for name, cumulative in sorted(best.items(), key=lambda i: -i[1])[:args.top]:
+        print('{:>10.2f}ms  {}'.format(cumulative / 1000.0, name))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures creating and setting the value of a ListChoiceSetting with many
+choices.
+
+    python benchmarks/list_choice_setting.py --choices 5000
+"""
+import argparse
+import timeit
+
+from Qt import QtWidgets
+
+from settings_manager.setting import Setting
+from settings_manager.ui.setting_widgets.list_choice_setting import ListChoiceSetting
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--choices', type=int, default=5000)
+    parser.add_argument('--checked', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    choices = ['texture_{}'.format(i) for i in range(args.choices)]
+    setting = Setting('textures', choices[:args.checked], choices=choices,
+                      minmax=(0, args.choices))
+    widget = ListChoiceSetting(setting)
+    values = [choices[:args.checked], choices[-args.checked:]]
+
+    def create():
+        ListChoiceSetting(setting)
+
+    def set_value():
+        widget.setValue(values[0])
+        values.reverse()
+
+    def toggle_item():
+        index = widget.model().index(args.choices // 2, 0)
+        widget.onItemPressed(index)
+        widget.grab()  # paints the summary
+
+    for name, func in (('create', create), ('setValue', set_value),
+                       ('toggle item', toggle_item)):
+        duration = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('{:<12} {:>10.2f}ms'.format(name, duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
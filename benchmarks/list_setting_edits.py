@@ -0,0 +1,53 @@
+"""
+Measures editing a ListSetting with many items: setting the value, editing
+a single item and removing a selection of items.
+
+    python benchmarks/list_setting_edits.py --items 10000
+"""
+import argparse
+import timeit
+
+from Qt import QtCore, QtWidgets
+
+from settings_manager.setting import Setting
+from settings_manager.ui.setting_widgets.list_setting import ListSetting
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--remove', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    items = ['/path/to/file_{}.ext'.format(i) for i in range(args.items)]
+    widget = ListSetting(Setting('paths', items))
+    view = widget.list_view
+    model = view.model()
+
+    def set_value():
+        widget.setValue(items)
+
+    def edit_item():
+        index = model.index(args.items // 2, 0)
+        model.setData(index, model.data(index) + 'x')
+
+    def remove_items():
+        widget.setValue(items)
+        step = max(1, args.items // args.remove)
+        selection = QtCore.QItemSelection()
+        for row in range(0, args.items, step)[:args.remove]:
+            index = model.index(row, 0)
+            selection.select(index, index)
+        view.selectionModel().select(selection, QtCore.QItemSelectionModel.Select)
+        widget.remove_selected()
+
+    for name, func in (('setValue', set_value), ('edit item', edit_item),
+                       ('remove {}'.format(args.remove), remove_items)):
+        duration = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('{:<12} {:>10.2f}ms'.format(name, duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Measures scrolling a SettingDictionaryView whose values are large lists.
+
+Compares the cached, truncated display text of SettingModel against building
+the full display string on every query.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/modelview_scroll.py
+"""
+import argparse
+import os
+import timeit
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets
+
+from settings_manager.ui.modelview import SettingModel
+
+
+class UncachedSettingModel(SettingModel):
+    """ Display behaviour before display text was cached """
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if index.isValid() and index.column() == 1 and role == QtCore.Qt.DisplayRole:
+            value = index.internalPointer().value
+            if isinstance(value, list):
+                return '\n'.join(map(str, value)) + '\n'
+            return str(value)
+        if role == QtCore.Qt.SizeHintRole:
+            return None
+        return super(UncachedSettingModel, self).data(index, role)
+
+
+def scroll(view):
+    # type: (QtWidgets.QTreeView) -> None
+    """ Scrolls the view from top to bottom one page at a time """
+    scrollbar = view.verticalScrollBar()
+    scrollbar.setValue(scrollbar.minimum())
+    while scrollbar.value() < scrollbar.maximum():
+        scrollbar.setValue(scrollbar.value() + scrollbar.pageStep())
+        view.viewport().repaint()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--items', type=int, default=5000,
+                        help='Number of items in each list value')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    data = {'key{}'.format(i): ['/some/path/item_{}'.format(j) for j in range(args.items)]
+            for i in range(args.rows)}
+
+    for model_class in (UncachedSettingModel, SettingModel):
+        model = model_class()
+        model.set_data(data)
+        view = QtWidgets.QTreeView()
+        view.setModel(model)
+        view.resize(800, 600)
+        view.show()
+        app.processEvents()
+        duration = min(timeit.repeat(lambda: scroll(view), number=1, repeat=args.repeat))
+        print('{:<22} {:.3f}s'.format(model_class.__name__, duration))
+        view.close()
+
+
+if __name__ == '__main__':
+    main()
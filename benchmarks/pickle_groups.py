@@ -0,0 +1,55 @@
+"""
+Measures the pickle size and round trip time of a SettingsGroup, with the
+full definitions and with a registered schema.
+
+    python benchmarks/pickle_groups.py --settings 10000
+"""
+import argparse
+import pickle
+import timeit
+
+from settings_manager import pickling
+from settings_manager.settings_group import SettingsGroup
+
+
+def build_group(size):
+    # type: (int) -> SettingsGroup
+    settings = []
+    for i in range(size):
+        kind = i % 4
+        if kind == 0:
+            data = {'default': i, 'minmax': (0, size), 'tooltip': 'Integer value'}
+        elif kind == 1:
+            data = {'default': 'value', 'choices': ['value', 'other'], 'label': 'Choice'}
+        elif kind == 2:
+            data = {'default': ['a', 'b'], 'tooltip': 'List of strings'}
+        else:
+            data = {'default': 1.0, 'nullable': True}
+        settings.append({'setting_{}'.format(i): data})
+    return SettingsGroup(settings)
+
+
+def report(name, group, repeat):
+    # type: (str, SettingsGroup, int) -> None
+    data = pickle.dumps(group, pickle.HIGHEST_PROTOCOL)
+    duration = min(timeit.repeat(
+        lambda: pickle.loads(pickle.dumps(group, pickle.HIGHEST_PROTOCOL)),
+        number=1, repeat=repeat))
+    print('{:<20} {:>12,} bytes {:>10.2f}ms'.format(name, len(data), duration * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--settings', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    group = build_group(args.settings)
+    report('definitions', group, args.repeat)
+    schema_id = pickling.register_schema(group)
+    report('registered schema', group, args.repeat)
+    pickling.unregister_schema(schema_id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures creating SettingsGroups from a definition with the constructor,
+which validates every setting, and from a compiled Schema.
+
+    python benchmarks/schema_groups.py --settings 500 --groups 10000
+"""
+import argparse
+import time
+
+from settings_manager.schema import Schema
+from settings_manager.settings_group import SettingsGroup
+
+
+def build_definition(size):
+    # type: (int) -> list[dict]
+    definition = []
+    for i in range(size):
+        kind = i % 4
+        if kind == 0:
+            data = {'default': i, 'minmax': (0, size), 'tooltip': 'Integer value'}
+        elif kind == 1:
+            data = {'default': 'value', 'choices': ['value', 'other'], 'label': 'Choice'}
+        elif kind == 2:
+            data = {'default': ['a', 'b'], 'tooltip': 'List of strings'}
+        else:
+            data = {'default': 1.0, 'nullable': True}
+        definition.append({'setting_{}'.format(i): data})
+    return definition
+
+
+def report(name, func, groups):
+    # type: (str, callable, int) -> float
+    start = time.time()
+    for _ in range(groups):
+        func()
+    duration = time.time() - start
+    print('{:<20} {:>10.2f}s {:>10.1f}us per group'.format(
+        name, duration, duration / groups * 1e6))
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--settings', type=int, default=500)
+    parser.add_argument('--groups', type=int, default=10000)
+    args = parser.parse_args()
+
+    definition = build_definition(args.settings)
+    constructor = report('constructor', lambda: SettingsGroup(definition), args.groups)
+    start = time.time()
+    schema = Schema.compile(definition)
+    print('{:<20} {:>10.2f}s'.format('compile', time.time() - start))
+    compiled = report('schema.create', schema.create, args.groups)
+    print('{:.1f}x faster'.format(constructor / compiled))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Self contained benchmark harness for settings_manager.
+
+Benchmarks are functions registered with @benchmark that take a size, do any
+setup, and return a callable to time. Each benchmark is timed for every
+size it supports up to the --max-size given to the runner.
+
+    PYTHONPATH=python python -m benchmarks.suite --output results.json
+    PYTHONPATH=python python -m benchmarks.suite --compare results.json
+
+UI benchmarks run headless using the offscreen Qt platform.
+"""
+from collections import OrderedDict, namedtuple
+import gc
+import math
+import platform
+import subprocess
+import sys
+import timeit
+
+SIZES = (10, 100, 1000, 10000, 100000)
+
+Benchmark = namedtuple('Benchmark', 'name func sizes')
+
+_benchmarks = OrderedDict()  # type: dict[str, Benchmark]
+
+
+def benchmark(sizes=SIZES):
+    """
+    Registers a benchmark function. The function is called with each size
+    and must return a callable to time, eg,
+
+    >>> @benchmark(sizes=(10, 100))
+    ... def group_get(size):
+    ...     group = SettingsGroup(make_settings_data(size))
+    ...     return lambda: [group.get(name) for name in group]
+
+    :param tuple[int] sizes: Sizes the benchmark supports
+    """
+    def register(func):
+        name = '{}.{}'.format(func.__module__.rsplit('.', 1)[-1], func.__name__)
+        _benchmarks[name] = Benchmark(name, func, tuple(sizes))
+        return func
+    return register
+
+
+def benchmarks(pattern=None):
+    # type: (str) -> list[Benchmark]
+    """ Returns the registered benchmarks whose name contains pattern """
+    return [b for name, b in _benchmarks.items() if not pattern or pattern in name]
+
+
+def metadata():
+    # type: () -> dict
+    """ Describes the environment the results were measured in """
+    data = {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         stderr=subprocess.STDOUT)
+        data['commit'] = commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    qt = sys.modules.get('Qt')
+    if qt is not None:
+        data['qt_binding'] = qt.__binding__
+        data['qt_version'] = qt.__qt_version__
+    return data
+
+
+def measure(func, repeat=5, min_time=0.1):
+    # type: (callable, int, float) -> dict
+    """
+    Times func, calling it enough times per repeat to take at least min_time
+    seconds, and returns the statistics in seconds per call.
+
+    :rtype: dict
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    # Calibrate the number of calls per repeat, as timeit.Timer.autorange
+    while True:
+        duration = timer.timeit(number)
+        if duration >= min_time or number >= 1000000:
+            break
+        number *= 10 if duration < min_time / 10 else 2
+
+    gc.collect()
+    times = [t / number for t in timer.repeat(repeat, number)]
+    mean = sum(times) / len(times)
+    stdev = math.sqrt(sum((t - mean) ** 2 for t in times) / len(times))
+    return {'min': min(times), 'mean': mean, 'stdev': stdev,
+            'number': number, 'repeat': repeat}
+
+
+def run(selected, max_size=10000, repeat=5, min_time=0.1, report=None):
+    # type: (list[Benchmark], int, int, float, callable) -> list[dict]
+    """
+    Runs each benchmark for every size up to max_size.
+
+    :param callable report: Called with each result as it is measured
+    :rtype: list[dict]
+    """
+    results = []
+    for bench in selected:
+        for size in bench.sizes:
+            if size > max_size:
+                continue
+            func = bench.func(size)
+            result = {'name': bench.name, 'size': size}
+            result.update(measure(func, repeat=repeat, min_time=min_time))
+            results.append(result)
+            if report is not None:
+                report(result)
+    return results
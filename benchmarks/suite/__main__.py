@@ -0,0 +1,95 @@
+"""
+Runs the benchmark suite, see benchmarks.suite.
+
+    PYTHONPATH=python python -m benchmarks.suite [--filter core.] [--max-size 100000]
+        [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import importlib
+import json
+
+from benchmarks import suite
+
+MODULES = ('benchmarks.suite.core', 'benchmarks.suite.ui')
+
+
+def compare(results, baseline, threshold):
+    # type: (list[dict], dict, float) -> int
+    """
+    Prints the ratio of each result to the baseline result of the same name
+    and size, using the minimum times.
+
+    :return: Number of results slower than the baseline by more than threshold
+    """
+    previous = dict(((r['name'], r['size']), r) for r in baseline['results'])
+    regressions = 0
+    print('\nCompared to {}'.format(baseline['metadata'].get('commit', 'baseline')))
+    for result in results:
+        old = previous.get((result['name'], result['size']))
+        if old is None:
+            continue
+        ratio = result['min'] / old['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  SLOWER'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print('{:<40} {:>8} {:>8.2f}x{}'.format(
+            result['name'], result['size'], ratio, flag))
+    return regressions
+
+
+def format_time(seconds):
+    # type: (float) -> str
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.2f}{}'.format(seconds / scale, unit)
+    return '{:.0f}ns'.format(seconds / 1e-9)
+
+
+def report(result):
+    # type: (dict) -> None
+    print('{:<40} {:>8} {:>10} {:>10} +- {:<10}'.format(
+        result['name'], result['size'], format_time(result['min']),
+        format_time(result['mean']), format_time(result['stdev'])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--max-size', type=int, default=10000,
+                        help='Largest size to run, up to {}'.format(max(suite.SIZES)))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='Minimum seconds for each repeat')
+    parser.add_argument('--no-ui', action='store_true', help='Skip the Qt benchmarks')
+    parser.add_argument('--output', help='Writes the results to this json file')
+    parser.add_argument('--compare', help='Compares against a json file from --output')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative change reported by --compare')
+    args = parser.parse_args()
+
+    for module in MODULES:
+        if args.no_ui and module.endswith('.ui'):
+            continue
+        importlib.import_module(module)
+
+    print('{:<40} {:>8} {:>10} {:>10}    {:<10}'.format('name', 'size', 'min', 'mean', 'stdev'))
+    results = suite.run(suite.benchmarks(args.filter), max_size=args.max_size,
+                        repeat=args.repeat, min_time=args.min_time, report=report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': suite.metadata(), 'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
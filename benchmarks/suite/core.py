@@ -0,0 +1,316 @@
+"""
+Benchmarks for Setting and SettingsGroup. Sizes are numbers of settings.
+"""
+import atexit
+import os
+import pickle
+import shutil
+import tempfile
+
+from settings_manager import pickling, profiling
+from settings_manager.autoreload import AutoReloader
+from settings_manager.conditions import ConditionGraph
+from settings_manager.constraints import less_equal
+from settings_manager.history import History
+from settings_manager.schema import Schema
+from settings_manager.setting import Setting
+from settings_manager.settings_group import SettingsGroup
+from settings_manager.sqlite_group import SQLiteSettingsGroup
+from settings_manager.store import SettingsStore
+
+from benchmarks.suite import benchmark
+
+# Temporary directory for files written by benchmarks, see temp_directory
+_directory = []
+
+
+def make_settings_data(size):
+    # type: (int) -> list[dict]
+    """ Returns data for size settings of mixed types and properties """
+    settings = []
+    for i in range(size):
+        kind = i % 5
+        if kind == 0:
+            data = {'default': i, 'minmax': (0, size), 'tooltip': 'Integer value'}
+        elif kind == 1:
+            data = {'default': 'value', 'choices': ['value', 'other'], 'label': 'Choice'}
+        elif kind == 2:
+            data = {'default': ['a', 'b'], 'tooltip': 'List of strings'}
+        elif kind == 3:
+            data = {'default': 1.0, 'nullable': True}
+        else:
+            data = {'default': True}
+        settings.append({'setting_{}'.format(i): data})
+    return settings
+
+
+def alternate_values(group):
+    # type: (SettingsGroup) -> list[tuple[str, object]]
+    """ Returns a (name, value) for each setting that differs from its default """
+    values = []
+    for setting in group:
+        value = setting.get()
+        if setting.property('choices'):
+            value = 'other'
+        elif isinstance(value, bool):
+            value = not value
+        elif isinstance(value, list):
+            value = value[::-1]
+        elif value is not None:
+            value = value + 1 if setting.type is not int else 0
+        values.append((setting.name, value))
+    return values
+
+
+def temp_directory():
+    # type: () -> str
+    """ Returns a directory for benchmark files, removed at exit """
+    if not _directory:
+        _directory.append(tempfile.mkdtemp())
+        atexit.register(shutil.rmtree, _directory[0], True)
+    return _directory[0]
+
+
+@benchmark()
+def setting_init(size):
+    data = [list(d.items())[0] for d in make_settings_data(size)]
+    return lambda: [Setting(name, **properties) for name, properties in data]
+
+
+@benchmark()
+def setting_set_get(size):
+    group = SettingsGroup(make_settings_data(size))
+    settings = list(group)
+    values = [value for _, value in alternate_values(group)]
+    defaults = [s.get() for s in settings]
+
+    def set_get():
+        for setting, value, default in zip(settings, values, defaults):
+            setting.set(value)
+            setting.get()
+            setting.set(default)
+    return set_get
+
+
+@benchmark()
+def setting_set_get_profiled(size):
+    set_get = setting_set_get(size)
+
+    def profiled():
+        with profiling.profile():
+            set_get()
+    return profiled
+
+
+@benchmark()
+def setting_set_choices(size):
+    choices = ['choice_{}'.format(i) for i in range(size)]
+    setting = Setting('choice', choices[0], choices=choices)
+    return lambda: setting.set(choices[-1])
+
+
+@benchmark()
+def group_init(size):
+    data = make_settings_data(size)
+    return lambda: SettingsGroup(data)
+
+
+@benchmark()
+def group_init_from_schema(size):
+    schema = Schema.compile(make_settings_data(size))
+    return schema.create
+
+
+@benchmark()
+def group_update(size):
+    data = make_settings_data(size)
+    half = size // 2
+    first, second = data[:half], data[half:]
+
+    def update():
+        group = SettingsGroup(first)
+        group.update(second)
+    return update
+
+
+@benchmark()
+def group_update_from_group(size):
+    source = SettingsGroup(make_settings_data(size))
+    return lambda: SettingsGroup().update(source)
+
+
+@benchmark()
+def group_eq(size):
+    group = SettingsGroup(make_settings_data(size))
+    other = SettingsGroup(group)
+    return lambda: group == other
+
+
+@benchmark()
+def group_eq_after_set(size):
+    group = SettingsGroup(make_settings_data(size))
+    other = SettingsGroup(group)
+    name, value = alternate_values(group)[0]
+    default = group.get(name)
+
+    def eq_after_set():
+        group.set(name, value)
+        group == other
+        group.set(name, default)
+        group == other
+    return eq_after_set
+
+
+@benchmark()
+def group_computed(size):
+    group = SettingsGroup([('value_{}'.format(i), i) for i in range(size)])
+    for i in range(size):
+        group.add_computed('computed_{}'.format(i),
+                           lambda v, i=i: v['value_{}'.format(i)] * 2)
+    names = ['computed_{}'.format(i) for i in range(size)]
+
+    def set_and_read():
+        # Only the computed value reading value_0 is recomputed
+        group.set('value_0', group.get('value_0') + 1)
+        for name in names:
+            group.get(name)
+    return set_and_read
+
+
+@benchmark()
+def conditions_update(size):
+    # Each setting is enabled by the one before. Changing the last only
+    # evaluates its dependents, of which there are none.
+    data = [('enabled_0', True)]
+    data.extend({'enabled_{}'.format(i): {
+        'default': True, 'enabled_if': 'enabled_{}'.format(i - 1)}}
+        for i in range(1, size))
+    group = SettingsGroup(data)
+    graph = ConditionGraph(group)
+    graph.update()
+    last = 'enabled_{}'.format(size - 1)
+
+    def update():
+        group.set(last, not group.get(last))
+        graph.update([last])
+    return update
+
+
+@benchmark()
+def group_constraints(size):
+    # A constraint between each pair of settings, setting one value only
+    # checks the constraint that reads it
+    group = SettingsGroup([('value_{}'.format(i), i) for i in range(size * 2)])
+    for i in range(size):
+        group.add_constraint(less_equal('value_{}'.format(i * 2),
+                                        'value_{}'.format(i * 2 + 1)))
+
+    def set_value():
+        group.set('value_0', 1 - group.get('value_0'))
+    return set_value
+
+
+@benchmark()
+def history_set(size):
+    # Each step only records the changed setting, regardless of size
+    group = SettingsGroup(make_settings_data(size))
+    history = History(group, merge_interval=0)
+    name, value = alternate_values(group)[1]
+
+    def set_undo():
+        group.set(name, value)
+        history.undo()
+    return set_undo
+
+
+@benchmark()
+def store_flush(size):
+    # Compare with group_to_json, which writes every setting
+    group = SettingsGroup(make_settings_data(size))
+    path = os.path.join(temp_directory(), 'store_{}.json'.format(size))
+    store = SettingsStore(group, path, compact_threshold=0, sync=False)
+    name, value = alternate_values(group)[1]
+    values = [value, group.get(name)]
+
+    def set_flush():
+        values.reverse()
+        group.set(name, values[0])
+        store.flush()
+    return set_flush
+
+
+@benchmark()
+def sqlite_group_get(size):
+    # Opening reads no settings, each get loads one or hits the cache
+    path = os.path.join(temp_directory(), 'sqlite_{}.db'.format(size))
+    SQLiteSettingsGroup(make_settings_data(size), path=path).close()
+    group = SQLiteSettingsGroup(path=path, cache_size=100)
+    names = ['setting_{}'.format(i) for i in range(0, size, max(1, size // 100))]
+    return lambda: [group.get(name) for name in names]
+
+
+@benchmark()
+def sqlite_group_set_many(size):
+    group = SQLiteSettingsGroup(make_settings_data(size))
+    values = [dict(alternate_values(group)), group.as_dict(values_only=True)]
+
+    def set_many():
+        values.reverse()
+        group.set_many(values[0])
+    return set_many
+
+
+@benchmark()
+def autoreload_one_change(size):
+    # Compare with group_from_json, which rebuilds every setting
+    group = SettingsGroup(make_settings_data(size))
+    path = os.path.join(temp_directory(), 'autoreload_{}.json'.format(size))
+    contents = [group.to_json()]
+    name, value = alternate_values(group)[1]
+    group.set(name, value)
+    contents.append(group.to_json())
+    with open(path, 'w') as f:
+        f.write(contents[1])
+    reloader = AutoReloader(group, path)
+
+    def write_reload():
+        contents.reverse()
+        with open(path, 'w') as f:
+            f.write(contents[1])
+        reloader.reload()
+    return write_reload
+
+
+@benchmark()
+def group_to_json(size):
+    group = SettingsGroup(make_settings_data(size))
+    return lambda: group.to_json()
+
+
+@benchmark()
+def group_from_json(size):
+    group = SettingsGroup(make_settings_data(size))
+    path = os.path.join(temp_directory(), 'settings_{}.json'.format(size))
+    with open(path, 'w') as f:
+        f.write(group.to_json())
+    return lambda: SettingsGroup.from_json(path)
+
+
+@benchmark()
+def group_as_argparser(size):
+    group = SettingsGroup(make_settings_data(size))
+    return lambda: group.as_argparser()
+
+
+@benchmark()
+def group_pickle(size):
+    group = SettingsGroup(make_settings_data(size))
+    return lambda: pickle.loads(pickle.dumps(group, pickle.HIGHEST_PROTOCOL))
+
+
+@benchmark()
+def group_pickle_registered(size):
+    group = SettingsGroup(make_settings_data(size))
+    pickling.register_schema(group)
+    return lambda: pickle.loads(pickle.dumps(group, pickle.HIGHEST_PROTOCOL))
+
@@ -0,0 +1,113 @@
+"""
+Headless benchmarks for the Qt widgets, using the offscreen platform unless
+QT_QPA_PLATFORM is set. Sizes are numbers of settings, or of items for the
+list widgets.
+"""
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from settings_manager.setting import Setting
+from settings_manager.settings_group import SettingsGroup
+from settings_manager.ui.modelview import SettingModel
+from settings_manager.ui.settings_viewer import SettingsViewer
+from settings_manager.ui.setting_widgets.list_choice_setting import ListChoiceSetting
+from settings_manager.ui.setting_widgets.list_setting import ListSetting
+
+from benchmarks.suite import benchmark
+from benchmarks.suite.core import make_settings_data
+
+# Creating a widget per setting is too slow to measure at the largest sizes
+WIDGET_SIZES = (10, 100, 1000)
+ITEM_SIZES = (10, 100, 1000, 10000)
+
+_application = []
+
+
+def application():
+    # type: () -> QtWidgets.QApplication
+    """ Returns the QApplication, creating one if needed """
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication([])
+        # Held so that it isn't collected while benchmarks run
+        _application.append(app)
+    return app
+
+
+@benchmark(sizes=WIDGET_SIZES)
+def viewer_rebuild_layout(size):
+    application()
+    group = SettingsGroup(make_settings_data(size))
+    viewer = SettingsViewer(group)
+    return lambda: viewer.rebuild_layout(group)
+
+
+@benchmark(sizes=WIDGET_SIZES)
+def viewer_filter(size):
+    application()
+    viewer = SettingsViewer(SettingsGroup(make_settings_data(size)))
+    queries = ['setting_1', '']
+
+    def filter_rows():
+        viewer.set_filter_text(queries[0], delay=0)
+        queries.reverse()
+    return filter_rows
+
+
+@benchmark()
+def model_set_data(size):
+    application()
+    model = SettingModel()
+    data = dict(('key_{}'.format(i), {'value': i, 'items': list(range(10))})
+                for i in range(size))
+    return lambda: model.set_data(data)
+
+
+@benchmark()
+def model_set_values(size):
+    application()
+    model = SettingModel()
+    model.set_data(dict(('key_{}'.format(i), i) for i in range(size)))
+    model.fetch_all()
+    # Every tenth value changes
+    values = [dict((('key_{}'.format(i),), i + offset) for i in range(0, size, 10))
+              for offset in (1, 0)]
+
+    def set_values():
+        model.set_values(values[0])
+        values.reverse()
+    return set_values
+
+
+@benchmark(sizes=ITEM_SIZES)
+def list_setting_set_value(size):
+    application()
+    items = ['/path/to/file_{}.ext'.format(i) for i in range(size)]
+    widget = ListSetting(Setting('paths', items))
+    return lambda: widget.setValue(items)
+
+
+@benchmark(sizes=ITEM_SIZES)
+def list_choice_setting_init(size):
+    application()
+    choices = ['texture_{}'.format(i) for i in range(size)]
+    setting = Setting('textures', choices[:size // 10], choices=choices,
+                      minmax=(0, size))
+    return lambda: ListChoiceSetting(setting)
+
+
+@benchmark(sizes=ITEM_SIZES)
+def list_choice_setting_set_value(size):
+    application()
+    choices = ['texture_{}'.format(i) for i in range(size)]
+    setting = Setting('textures', [], choices=choices, minmax=(0, size))
+    widget = ListChoiceSetting(setting)
+    values = [choices[:size // 10], choices[-(size // 10):]]
+
+    def set_value():
+        widget.setValue(values[0])
+        values.reverse()
+    return set_value
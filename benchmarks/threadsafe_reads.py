@@ -0,0 +1,84 @@
+"""
+Measures read throughput of ThreadSafeSettingsGroup from many threads while
+another thread writes, against a SettingsGroup guarded by a single lock.
+
+    python benchmarks/threadsafe_reads.py --readers 8
+"""
+import argparse
+import threading
+import time
+
+from settings_manager.settings_group import SettingsGroup
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+class LockedSettingsGroup(SettingsGroup):
+    """ Plain locking for comparison, readers and writers share one lock """
+    def __init__(self, settings=None):
+        self._lock = threading.Lock()
+        super(LockedSettingsGroup, self).__init__(settings)
+
+    def batch(self):
+        return self._lock
+
+    def get(self, key):
+        with self._lock:
+            return super(LockedSettingsGroup, self).get(key)
+
+    def set(self, key, value):
+        # Writes are made inside batch(), which holds the lock
+        super(LockedSettingsGroup, self).set(key, value)
+
+
+def measure(group, keys, readers, duration):
+    # type: (SettingsGroup, list[str], int, float) -> tuple[int, int]
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def read(idx):
+        count = 0
+        while not stop.is_set():
+            for key in keys:
+                group.get(key)
+            count += len(keys)
+        reads[idx] = count
+
+    def write():
+        value = 0
+        while not stop.is_set():
+            value += 1
+            with group.batch():
+                for key in keys[:10]:
+                    group.set(key, value)
+            writes[0] += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads), writes[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--settings', type=int, default=1000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+
+    data = [('key{}'.format(i), i) for i in range(args.settings)]
+    keys = [name for name, _ in data]
+    for group_class in (LockedSettingsGroup, ThreadSafeSettingsGroup):
+        reads, writes = measure(group_class(data), keys, args.readers, args.duration)
+        print('{:<24} {:>12,.0f} reads/s {:>8,.0f} batches/s'.format(
+            group_class.__name__, reads / args.duration, writes / args.duration))
+
+
+if __name__ == '__main__':
+    main()
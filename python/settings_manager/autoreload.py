@@ -0,0 +1,345 @@
+"""
+Reloads a SettingsGroup when the json file it was read from changes, eg,
+in a long running service.
+
+eg,
+
+>>> settings = ThreadSafeSettingsGroup.from_json(path)
+>>> reloader = AutoReloader(settings, path)
+>>> reloader.start()
+
+The file is watched with inotify if the inotify_simple package is installed,
+otherwise its modification time is polled.
+"""
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+
+from settings_manager.exceptions import SettingsError
+from settings_manager.setting import Setting
+from settings_manager.settings_group import _cast_json_types, _loads_json
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+# {argument: Setting attribute} that can't be changed on an existing setting
+_TYPE_PROPERTIES = {'data_type': 'type', 'subtype': 'subtype'}
+
+# Value of an entry that doesn't set the setting's value
+_UNCHANGED = object()
+
+
+def _split_entry(entry):
+    # type: (object) -> tuple[dict, object, bool]
+    """
+    Returns the properties, value and whether there is a value for a
+    setting's json data, see SettingsGroup.from_json
+    """
+    if not isinstance(entry, dict):
+        # {setting_name: value}
+        return {'default': entry}, None, False
+    properties = OrderedDict(entry)
+    properties.pop('name', None)
+    has_value = 'value' in properties
+    value = properties.pop('value', None)
+    _cast_json_types(properties)
+    return properties, value, has_value
+
+
+def _raw_property(setting, key):
+    # type: (Setting, str) -> object
+    """
+    Returns a property as it was given to the setting, eg, a ChoicesProvider
+    rather than its choices, or None if the setting doesn't have it
+    """
+    if key == 'choices' and setting.choices_provider() is not None:
+        return setting.choices_provider()
+    return setting.property(key) if setting.has_property(key) else None
+
+
+class AutoReloader(object):
+    """
+    Applies the changes to a json settings file to a group. Only the settings
+    whose json data changed since the file was last read are compared with
+    the group, and only the values and properties that differ are set, in a
+    single batch. Observers are only notified of changed values: properties,
+    eg, choices or tooltip, are set without a notification. The names
+    returned by check() and reload() include settings whose properties
+    changed, eg, to rebuild a SettingsViewer.
+
+    Values set at runtime are kept unless the file changes the setting's
+    value. A setting whose value is its default follows changes to the
+    default. Properties removed from a setting's entry are reset to their
+    defaults. Settings added to the file are added to the group, settings
+    removed from it are kept.
+
+    Every changed entry is checked before any are applied, so a file that
+    changes a setting's data_type or subtype, or that would leave a setting
+    with an invalid value, raises SettingsError and changes nothing.
+
+    Changes are checked by check(), or by a background thread after start().
+    Use a ThreadSafeSettingsGroup if the group is read by other threads.
+    """
+
+    def __init__(self, group, path, interval=1.0, on_error=None):
+        """
+        Applies the file's current contents to the group.
+
+        :raise: SettingsError if the file is invalid
+        :param settings_manager.SettingsGroup   group:
+        :param str      path:
+        :param float    interval:   Seconds between checks by the background
+                                    thread. With inotify, the longest time
+                                    to wait for a change before checking.
+        :param callable on_error:   Called with the exception when a change
+                                    can't be applied by the background
+                                    thread, eg, a partly written file.
+        """
+        self.interval = interval
+        self.on_error = on_error
+        self._group = group
+        self._path = path
+        self._entries = {}  # {name: json data} from the last read
+        self._digest = None  # Of the contents applied
+        self._stat = None  # (mtime, size, inode) of the last read
+        self._lock = threading.Lock()
+        self._thread = None  # type: threading.Thread
+        self._stop = threading.Event()
+        self.reload()
+
+    @property
+    def group(self):
+        # type: () -> settings_manager.SettingsGroup
+        return self._group
+
+    @property
+    def path(self):
+        # type: () -> str
+        return self._path
+
+    def check(self):
+        # type: () -> list[str]
+        """
+        Reloads the file if it was modified since it was last read.
+
+        :raise: SettingsError if the modified file is invalid
+        :return: Names of the settings that were added, or whose value or
+                 properties changed
+        """
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            # Missing, eg, while it's being replaced
+            return []
+        if (stat.st_mtime, stat.st_size, stat.st_ino) == self._stat:
+            return []
+        return self.reload()
+
+    def reload(self):
+        # type: () -> list[str]
+        """
+        Reads the file and applies any changes.
+
+        :raise: SettingsError if the file is invalid
+        :return: Names of the settings that were added, or whose value or
+                 properties changed
+        """
+        with self._lock:
+            stat = os.stat(self._path)
+            with open(self._path, 'rb') as f:
+                content = f.read()
+            # An invalid file is read again once it's modified
+            self._stat = (stat.st_mtime, stat.st_size, stat.st_ino)
+            digest = hashlib.sha1(content).hexdigest()
+            if digest == self._digest:
+                return []
+            try:
+                data = _loads_json(content.decode('utf-8'))
+            except ValueError as e:
+                raise SettingsError(
+                    'Invalid settings file {!r}: {}'.format(self._path, e))
+            if not isinstance(data, dict):
+                raise SettingsError('Invalid settings file: {!r}'.format(self._path))
+            changed = self._apply(data)
+            self._entries = data
+            self._digest = digest
+            return changed
+
+    def start(self):
+        """ Starts checking for changes in a background thread """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stops the background thread, waiting up to timeout seconds for it
+
+        :param float timeout:
+        """
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _apply(self, data):
+        # type: (dict) -> list[str]
+        """
+        Applies the entries that changed since the last read. Every entry is
+        checked before any are applied, so an invalid file changes nothing.
+        """
+        changes = []
+        for name, entry in data.items():
+            previous = self._entries.get(name)
+            if entry == previous:
+                continue
+            # Computed values written by to_json can't be recreated
+            if isinstance(entry, dict) and entry.get('computed'):
+                continue
+            properties, value, has_value = _split_entry(entry)
+            setting = self._group.setting(name)
+            if setting is None:
+                added = self._create_setting(name, properties)
+                if has_value:
+                    added.set(value)
+                changes.append((name, None, properties, value if has_value else _UNCHANGED))
+                continue
+            change = self._check_entry(setting, previous, properties, value, has_value)
+            if change is not None:
+                changes.append((name, setting) + change)
+
+        changed = []
+        # (setting, {key: property}) to restore if the batch fails
+        originals = []
+        try:
+            with self._group.batch():
+                for name, setting, properties, value in changes:
+                    if setting is None:
+                        setting = self._group.add_setting(name, **properties)
+                    else:
+                        originals.append((setting, dict(
+                            (key, _raw_property(setting, key)) for key in properties)))
+                        for key, prop in properties.items():
+                            setting.set_property(key, prop)
+                    if value is not _UNCHANGED:
+                        setting.set(value)
+                    changed.append(name)
+        except Exception:
+            # The batch restores the values but not the properties
+            for setting, properties in originals:
+                for key, prop in properties.items():
+                    setting.set_property(key, prop)
+            raise
+        return changed
+
+    def _check_entry(self, setting, previous, properties, value, has_value):
+        # type: (Setting, object, dict, object, bool) -> tuple[dict, object]
+        """
+        Returns the {key: property} and the value to set for the changes in
+        the file that differ from the setting, the value is _UNCHANGED if it
+        isn't set. Properties removed from the file are reset to their
+        default. Returns None if nothing needs to be set.
+
+        :raise: SettingsError if the entry changes the setting's data_type or
+                subtype, or the changed setting would be invalid
+        """
+        name = setting.name
+        # Created to check the entry on its own, and for the defaults of the
+        # properties that aren't in the file
+        created = self._create_setting(name, properties)
+        for key, attribute in _TYPE_PROPERTIES.items():
+            if getattr(created, attribute) != getattr(setting, attribute):
+                raise SettingsError("Can't change the {} of setting {!r} in {!r}".format(
+                    key, name, self._path))
+
+        if previous is None:
+            old_properties, old_value, old_has_value = {}, None, False
+        else:
+            old_properties, old_value, old_has_value = _split_entry(previous)
+
+        changed_properties = {}
+        for key, prop in properties.items():
+            if key in _TYPE_PROPERTIES:
+                continue
+            if key in old_properties and old_properties[key] == prop:
+                continue
+            changed_properties[key] = prop
+        for key in old_properties:
+            if key not in properties and key not in _TYPE_PROPERTIES:
+                changed_properties[key] = _raw_property(created, key)
+        changed_properties = dict(
+            (key, prop) for key, prop in changed_properties.items()
+            if not setting.has_property(key) or setting.property(key) != prop)
+
+        if has_value and (not old_has_value or old_value != value):
+            target = value
+        elif not setting.is_modified() and 'default' in changed_properties:
+            # Follows changes to the default
+            target = changed_properties['default']
+        else:
+            target = _UNCHANGED
+        if target is not _UNCHANGED and setting.get() == target:
+            target = _UNCHANGED
+        if not changed_properties and target is _UNCHANGED:
+            return None
+
+        # The current value must also suit the new properties
+        candidate = setting.copy()
+        for key, prop in changed_properties.items():
+            candidate.set_property(key, prop)
+        candidate.set(candidate.get() if target is _UNCHANGED else target)
+        return changed_properties, target
+
+    def _create_setting(self, name, properties):
+        # type: (str, dict) -> Setting
+        """ Returns a Setting for an entry's properties, see SettingsGroup.add_setting """
+        try:
+            return Setting(name, **properties)
+        except TypeError as e:
+            raise SettingsError('Invalid setting {!r} in {!r}: {}'.format(
+                name, self._path, e))
+
+    def _create_notifier(self):
+        """ Returns an INotify watching the file's directory, or None """
+        if inotify_simple is None:
+            return None
+        flags = inotify_simple.flags
+        try:
+            notifier = inotify_simple.INotify()
+            # Editors often replace the file rather than writing to it
+            notifier.add_watch(os.path.dirname(os.path.abspath(self._path)),
+                               flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+        except OSError:
+            return None
+        return notifier
+
+    def _watch(self):
+        notifier = self._create_notifier()
+        try:
+            while not self._stop.is_set():
+                if notifier is not None:
+                    # Events in the directory are only a hint, check()
+                    # compares the file
+                    notifier.read(timeout=int(self.interval * 1000))
+                elif self._stop.wait(self.interval):
+                    break
+                try:
+                    self.check()
+                except Exception as e:
+                    if self.on_error is not None:
+                        self.on_error(e)
+        finally:
+            if notifier is not None:
+                notifier.close()
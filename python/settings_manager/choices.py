@@ -0,0 +1,226 @@
+"""
+Choices computed by a function, eg, from a database or a filesystem scan,
+for settings whose choices aren't known when they are defined.
+
+eg,
+
+>>> renderers = ChoicesProvider(find_renderers, ttl=60, stale_while_revalidate=True)
+>>> setting = Setting('renderer', 'arnold', choices=renderers)
+"""
+from collections import namedtuple
+import threading
+import time
+
+try:
+    from weakref import WeakMethod
+except ImportError:  # Python 2.x
+    WeakMethod = None
+
+# Monotonic clock where available, the system clock can jump
+_clock = getattr(time, 'monotonic', time.time)
+
+# Result of calling a provider's function. Published with a single
+# assignment so that readers in other threads see a complete result.
+Result = namedtuple('Result', 'choices choice_set timestamp')
+
+
+def freeze_choices(choices):
+    # type: (list) -> frozenset|list
+    """
+    Returns a frozenset of the choices for constant time membership tests,
+    or the list itself if any choice is unhashable.
+    """
+    try:
+        return frozenset(choices)
+    except TypeError:
+        return choices
+
+
+class ChoicesProvider(object):
+    """
+    Calls a function for a setting's choices when they are first needed and
+    caches the result.
+
+    If ttl is given, the result expires after that many seconds. Expired
+    choices are recomputed by the next request for them, which blocks until
+    the function returns. With stale_while_revalidate, the expired choices
+    are returned immediately instead while a background thread recomputes
+    them, and listeners are called once the new choices are available.
+
+    Copies of a provider, eg, from Setting.copy(), share the cache. Pickling
+    sends only the function and options.
+    """
+
+    def __init__(self, func, ttl=None, stale_while_revalidate=False):
+        """
+        :param callable func:                   Returns a list of choices
+        :param float    ttl:                    Seconds before the choices
+                                                expire. None never expires.
+        :param bool     stale_while_revalidate: Whether to return expired
+                                                choices while refreshing
+        """
+        self._func = func
+        self._ttl = ttl
+        self._stale_while_revalidate = stale_while_revalidate
+        self._result = None  # type: Result
+        # Exception raised by the last background refresh, if any
+        self._error = None  # type: Exception
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._refresh_thread = None  # type: threading.Thread
+
+    def __call__(self):
+        # type: () -> list
+        return self.choices()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self._func, self._ttl, self._stale_while_revalidate)
+
+    def __repr__(self):
+        return '{}({!r}, ttl={!r}, stale_while_revalidate={!r})'.format(
+            self.__class__.__name__, self._func, self._ttl,
+            self._stale_while_revalidate)
+
+    @property
+    def error(self):
+        # type: () -> Exception
+        """ Exception raised by the last background refresh, or None """
+        return self._error
+
+    @property
+    def func(self):
+        # type: () -> callable
+        return self._func
+
+    def add_listener(self, callback):
+        """
+        Calls callback with no arguments whenever the choices change after
+        being refreshed. This may be from a background thread.
+
+        Bound methods are held by weak reference so that listening doesn't
+        keep, eg, a widget alive.
+
+        :param callable callback:
+        """
+        if WeakMethod is not None and hasattr(callback, '__self__'):
+            ref = WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        self._listeners.append(ref)
+
+    def choice_set(self):
+        # type: () -> frozenset|list
+        """
+        Returns the choices as a frozenset for validating values, see
+        freeze_choices.
+        """
+        return self._get_result().choice_set
+
+    def choices(self):
+        # type: () -> list
+        """ Returns the cached choices. The list must not be modified. """
+        return self._get_result().choices
+
+    def invalidate(self):
+        """ Expires the cached choices, they are recomputed when next used """
+        result = self._result
+        if result is not None:
+            self._result = result._replace(timestamp=None)
+
+    def is_stale(self):
+        # type: () -> bool
+        """ Whether there are no cached choices or they have expired """
+        result = self._result
+        return result is None or self._expired(result)
+
+    def refresh(self, wait=True):
+        """
+        Recomputes the choices, calling the listeners if they changed.
+
+        :param bool wait: If False, the choices are computed in a background
+                          thread and this returns immediately. Only one
+                          background refresh runs at a time.
+        """
+        if wait:
+            self._compute()
+            return
+        with self._lock:
+            if self._refresh_thread is not None:
+                return
+            self._refresh_thread = threading.Thread(target=self._background_refresh)
+            self._refresh_thread.daemon = True
+            self._refresh_thread.start()
+
+    def remove_listener(self, callback):
+        """
+        :raise: ValueError if callback is not a listener
+        :param callable callback:
+        """
+        for ref in self._listeners:
+            if ref() == callback:
+                self._listeners.remove(ref)
+                return
+        raise ValueError('Not a listener: {!r}'.format(callback))
+
+    def wait(self, timeout=None):
+        """ Waits for a background refresh to finish, eg, for tests """
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _background_refresh(self):
+        try:
+            self._compute()
+            self._error = None
+        except Exception as e:
+            # The stale choices are kept, the next request retries
+            self._error = e
+        finally:
+            with self._lock:
+                self._refresh_thread = None
+
+    def _compute(self):
+        # type: () -> Result
+        choices = list(self._func())
+        old_result = self._result
+        result = Result(choices, freeze_choices(choices), _clock())
+        self._result = result
+        if old_result is not None and old_result.choices != choices:
+            self._notify()
+        return result
+
+    def _expired(self, result):
+        # type: (Result) -> bool
+        if result.timestamp is None:
+            return True
+        return self._ttl is not None and _clock() - result.timestamp > self._ttl
+
+    def _get_result(self):
+        # type: () -> Result
+        result = self._result
+        if result is None:
+            return self._compute()
+        if self._expired(result):
+            if self._stale_while_revalidate:
+                self.refresh(wait=False)
+            else:
+                result = self._compute()
+        return result
+
+    def _notify(self):
+        for ref in list(self._listeners):
+            callback = ref()
+            if callback is None:
+                self._listeners.remove(ref)
+            else:
+                callback()
@@ -0,0 +1,80 @@
+"""
+Values derived from other settings, eg, output paths, see
+SettingsGroup.add_computed.
+
+eg,
+
+>>> settings.add_computed('output', lambda s: os.path.join(s['root'], s['shot']))
+>>> settings.get('output')
+'/jobs/abc/sh010'
+"""
+from settings_manager.exceptions import SettingsError
+
+
+class Computed(object):
+    """
+    Function of other settings' values and its memoised result. The names
+    the function reads are its dependencies, recorded each time it's
+    evaluated so that they can change with the values.
+    """
+
+    def __init__(self, name, func):
+        """
+        :param str      name:
+        :param callable func:   Called with a DependencyReader for the group
+        """
+        self.name = name
+        self.func = func
+        self.dependencies = frozenset()
+        self.valid = False
+        self.value = None
+        self._evaluating = False
+
+    def __repr__(self):
+        return 'Computed({!r}, {!r})'.format(self.name, self.func)
+
+    def evaluate(self, group):
+        """
+        Calls the function without storing the result.
+
+        :raise: SettingsError if the function depends on its own value
+        :param settings_manager.SettingsGroup group:
+        :rtype: tuple[object, frozenset[str]]
+        :return: The value and the names of the values it read
+        """
+        if self._evaluating:
+            raise SettingsError(
+                'Circular dependency for computed setting: {!r}'.format(self.name))
+        reader = DependencyReader(group)
+        self._evaluating = True
+        try:
+            value = self.func(reader)
+        finally:
+            self._evaluating = False
+        return value, frozenset(reader.dependencies)
+
+    def invalidate(self):
+        self.valid = False
+        self.value = None
+
+
+class DependencyReader(object):
+    """ Reads values from a group, recording the name of each value read """
+
+    def __init__(self, group):
+        """
+        :param settings_manager.SettingsGroup group:
+        """
+        self.dependencies = set()
+        self._group = group
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def get(self, key):
+        """
+        :raise: KeyError if key is not a setting or computed value
+        :param str key:
+        """
+        self.dependencies.add(key)
+        return self._group.get(key)
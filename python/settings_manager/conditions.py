@@ -0,0 +1,198 @@
+"""
+Settings that are only enabled or visible depending on other settings'
+values, declared with the enabled_if and visible_if properties.
+
+Each condition is one of:
+    * str: name of a setting whose value must be truthy
+    * dict: {setting_name: value} of values that must all match
+    * callable: called with a reader for the group's values, see
+      settings_manager.computed.DependencyReader, returning a bool
+
+eg,
+
+>>> settings.add_setting('use_proxy', False)
+>>> settings.add_setting('proxy_width', 960, enabled_if='use_proxy')
+>>> settings.add_setting('denoiser', 'oidn', visible_if={'renderer': 'arnold'})
+
+A setting is also disabled (or hidden) when a setting its condition reads is
+disabled (or hidden), so conditions apply recursively.
+"""
+from collections import namedtuple
+import heapq
+
+from settings_manager.computed import DependencyReader
+from settings_manager.exceptions import SettingsError
+
+
+State = namedtuple('State', 'enabled visible')
+
+# Properties holding conditions, in the order of the State fields
+CONDITION_PROPERTIES = ('enabled_if', 'visible_if')
+
+_DEFAULT_STATE = State(True, True)
+
+
+def condition_predicate(condition):
+    # type: (str|dict|callable) -> callable
+    """
+    Returns a function of a DependencyReader for a condition
+
+    :raise: SettingsError if condition is not a valid type
+    """
+    if isinstance(condition, str):
+        return lambda values: bool(values[condition])
+    if isinstance(condition, dict):
+        items = list(condition.items())
+        return lambda values: all(values[name] == value for name, value in items)
+    if callable(condition):
+        return lambda values: bool(condition(values))
+    raise SettingsError('Invalid condition: {!r}'.format(condition))
+
+
+class ConditionGraph(object):
+    """
+    Evaluates the enabled_if and visible_if conditions of a group's settings.
+
+    The names each condition reads are recorded when it's evaluated, building
+    a graph from each setting to the conditions that depend on it. update()
+    then only evaluates the conditions that read a changed value, followed by
+    their dependents if their state changed, in dependency order.
+    """
+
+    def __init__(self, group):
+        """
+        :raise: SettingsError if a condition is invalid
+
+        :param settings_manager.SettingsGroup group:
+        """
+        self._group = group
+        self._predicates = {}  # type: dict[str, tuple[callable, callable]]
+        # Names read by each condition, and the inverse
+        self._dependencies = {}  # type: dict[str, tuple[frozenset, frozenset]]
+        self._dependents = {}  # type: dict[str, set[str]]
+        self._states = {}  # type: dict[str, State]
+        # Topological rank of each condition, see _update_ranks
+        self._ranks = {}  # type: dict[str, int]
+
+        for setting in group:
+            conditions = [setting._properties.get(name) for name in CONDITION_PROPERTIES]
+            if any(c is not None for c in conditions):
+                self._predicates[setting.name] = tuple(
+                    None if c is None else condition_predicate(c) for c in conditions)
+
+    def __contains__(self, name):
+        return name in self._predicates
+
+    def __len__(self):
+        return len(self._predicates)
+
+    def state(self, name):
+        # type: (str) -> State
+        """
+        Returns the last evaluated state. Settings without conditions are
+        always enabled and visible.
+        """
+        return self._states.get(name, _DEFAULT_STATE)
+
+    def update(self, changed=None):
+        # type: (iter[str]) -> dict[str, State]
+        """
+        Evaluates the conditions affected by changes to the named values.
+
+        :raise: SettingsError if conditions depend on each other
+        :param changed: Names of the changed settings or computed values. If
+                        None, every condition is evaluated.
+        :return: {setting_name: State} for the settings whose state changed
+        """
+        if changed is None:
+            names = list(self._predicates)
+        else:
+            names = set()
+            for name in changed:
+                names.update(self._dependents.get(name, ()))
+
+        queued = set()
+        queue = []
+        for name in names:
+            queued.add(name)
+            heapq.heappush(queue, (self._ranks.get(name, 0), name))
+
+        updated = {}
+        while queue:
+            _, name = heapq.heappop(queue)
+            queued.discard(name)
+            state = self._evaluate(name)
+            if state == self.state(name) and name in self._states:
+                continue
+            self._states[name] = state
+            updated[name] = state
+            # Conditions reading this setting also depend on its state
+            for dependent in self._dependents.get(name, ()):
+                if dependent not in queued:
+                    queued.add(dependent)
+                    heapq.heappush(queue, (self._ranks.get(dependent, 0), dependent))
+        return updated
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _evaluate(self, name):
+        # type: (str) -> State
+        values = []
+        dependencies = []
+        for field, predicate in enumerate(self._predicates[name]):
+            if predicate is None:
+                values.append(True)
+                dependencies.append(frozenset())
+                continue
+            reader = DependencyReader(self._group)
+            value = predicate(reader)
+            read = frozenset(reader.dependencies)
+            # Disabled or hidden by the settings it depends on
+            values.append(value and all(self.state(n)[field] for n in read))
+            dependencies.append(read)
+        self._set_dependencies(name, tuple(dependencies))
+        return State(*values)
+
+    def _set_dependencies(self, name, dependencies):
+        # type: (str, tuple[frozenset, frozenset]) -> None
+        old = self._dependencies.get(name, ())
+        if old == dependencies:
+            return
+        old_names = frozenset().union(*old)
+        new_names = frozenset().union(*dependencies)
+        for dependency in old_names - new_names:
+            self._dependents[dependency].discard(name)
+        for dependency in new_names - old_names:
+            self._dependents.setdefault(dependency, set()).add(name)
+        self._dependencies[name] = dependencies
+        self._update_ranks(name)
+
+    def _update_ranks(self, name):
+        # type: (str) -> None
+        """
+        Updates the rank of name and its dependents after its dependencies
+        changed. A rank is one more than the highest rank of the conditions
+        it depends on, so evaluating in rank order evaluates each condition
+        after its dependencies.
+
+        :raise: SettingsError if conditions depend on each other
+        """
+        stack = [name]
+        while stack:
+            node = stack.pop()
+            rank = 0
+            for dependencies in self._dependencies.get(node, ()):
+                for dependency in dependencies:
+                    if dependency in self._predicates:
+                        rank = max(rank, self._ranks.get(dependency, 0) + 1)
+            if rank == self._ranks.get(node, 0):
+                continue
+            # Ranks only exceed the number of conditions in a cycle
+            if rank > len(self._predicates):
+                raise SettingsError(
+                    'Circular condition for setting: {!r}'.format(name))
+            self._ranks[node] = rank
+            stack.extend(n for n in self._dependents.get(node, ())
+                         if n in self._predicates)
@@ -0,0 +1,123 @@
+"""
+Constraints between the values of several settings, see
+SettingsGroup.add_constraint.
+
+eg,
+
+>>> settings.add_constraint(less_equal('min_samples', 'max_samples'))
+>>> settings.add_constraint(lambda v: v['start'] % v['step'] == 0, 'Start must be a multiple of step')
+>>> settings.set('min_samples', 64)
+SettingsError: Constraint failed: min_samples <= max_samples
+"""
+from settings_manager.exceptions import SettingsError
+
+
+class Constraint(object):
+    """
+    Function of several settings' values that must be true. The settings
+    it reads are recorded each time it's checked so that the group only
+    checks the constraints that read a changed setting.
+    """
+
+    def __init__(self, func, message=None):
+        """
+        :param callable func:       Called with a ConstraintValues, returns
+                                    whether the values are valid.
+        :param str      message:    Description used in errors
+        """
+        self.func = func
+        self.message = message or getattr(func, '__name__', repr(func))
+        self.dependencies = frozenset()
+
+    def __repr__(self):
+        return 'Constraint({!r})'.format(self.message)
+
+    def check(self, group, proposed=None):
+        # type: (settings_manager.SettingsGroup, dict) -> bool
+        """
+        Returns whether the constraint holds, recording its dependencies.
+
+        :raise: SettingsError if the function reads an unknown setting
+        :param dict proposed: {setting_name: value} to use instead of the
+                              settings' current values
+        """
+        values = ConstraintValues(group, proposed)
+        try:
+            valid = bool(self.func(values))
+        except KeyError as e:
+            raise SettingsError(
+                'Unknown setting {} in constraint: {}'.format(e, self.message))
+        finally:
+            self.dependencies = frozenset(values.dependencies)
+        return valid
+
+
+class ConstraintValues(object):
+    """
+    Reads the current or proposed values of a group's settings for a
+    Constraint, recording the names read. Values are read from the Setting
+    objects, so they include values set in a batch that isn't published yet.
+    """
+
+    def __init__(self, group, proposed=None):
+        """
+        :param settings_manager.SettingsGroup   group:
+        :param dict                             proposed:
+        """
+        self.dependencies = set()
+        self._group = group
+        self._proposed = proposed or {}
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def get(self, key):
+        """
+        :raise: KeyError if key is not a setting
+        :param str key:
+        """
+        self.dependencies.add(key)
+        if key in self._proposed:
+            return self._proposed[key]
+        setting = self._group.setting(key)
+        if setting is None:
+            raise KeyError(key)
+        return setting.get()
+
+
+class _LessEqual(object):
+    """ Function for less_equal, a class so that it can be pickled """
+
+    def __init__(self, lower, upper):
+        self.lower = lower
+        self.upper = upper
+
+    def __call__(self, values):
+        return values[self.lower] <= values[self.upper]
+
+
+class _SumEqual(object):
+    """ Function for sum_equal, a class so that it can be pickled """
+
+    def __init__(self, names, total, tolerance):
+        self.names = names
+        self.total = total
+        self.tolerance = tolerance
+
+    def __call__(self, values):
+        return abs(sum(values[name] for name in self.names) - self.total) <= self.tolerance
+
+
+def less_equal(lower, upper, message=None):
+    # type: (str, str, str) -> Constraint
+    """ Constraint that one setting's value is less than or equal to another's """
+    return Constraint(_LessEqual(lower, upper),
+                      message or '{} <= {}'.format(lower, upper))
+
+
+def sum_equal(names, total, tolerance=1e-9, message=None):
+    # type: (list[str], float, float, str) -> Constraint
+    """ Constraint that the sum of the settings' values is total """
+    names = tuple(names)
+    return Constraint(_SumEqual(names, total, tolerance),
+                      message or 'sum({}) == {}'.format(', '.join(names), total))
@@ -0,0 +1,252 @@
+"""
+Undo and redo for the values of a SettingsGroup.
+
+eg,
+
+>>> history = History(settings)
+>>> settings.set('samples', 16)
+>>> history.undo()
+['samples']
+>>> settings.get('samples')
+4
+"""
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+import copy
+import time
+
+from settings_manager.exceptions import SettingsError
+
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class History(object):
+    """
+    Records the changes to a group's values as steps that can be undone and
+    redone. A step only holds the old and new values of the settings it
+    changed, so the memory used depends on the number of changes rather than
+    the number of settings, and a step is moved between the undo and redo
+    stacks rather than copied.
+
+    Consecutive changes to the same setting within merge_interval seconds are
+    merged into one step, eg, while a slider is dragged. The oldest steps are
+    discarded when there are more than max_steps, or the steps hold more than
+    max_values values.
+
+    History is not thread safe, changes should be made from a single thread,
+    eg, the UI thread.
+    """
+
+    def __init__(self, group, max_steps=100, max_values=100000, merge_interval=1.0):
+        """
+        :param settings_manager.SettingsGroup   group:
+        :param int      max_steps:      Maximum number of steps to undo
+        :param int      max_values:     Maximum number of values held by the
+                                        steps. The latest step is always kept.
+        :param float    merge_interval: Seconds between changes to a setting
+                                        to merge them, 0 never merges.
+        """
+        self.max_steps = max_steps
+        self.max_values = max_values
+        self.merge_interval = merge_interval
+        self._group = group
+        # Steps of {setting_name: (old_value, new_value)}, oldest first
+        self._undo = deque()
+        self._redo = []
+        self._value_count = 0  # Number of values held by both stacks
+        self._listeners = ()
+        self._applying = False  # Whether undo or redo is setting values
+        # Step recorded by transaction()
+        self._transaction = None
+        self._transaction_depth = 0
+        # Time the last step changed, None if it can't be merged
+        self._last_change = None
+        group.add_observer(self._on_setting_changed)
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def group(self):
+        # type: () -> settings_manager.SettingsGroup
+        return self._group
+
+    def add_listener(self, callback):
+        """
+        Calls callback with no arguments whenever a step is added, undone or
+        redone, eg, to enable undo and redo actions.
+
+        :param callable callback:
+        """
+        self._listeners += (callback,)
+
+    def can_redo(self):
+        # type: () -> bool
+        return bool(self._redo)
+
+    def can_undo(self):
+        # type: () -> bool
+        return bool(self._undo)
+
+    def checkpoint(self):
+        """ Starts a new step for the next change instead of merging it """
+        self._last_change = None
+
+    def clear(self):
+        self._undo.clear()
+        del self._redo[:]
+        self._value_count = 0
+        self._last_change = None
+        self._notify()
+
+    def close(self):
+        """ Stops recording changes and discards the steps """
+        self._group.remove_observer(self._on_setting_changed)
+        self.clear()
+
+    def redo(self):
+        # type: () -> list[str]
+        """
+        Sets the values changed by the last undone step again.
+
+        :raise: SettingsError if the values break the group's constraints
+        :return: Names of the settings set, empty if there is nothing to redo
+        """
+        if not self._redo:
+            return []
+        step = self._redo.pop()
+        try:
+            self._apply((name, new) for name, (old, new) in step.items())
+        except SettingsError:
+            self._redo.append(step)
+            raise
+        self._undo.append(step)
+        self._last_change = None
+        self._notify()
+        return list(step)
+
+    def remove_listener(self, callback):
+        """
+        :param callable callback: Callback previously given to add_listener
+        """
+        self._listeners = tuple(c for c in self._listeners if c != callback)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager that records every change made inside it as a single
+        step, set in a batch of the group, see SettingsGroup.batch.
+
+        eg,
+
+        >>> with history.transaction():
+        ...     settings.set('min_samples', 64)
+        ...     settings.set('max_samples', 128)
+        """
+        if not self._transaction_depth:
+            self._transaction = OrderedDict()
+        self._transaction_depth += 1
+        try:
+            with self._group.batch():
+                yield self
+        finally:
+            self._transaction_depth -= 1
+            if not self._transaction_depth:
+                step, self._transaction = self._transaction, None
+                # Values set back to their original, eg, by a failed batch
+                for name, (old, new) in list(step.items()):
+                    if old == new:
+                        del step[name]
+                if step:
+                    self._push(step)
+                    self._last_change = None
+
+    def undo(self):
+        # type: () -> list[str]
+        """
+        Restores the values from before the last step.
+
+        :raise: SettingsError if the values break the group's constraints
+        :return: Names of the settings set, empty if there is nothing to undo
+        """
+        if not self._undo:
+            return []
+        step = self._undo.pop()
+        try:
+            self._apply((name, old) for name, (old, new) in reversed(step.items()))
+        except SettingsError:
+            self._undo.append(step)
+            raise
+        self._redo.append(step)
+        self._last_change = None
+        self._notify()
+        return list(step)
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _apply(self, values):
+        # type: (iter[tuple[str, object]]) -> None
+        """ Sets the values in a batch without recording them """
+        self._applying = True
+        try:
+            with self._group.batch():
+                for name, value in values:
+                    # The step keeps its value if the setting's is modified
+                    self._group.set(name, copy.copy(value))
+        finally:
+            self._applying = False
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    def _push(self, step):
+        # type: (OrderedDict) -> None
+        """ Adds a step, discarding the redo steps and the oldest steps """
+        self._value_count -= sum(len(s) for s in self._redo)
+        del self._redo[:]
+        self._undo.append(step)
+        self._value_count += len(step)
+        while len(self._undo) > 1 and (len(self._undo) > self.max_steps or
+                                       self._value_count > self.max_values):
+            self._value_count -= len(self._undo.popleft())
+        self._notify()
+
+    # ======================================================================== #
+    #                                  SLOTS                                   #
+    # ======================================================================== #
+
+    def _on_setting_changed(self, change):
+        # type: (settings_manager.setting.SettingChange) -> None
+        if self._applying:
+            return
+        if self._transaction is not None:
+            if change.name in self._transaction:
+                old = self._transaction[change.name][0]
+            else:
+                old = change.old_value
+            self._transaction[change.name] = (old, change.value)
+            return
+
+        now = _clock()
+        last = self._undo[-1] if self._undo and not self._redo else None
+        if (last is not None and self._last_change is not None and
+                list(last) == [change.name] and
+                now - self._last_change <= self.merge_interval):
+            old = last[change.name][0]
+            if old == change.value:
+                # Merged back to the original value, nothing to undo
+                self._undo.pop()
+                self._value_count -= 1
+                self._last_change = None
+                self._notify()
+            else:
+                last[change.name] = (old, change.value)
+                self._last_change = now
+            return
+
+        self._push(OrderedDict([(change.name, (change.old_value, change.value))]))
+        self._last_change = now if self.merge_interval > 0 else None
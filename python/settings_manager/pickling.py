@@ -0,0 +1,78 @@
+"""
+Compact pickling of SettingsGroups for worker processes.
+
+A pickled SettingsGroup normally contains the definition (type and
+properties) of every setting. When many groups with the same definition are
+sent to the same workers, register the schema once and install it in the
+workers. Groups with a registered schema are then pickled as the schema id
+and a list of values.
+
+eg,
+
+>>> register_schema(settings)
+>>> with ProcessPoolExecutor(initializer=install_schemas,
+...                          initargs=(registered_schemas(),)) as pool:
+...     pool.map(render, [settings, ...])
+
+Processes forked after register_schema inherit the registered schemas.
+"""
+from settings_manager.exceptions import SettingsError
+
+
+_schemas = {}
+
+
+def get_schema(schema_id):
+    """
+    :raise: SettingsError if the schema is not installed in this process
+    :param str  schema_id:
+    :rtype: list[tuple]
+    """
+    try:
+        return _schemas[schema_id]
+    except KeyError:
+        raise SettingsError(
+            'Unknown settings schema {!r}, it must be installed in this '
+            'process with install_schemas'.format(schema_id))
+
+
+def install_schemas(schemas):
+    """
+    Installs schemas from registered_schemas() in the current process, eg,
+    as the initializer for a process pool.
+
+    :param dict schemas:
+    """
+    _schemas.update(schemas)
+
+
+def is_registered(schema_id):
+    # type: (str) -> bool
+    return schema_id in _schemas
+
+
+def register_schema(group):
+    """
+    Registers the definition of a group's settings. Groups with the same
+    definition are then pickled as only their values.
+
+    :param SettingsGroup    group:
+    :rtype: str
+    :return: Schema id
+    """
+    schema_id = group.schema_id()
+    _schemas[schema_id] = [s._definition() for s in group]
+    return schema_id
+
+
+def registered_schemas():
+    """
+    :rtype: dict
+    :return: Every registered schema, to be passed to install_schemas
+    """
+    return dict(_schemas)
+
+
+def unregister_schema(schema_id):
+    # type: (str) -> None
+    _schemas.pop(schema_id, None)
@@ -0,0 +1,217 @@
+"""
+Opt-in counters and timers for the operations that dominate the cost of
+using settings, eg, to find why a tool that builds a SettingsGroup is slow.
+
+Instrumentation is installed by replacing the instrumented methods while
+profiling is enabled and restoring them afterwards, so there is no overhead
+when it is disabled.
+
+eg,
+
+>>> with profiling.profile() as report:
+...     settings = SettingsGroup.from_json(path)
+...     parser = settings.as_argparser()
+>>> print(report)
+>>> metrics.send(report.to_json())
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+import functools
+import importlib
+import json
+import sys
+import threading
+import time
+
+# Cumulative cost of an operation, seconds include any nested operations
+Stats = namedtuple('Stats', 'count seconds')
+
+# (module, class or None for a function, attribute, operation name)
+INSTRUMENTED = (
+    ('settings_manager.setting', 'Setting', 'get', 'Setting.get'),
+    ('settings_manager.setting', 'Setting', 'property', 'Setting.property'),
+    ('settings_manager.setting', 'Setting', 'set', 'Setting.set'),
+    ('settings_manager.settings_group', 'SettingsGroup', 'as_argparser', 'SettingsGroup.as_argparser'),
+    ('settings_manager.settings_group', 'SettingsGroup', 'from_json', 'SettingsGroup.from_json'),
+    ('settings_manager.settings_group', 'SettingsGroup', 'to_json', 'SettingsGroup.to_json'),
+    ('settings_manager.settings_group', 'SettingsGroup', 'update', 'SettingsGroup.update'),
+    ('settings_manager.ui.setting_widgets', None, 'create_setting_widget', 'create_setting_widget'),
+)
+
+_clock = getattr(time, 'perf_counter', time.time)
+_lock = threading.Lock()
+_stats = {}  # type: dict[str, list]
+_enabled = 0  # Number of nested enable() calls
+_installed = []  # type: list[tuple[object, str, object]]
+
+
+class Report(object):
+    """ Counts and cumulative times of the instrumented operations """
+
+    def __init__(self, stats=None, duration=0.0):
+        """
+        :param dict[str, Stats] stats:
+        :param float            duration:   Seconds spent profiling
+        """
+        self._stats = dict(stats or {})
+        self.duration = duration
+
+    def __contains__(self, name):
+        return name in self._stats
+
+    def __getitem__(self, name):
+        # type: (str) -> Stats
+        """ Returns the Stats for an operation, zero if it wasn't called """
+        return self._stats.get(name, Stats(0, 0.0))
+
+    def __iter__(self):
+        return iter(sorted(self._stats))
+
+    def __str__(self):
+        lines = ['{:<32} {:>10} {:>12} {:>12}'.format(
+            'operation', 'count', 'total (ms)', 'mean (us)')]
+        for name, stats in sorted(self._stats.items(), key=lambda i: -i[1].seconds):
+            lines.append('{:<32} {:>10} {:>12.3f} {:>12.3f}'.format(
+                name, stats.count, stats.seconds * 1e3,
+                stats.seconds / stats.count * 1e6 if stats.count else 0))
+        lines.append('Profiled for {:.3f}ms'.format(self.duration * 1e3))
+        return '\n'.join(lines)
+
+    def as_dict(self):
+        # type: () -> dict
+        operations = {}
+        for name, stats in self._stats.items():
+            operations[name] = {
+                'count': stats.count,
+                'seconds': stats.seconds,
+                'mean_seconds': stats.seconds / stats.count if stats.count else 0.0,
+            }
+        return {'duration': self.duration, 'operations': operations}
+
+    def to_json(self, **kwargs):
+        # type: (...) -> str
+        """ Returns as_dict() as json, kwargs are passed to json.dumps """
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+def disable():
+    """ Reverses a call to enable(), uninstalling after the last one """
+    global _enabled
+    with _lock:
+        if not _enabled:
+            raise RuntimeError('Profiling is not enabled')
+        _enabled -= 1
+        if not _enabled:
+            _uninstall()
+
+
+def enable():
+    """
+    Starts counting the instrumented operations until disable() is called.
+    Calls can be nested. Use profile() for a report of a block of code.
+    """
+    global _enabled
+    with _lock:
+        _enabled += 1
+        if _enabled == 1:
+            _install()
+
+
+def is_enabled():
+    # type: () -> bool
+    return bool(_enabled)
+
+
+@contextmanager
+def profile():
+    """
+    Context manager that profiles the operations inside it. The Report it
+    returns is filled in when the block exits.
+
+    :rtype: Report
+    """
+    report = Report()
+    enable()
+    before = report_totals()
+    start = _clock()
+    try:
+        yield report
+    finally:
+        duration = _clock() - start
+        after = report_totals()
+        disable()
+        stats = {}
+        for name in after:
+            count = after[name].count - before[name].count
+            if count:
+                stats[name] = Stats(count, after[name].seconds - before[name].seconds)
+        report.__init__(stats, duration)
+
+
+def report_totals():
+    # type: () -> Report
+    """ Returns the totals since the last reset() """
+    with _lock:
+        return Report(dict((name, Stats(*stats)) for name, stats in _stats.items()))
+
+
+def reset():
+    """ Clears the totals """
+    with _lock:
+        # Installed wrappers hold their list, so it's cleared in place
+        for stats in _stats.values():
+            stats[:] = [0, 0.0]
+
+
+# ============================================================================ #
+#                                  PROTECTED                                   #
+# ============================================================================ #
+
+def _install():
+    for module_name, class_name, attribute, name in INSTRUMENTED:
+        module = importlib.import_module(module_name)
+        if class_name is None:
+            original = getattr(module, attribute)
+            wrapped = _instrument(original, name)
+            # Modules that imported the function hold their own reference
+            for other in list(sys.modules.values()):
+                if getattr(other, attribute, None) is original and \
+                        getattr(other, '__name__', '').startswith('settings_manager'):
+                    setattr(other, attribute, wrapped)
+                    _installed.append((other, attribute, original))
+        else:
+            owner = getattr(module, class_name)
+            original = owner.__dict__[attribute]
+            if isinstance(original, classmethod):
+                wrapped = classmethod(_instrument(original.__func__, name))
+            else:
+                wrapped = _instrument(original, name)
+            setattr(owner, attribute, wrapped)
+            _installed.append((owner, attribute, original))
+
+
+def _instrument(func, name):
+    # type: (callable, str) -> callable
+    stats = _stats.setdefault(name, [0, 0.0])
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A module that imported the function while profiling keeps this
+        # wrapper, so it must do nothing once profiling is disabled
+        if not _enabled:
+            return func(*args, **kwargs)
+        start = _clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = _clock() - start
+            with _lock:
+                stats[0] += 1
+                stats[1] += elapsed
+    return wrapper
+
+
+def _uninstall():
+    while _installed:
+        owner, attribute, original = _installed.pop()
+        setattr(owner, attribute, original)
@@ -0,0 +1,100 @@
+"""
+Settings definitions that are validated once and used to create any number
+of SettingsGroups, eg, for a service that creates a group per request.
+
+eg,
+
+>>> RENDER_SCHEMA = Schema.compile(load_definition())
+>>> settings = RENDER_SCHEMA.create({'samples': 16})
+"""
+from settings_manager.exceptions import SettingsError
+from settings_manager.settings_group import SettingsGroup
+
+
+class Schema(object):
+    """
+    Compiled settings definition. Creating a group from a Schema doesn't
+    validate the definition again: each setting is a copy of a validated
+    template which shares its properties, and the group's fingerprint is
+    copied rather than computed.
+
+    A Schema can't be modified. Modifying the settings of a group created
+    from it doesn't affect the Schema or other groups.
+    """
+
+    def __init__(self, template):
+        """
+        Use Schema.compile
+
+        :param SettingsGroup template: Group that is not used elsewhere
+        """
+        try:
+            # Computes the digests once for every group that is created
+            template.fingerprint()
+        except SettingsError:
+            # Unpicklable settings are fingerprinted by each group if needed
+            pass
+        self._template = template
+        self._names = tuple(setting.name for setting in template)
+        # (class, attributes) of each setting, copied by create()
+        self._settings = tuple(
+            (setting.__class__, dict(vars(setting), _groups=(), _observers=(),
+                                     _validators=()))
+            for setting in template)
+
+    def __contains__(self, name):
+        return name in self._template._contents
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return 'Schema({})'.format(', '.join(self._names))
+
+    @classmethod
+    def compile(cls, definition):
+        """
+        Validates a definition for creating groups.
+
+        :raise: SettingsError if the definition is invalid
+        :param list|dict|SettingsGroup definition: See SettingsGroup. A
+            SettingsGroup's settings, including their current values, and
+            computed values are copied.
+        :rtype: Schema
+        """
+        return cls(SettingsGroup(definition))
+
+    @property
+    def names(self):
+        # type: () -> tuple[str]
+        return self._names
+
+    def create(self, values=None, group_class=SettingsGroup):
+        """
+        Returns a new group of the settings. Only the values are validated.
+
+        :raise: SettingsError if a value is invalid
+        :param dict     values:         {setting_name: value} to set
+        :param type     group_class:    SettingsGroup or a subclass, eg,
+                                        ThreadSafeSettingsGroup
+        :rtype: SettingsGroup
+        """
+        settings = []
+        for cls, attributes in self._settings:
+            setting = cls.__new__(cls)
+            setting.__dict__.update(attributes)
+            settings.append(setting)
+        group = group_class()
+        group._add_compiled(settings, self._template)
+        if values:
+            # Constraints are checked once every value is set
+            group.set_many(values)
+        return group
+
+    def schema_id(self):
+        # type: () -> str
+        """ See SettingsGroup.schema_id """
+        return self._template.schema_id()
@@ -0,0 +1,88 @@
+class SearchIndex(object):
+    """
+    Case insensitive substring index over the text of arbitrary keys.
+
+    Text is split into trigrams (every 3 character sequence). A query is
+    matched by intersecting the keys for each of its trigrams, smallest set
+    first, and confirming the few remaining candidates contain the query.
+    Queries shorter than a trigram fall back to scanning every text.
+
+    eg,
+
+    >>> index = SearchIndex()
+    >>> index.add('max_count', 'max_count', 'Max Number of Items')
+    >>> index.add('directory', 'directory', 'Output Directory')
+    >>> sorted(index.search('number'))
+    ['max_count']
+    """
+    size = 3
+
+    def __init__(self):
+        self._texts = {}     # type: dict[object, str]
+        self._trigrams = {}  # type: dict[str, set]
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, *texts):
+        """
+        Indexes the texts for key, replacing any text previously indexed.
+
+        :param key:         Hashable object returned by search
+        :param str  texts:  Strings to match against, eg, name, label
+        """
+        if key in self._texts:
+            self.discard(key)
+        # Newlines separate the fields so that queries don't match across them
+        text = '\n'.join(t for t in texts if t).lower()
+        self._texts[key] = text
+        for trigram in self._split(text):
+            self._trigrams.setdefault(trigram, set()).add(key)
+
+    def clear(self):
+        self._texts = {}
+        self._trigrams = {}
+
+    def discard(self, key):
+        """ Removes key from the index if present """
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for trigram in self._split(text):
+            keys = self._trigrams[trigram]
+            keys.discard(key)
+            if not keys:
+                del self._trigrams[trigram]
+
+    def search(self, query):
+        """
+        :param str  query:
+        :rtype: set
+        :return: Keys whose text contains query. An empty query matches all.
+        """
+        query = query.lower()
+        if not query:
+            return set(self._texts)
+        if len(query) < self.size:
+            return set(k for k, text in self._texts.items() if query in text)
+
+        candidates = []
+        for trigram in self._split(query):
+            keys = self._trigrams.get(trigram)
+            if not keys:
+                return set()
+            candidates.append(keys)
+        candidates.sort(key=len)
+        matches = set(candidates[0])
+        for keys in candidates[1:]:
+            matches.intersection_update(keys)
+            if not matches:
+                return matches
+        return set(k for k in matches if query in self._texts[k])
+
+    def _split(self, text):
+        # type: (str) -> set[str]
+        return set(text[i:i + self.size] for i in range(len(text) - self.size + 1))
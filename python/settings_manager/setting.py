@@ -1,10 +1,49 @@
+from collections import namedtuple
+import binascii
 import copy
 
+from settings_manager.choices import ChoicesProvider, freeze_choices
 from settings_manager.exceptions import SettingsError
 from settings_manager import util
 
 
+# Passed to observers whenever a setting's value changes
+SettingChange = namedtuple('SettingChange', 'name old_value value')
+
+
+def restore_setting(definition, value):
+    """
+    Recreates a Setting from Setting._definition() and a value, as used when
+    unpickling. The data was validated when the original Setting was created
+    so validation is skipped.
+
+    :param tuple    definition:
+    :param object   value:
+    :rtype: Setting
+    """
+    cls, name, data_type, subtype, properties = definition
+    setting = cls.__new__(cls)
+    setting._name = name
+    setting._type = data_type
+    setting._subtype = subtype
+    setting._properties = dict(properties)
+    for key in cls.ui_properties:
+        setting._properties.setdefault(key, None)
+    setting._value = value
+    setting._observers = ()
+    setting._validators = ()
+    setting._groups = ()
+    setting._digest = None
+    setting._value_digest = None
+    setting._choice_set = None
+    return setting
+
+
 class Setting(object):
+    # Properties that only apply to the UI and are not pickled, eg, widget
+    # classes would import Qt in the unpickling process
+    ui_properties = ('widget',)
+
     def __init__(self, name, default, choices=None, data_type=None,
                  hidden=False, label=None, minmax=None, nullable=False,
                  subtype=None, tooltip=None, widget=None, **kwargs):
@@ -12,7 +51,9 @@ class Setting(object):
         :param str        name:       Name of the setting.
         :param object     default:    Value. If None, data_type is required.
 
-        :param list       choices:    List of fixed values for the setting.
+        :param list|callable choices: List of fixed values for the setting,
+                                      or a function or ChoicesProvider that
+                                      returns them, see choices_provider().
         :param            data_type:  Type of the value. Inferred from default 
                                       if not given.
         :param bool       hidden:     Whether or not the setting should be 
@@ -33,11 +74,23 @@ class Setting(object):
                                       UI widget to use for this setting. If 
                                       None, a default UI will be generated.
         """
+        if callable(choices) and not isinstance(choices, ChoicesProvider):
+            choices = ChoicesProvider(choices)
+
         # Fixed properties
         self._name = self._validate_name(name)
         self._type = self._validate_data_type(data_type, default, choices, minmax)
         self._subtype = self._validate_subtype(subtype, default, choices)
         self._value = None
+        self._observers = ()
+        # Called with (setting, value) before a valid value is set, eg, to
+        # check a group's constraints. They raise SettingsError to reject it.
+        self._validators = ()
+        # Groups containing the setting, notified when its content changes
+        self._groups = ()
+        self._digest = None  # Cached by _schema_digest
+        self._value_digest = None  # (value, digest), see _content_digest
+        self._choice_set = None  # Cached by _choices_for_validation
 
         # Validate optional properties
         if minmax is not None:
@@ -62,19 +115,29 @@ class Setting(object):
         }
         self._properties.update(kwargs)
 
-        # Attempt to set the default value to validate it
-        self.set(default)
+        # Attempt to set the default value to validate it. Provided choices
+        # are computed when first needed rather than here, the default is
+        # only checked against them if they're already cached.
+        self._validate_and_set(default, compute_choices=False)
 
     def __eq__(self, other):
         if isinstance(other, str):
             return other == self._name
         if isinstance(other, Setting):
-            return self.as_dict() == other.as_dict()
+            # Same as comparing as_dict() without copying
+            return (self is other or
+                    (self._name == other._name and self._type == other._type and
+                     self._value == other._value and
+                     self._properties == other._properties))
         return False
 
     def __hash__(self):
         return hash(self._name)
 
+    def __reduce__(self):
+        # Observers and UI properties are not sent
+        return restore_setting, (self._definition(), self._value)
+
     def __repr__(self):
         properties = self._properties.copy()
         properties['data_type'] = self._type
@@ -100,6 +163,16 @@ class Setting(object):
         # type: () -> type
         return self._type
 
+    def add_observer(self, callback):
+        """
+        Calls callback with a SettingChange every time the value changes.
+        Callbacks are called synchronously by set(), in the order added.
+
+        :param callable callback:
+        """
+        # Stored as a tuple so that set() can iterate without copying
+        self._observers += (callback,)
+
     def as_dict(self):
         # type: () -> dict
         properties = copy.deepcopy(self._properties)
@@ -128,7 +201,7 @@ class Setting(object):
         if tooltip:
             args['help'] = tooltip
 
-        choices = self._properties['choices']
+        choices = self.property('choices')
         if choices:
             args['choices'] = choices
 
@@ -166,6 +239,45 @@ class Setting(object):
 
         return flag, args
 
+    def choices_provider(self):
+        # type: () -> ChoicesProvider
+        """
+        Returns the ChoicesProvider if the choices are computed, otherwise
+        None. property('choices') returns the provider's current choices.
+
+        :rtype: ChoicesProvider
+        """
+        choices = self._properties['choices']
+        return choices if isinstance(choices, ChoicesProvider) else None
+
+    def copy(self):
+        """
+        Returns a copy of the setting and its current value, without any
+        observers.
+
+        :rtype: Setting
+        """
+        definition = (self.__class__, self._name, self._type, self._subtype,
+                      copy.deepcopy(self._properties))
+        return restore_setting(definition, copy.copy(self._value))
+
+    def fingerprint(self):
+        # type: () -> str
+        """
+        Returns a digest of the setting's name, type, properties and value,
+        eg, as a cache key. It is the same in every process. UI properties
+        are not included.
+
+        :raise: SettingsError if the value or properties can't be pickled
+        :rtype: str
+        """
+        try:
+            digest = self._content_digest()
+        except Exception as e:
+            raise SettingsError(
+                'Unable to fingerprint setting {!r}: {}'.format(self._name, e))
+        return binascii.hexlify(digest).decode('ascii')
+
     def get(self):
         """
         Returns the value. If the key is disabled of has a
@@ -196,7 +308,29 @@ class Setting(object):
         :return: Property value
         """
         # Accessor only
-        return copy.copy(self._properties[name])
+        value = self._properties[name]
+        if isinstance(value, ChoicesProvider):
+            return list(value.choices())
+        return copy.copy(value)
+
+    def property_is_set(self, name):
+        """
+        Whether the property has a value that isn't None or empty, eg, no
+        choices. Unlike property(), the value is not copied.
+
+        :param str  name:
+        :rtype: bool
+        """
+        return bool(self._properties.get(name))
+
+    def remove_observer(self, callback):
+        """
+        :raise: ValueError if callback is not an observer
+        :param callable callback:
+        """
+        observers = list(self._observers)
+        observers.remove(callback)
+        self._observers = tuple(observers)
 
     def reset(self):
         """
@@ -214,9 +348,106 @@ class Setting(object):
         :raise: SettingsError if not a valid value.
         :param value:
         """
+        self._validate_and_set(value)
+
+    def set_property(self, name, value):
+        """
+        Sets a property value.
+
+        Warning:
+            This does not validate the current value against the new property.
+            It is advised to call Setting.set(Setting.get()) after making all
+            required modifications to ensure the current value is valid.
+
+        :param str  name:
+        :param      value:
+        """
+        if name == 'choices' and value is not None:
+            if callable(value) and not isinstance(value, ChoicesProvider):
+                value = ChoicesProvider(value)
+            value = self._validate_choices(value)
+            minmax = self._properties['minmax']
+            self._validate_multi_choice(value, minmax)
+        elif name == 'minmax':
+            value = self._validate_minmax(value)
+            choices = self._properties['choices']
+            if choices is not None:
+                self._validate_multi_choice(choices, value)
+        # Replaced rather than modified, settings created by a Schema share
+        # their properties
+        properties = dict(self._properties)
+        properties[name] = value
+        self._properties = properties
+        self._digest = None
+        self._choice_set = None
+        for group in self._groups:
+            group._modified.add(self._name)
+
+    def _choices_for_validation(self, compute=True):
+        # type: (bool) -> frozenset|list
+        """
+        Returns the choices to test values against, or None. Provided choices
+        that aren't cached are None unless compute is True.
+        """
+        choices = self._properties['choices']
+        if isinstance(choices, ChoicesProvider):
+            if compute or not choices.is_stale():
+                return choices.choice_set()
+            return None
+        if choices is not None and self._choice_set is None:
+            self._choice_set = freeze_choices(choices)
+        return self._choice_set
+
+    def _content_digest(self):
+        # type: () -> bytes
+        """ Digest of the schema and value, see fingerprint() """
+        # The value digest is checked against the value it was made from
+        # rather than cleared by set(), so set() costs nothing extra
+        cached = self._value_digest
+        value = self._value
+        if cached is None or cached[0] is not value:
+            cached = self._value_digest = (value, util.digest(value))
+        return self._schema_digest() + cached[1]
+
+    def _definition(self):
+        # type: () -> tuple
+        """ Everything but the value required to recreate the Setting """
+        properties = dict((k, v) for k, v in self._properties.items()
+                          if k not in self.ui_properties)
+        return self.__class__, self._name, self._type, self._subtype, properties
+
+    def _schema_digest(self):
+        # type: () -> bytes
+        if self._digest is None:
+            # Properties are sorted so the digest doesn't depend on the
+            # order they were given in
+            cls, name, data_type, subtype, properties = self._definition()
+            self._digest = util.digest(
+                (cls, name, data_type, subtype, sorted(properties.items())))
+        return self._digest
+
+    def _set(self, value):
+        old_value = self._value
+        # Copied like get(), so the caller can't modify the value afterwards,
+        # eg, leaving the cached value digest out of date
+        value = self._value = copy.copy(value)
+        for group in self._groups:
+            group._modified.add(self._name)
+        if self._observers and old_value != value:
+            change = SettingChange(self._name, copy.copy(old_value), copy.copy(value))
+            for callback in self._observers:
+                callback(change)
+
+    def _validate_and_set(self, value, compute_choices=True):
+        """
+        See set(). Provided choices that aren't cached are only computed if
+        compute_choices, otherwise the value isn't checked against them.
+        """
         # Nullable can set without further validation
         nullable = self._properties['nullable']
         if value is None and nullable:
+            for validator in self._validators:
+                validator(self, value)
             self._set(value)
             return
 
@@ -227,7 +458,7 @@ class Setting(object):
                 'setting {!r}'.format(value, self._name))
 
         # Special properties
-        choices = self._properties['choices']
+        choices = self._choices_for_validation(compute_choices)
         minmax = self._properties['minmax']
         # Multi choice properties require a subset of values from choices.
         if choices is not None and minmax is not None:
@@ -236,7 +467,7 @@ class Setting(object):
                 raise SettingsError(
                     'Invalid number of choices for '
                     'setting: {!r}'.format(self._name))
-            if not set(value).issubset(set(choices)):
+            if not all(v in choices for v in value):
                 raise SettingsError(
                     'Invalid choices for setting: {!r}'.format(self._name))
         elif choices is not None:
@@ -252,35 +483,16 @@ class Setting(object):
                     'Value does not fit in range {} for setting: '
                     '{!r}'.format(minmax, self._name))
 
+        for validator in self._validators:
+            validator(self, value)
         self._set(value)
 
-    def set_property(self, name, value):
-        """
-        Sets a property value.
-
-        Warning:
-            This does not validate the current value against the new property.
-            It is advised to call Setting.set(Setting.get()) after making all
-            required modifications to ensure the current value is valid.
-
-        :param str  name:
-        :param      value:
-        """
-        if name == 'choices':
-            value = self._validate_choices(value)
-            minmax = self._properties['minmax']
-            self._validate_multi_choice(value, minmax)
-        elif name == 'minmax':
-            value = self._validate_minmax(value)
-            choices = self._properties['choices']
-            self._validate_multi_choice(choices, value)
-        self._properties[name] = value
-
-    def _set(self, value):
-        self._value = value
-
     def _validate_choices(self, choices):
         # type: (list) -> list
+        # Provided choices are computed later and aren't type checked, values
+        # are still checked against them
+        if isinstance(choices, ChoicesProvider):
+            return choices
         if not all(isinstance(c, self._type) for c in choices):
             raise SettingsError(
                 "{!r}'s choices do not match "
@@ -304,6 +516,8 @@ class Setting(object):
                         data_type, self._name))
             data_type = cls
         if data_type is None and default is None:
+            if isinstance(choices, ChoicesProvider):
+                choices = choices.choices()
             if not choices:
                 raise SettingsError('Unknown data type for setting {!r}. '
                                     'Must specify a data type or valid '
@@ -346,6 +560,12 @@ class Setting(object):
         # of choices required are defined by minmax.
         # If type is list and choices are given without minmax, minmax must
         # be the full range of choices.
+        if isinstance(choices, ChoicesProvider):
+            # The number of provided choices can change, so it is only
+            # checked against the values that are set
+            if minmax:
+                return minmax
+            choices = choices.choices()
         minmax = minmax or (0, len(choices))
         lo, hi = minmax
         num_choices = len(choices)
@@ -377,6 +597,9 @@ class Setting(object):
             return
         # All possible options should be present in default and choices
         # either of which may be None or empty.
+        if isinstance(choices, ChoicesProvider):
+            # Only computed if the subtype can't be determined otherwise
+            choices = choices.choices() if subtype is None and not default else None
         options = (default or []) + (choices or [])
         if subtype is None:
             if not options:
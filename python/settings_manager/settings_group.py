@@ -1,13 +1,68 @@
 from collections import OrderedDict
+from contextlib import contextmanager
 import argparse
+import copy
+import hashlib
 import json
+import pickle
 import sys
 
+from settings_manager.computed import Computed
+from settings_manager.constraints import Constraint
 from settings_manager.exceptions import SettingsError
-from settings_manager.setting import Setting
+from settings_manager.setting import Setting, SettingChange, restore_setting
+from settings_manager import pickling
 from settings_manager import util
 
 
+# Content digests are summed modulo the size of a sha1 digest
+_DIGEST_MODULUS = 2 ** 160
+
+
+def _position_digest(position, content_digest):
+    # type: (int, bytes) -> int
+    """
+    Digest of a setting's content at a position, from
+    Setting._content_digest(), see SettingsGroup._content_digest
+    """
+    digest = hashlib.sha1(str(position).encode('ascii') + content_digest)
+    return int(digest.hexdigest(), 16)
+
+
+def _cast_json_types(setting_data):
+    # type: (dict) -> None
+    """ Types are converted to strings in json, evaluates them back to types """
+    for key in ('data_type', 'subtype', 'widget'):
+        item = setting_data.get(key)
+        if item is not None and isinstance(item, str):
+            setting_data[key] = util.class_from_string(item)
+
+
+def _loads_json(text):
+    # type: (str) -> OrderedDict
+    """ Reads json settings data, preserving the settings order """
+    # Dicts are ordered from python 3.7, and decoding them is faster
+    ordered = OrderedDict if sys.version_info < (3, 7) else None
+    data = json.loads(text, object_pairs_hook=ordered)
+
+    # Convert data from unicode to string (python 2 only)
+    if sys.version_info[0] < 3:
+        data = util.byteify(data)
+    return data
+
+
+def _restore_group(cls, schema_id, definitions, values, constraints=None):
+    """ Unpickles a SettingsGroup, see SettingsGroup.__reduce__ """
+    if definitions is None:
+        definitions = pickling.get_schema(schema_id)
+    group = cls()
+    group._add_settings([restore_setting(definition, value)
+                         for definition, value in zip(definitions, values)])
+    for func, message in constraints or ():
+        group.add_constraint(Constraint(func, message))
+    return group
+
+
 class SettingsGroup(object):
     """
     Convenience class for storing settings with explicit data types.
@@ -37,24 +92,24 @@ class SettingsGroup(object):
         :rtype: SettingsGroup
         """
         with open(path, 'r') as f:
-            data = json.load(f, object_pairs_hook=OrderedDict)
-
-        # Convert data from unicode to string (python 2 only)
-        if sys.version_info[0] < 3:
-            data = util.byteify(data)
-
-        def cast_from_string(data, key):
-            item = data.get(key)
-            if item is not None and isinstance(item, str):
-                data[key] = util.class_from_string(item)
-
-        # Types are converted to strings in json, evaluate them back to types
-        for setting_data in data.values():
+            data = _loads_json(f.read())
+        values = {}
+        for name, setting_data in list(data.items()):
             if isinstance(setting_data, dict):
-                cast_from_string(setting_data, 'data_type')
-                cast_from_string(setting_data, 'widget')
+                # Computed values written by to_json can't be recreated
+                if setting_data.get('computed'):
+                    del data[name]
+                    continue
+                _cast_json_types(setting_data)
+                # Written by to_json, the value is set once the setting exists
+                setting_data.pop('name', None)
+                if 'value' in setting_data:
+                    values[name] = setting_data.pop('value')
 
-        return cls(data)
+        group = cls(data)
+        for name, value in values.items():
+            group.set(name, value)
+        return group
 
     def __init__(self, settings=None):
         """
@@ -67,13 +122,76 @@ class SettingsGroup(object):
                 * List of tuples; (setting_name, value)
         """
         self._contents = OrderedDict()
+        # (callback, keys) pairs, see add_observer
+        self._observers = ()
+        # {name: Computed} and {name: names of the Computed that read it}
+        self._computed = OrderedDict()
+        self._dependents = {}  # type: dict[str, set[str]]
+        # Constraints and {name: constraints that read it}, see add_constraint
+        self._constraints = []
+        self._constraints_by_name = {}  # type: dict[str, set[Constraint]]
+        # Constraints deferred by batch() and the original values of the
+        # settings they read, restored if one fails
+        self._constraint_depth = 0
+        self._pending_constraints = set()
+        self._batch_originals = {}
+        # The content digest is the sum of a digest for each setting and its
+        # position, so only the settings modified since the last digest are
+        # rehashed, see _content_digest
+        self._digests = {}  # type: dict[str, tuple[int, int]]
+        self._digest_sum = 0
+        self._modified = set()  # Setting names, added to by Setting
+        self._ui_values = {}  # Settings with UI properties, compared by __eq__
         if settings is not None:
             self.update(settings)
 
     def __eq__(self, other):
         if not isinstance(other, SettingsGroup):
             return False
-        return self.as_dict(ordered=True) == other.as_dict(ordered=True)
+        if self is other:
+            return True
+        if len(self) != len(other):
+            return False
+        fingerprint = self._content_digest()
+        other_fingerprint = other._content_digest()
+        if fingerprint is None or other_fingerprint is None:
+            # Unpicklable contents are compared directly
+            return list(self) == list(other)
+        return (fingerprint == other_fingerprint and
+                self._ui_values == other._ui_values)
+
+    def __deepcopy__(self, memo):
+        # Copied without pickling, so that constraints needn't be picklable
+        copied = self.__class__()
+        copied._add_settings([
+            restore_setting(*copy.deepcopy((s._definition(), s._value), memo))
+            for s in self._contents.values()])
+        for constraint in self._constraints:
+            copied.add_constraint(Constraint(constraint.func, constraint.message))
+        return copied
+
+    def __reduce__(self):
+        # Only the settings and constraints are sent, observers are local to
+        # the process. If the schema is registered the definitions are
+        # assumed to be installed on the receiving side, see
+        # settings_manager.pickling
+        schema_id = self.schema_id()
+        definitions = None
+        if not pickling.is_registered(schema_id):
+            definitions = [s._definition() for s in self._contents.values()]
+        values = [s._value for s in self._contents.values()]
+        constraints = []
+        for constraint in self._constraints:
+            # Lambdas and local functions can't be pickled, pickle's error
+            # wouldn't say which constraint
+            try:
+                pickle.dumps(constraint.func, 2)
+            except Exception as e:
+                raise SettingsError(
+                    "Can't pickle constraint {!r}: {}".format(constraint.message, e))
+            constraints.append((constraint.func, constraint.message))
+        return _restore_group, (self.__class__, schema_id, definitions, values,
+                                constraints)
 
     def __getitem__(self, item):
         return self.get(item)
@@ -121,15 +239,84 @@ class SettingsGroup(object):
                                         None, a default UI will be generated.
         :rtype: Setting
         """
-        if name in self._contents:
+        if name in self._contents or name in self._computed:
             raise SettingsError('Setting already exists: {!r}'.format(name))
         setting = Setting(name, default, choices=choices, data_type=data_type,
                           hidden=hidden, label=label, minmax=minmax,
                           nullable=nullable, subtype=subtype, tooltip=tooltip,
                           widget=widget, **kwargs)
-        self._contents[name] = setting
+        self._add_settings([setting])
         return setting
 
+    def add_computed(self, name, func):
+        """
+        Adds a value derived from other settings, read with get() like a
+        setting. func is called with a reader for the group's values, eg,
+
+        >>> settings.add_computed('output', lambda s: s['root'] + '/' + s.get('shot'))
+
+        The settings and computed values it reads are recorded, and the result
+        is memoised until one of them changes. The function is called when
+        the value is first read after a change, so computed values don't
+        notify observers. Computed values are not settings: they aren't
+        iterated, pickled or shown in a UI.
+
+        :raise: SettingsError if name is already used
+        :param str      name:
+        :param callable func:   Returns the value given a reader with the
+                                group's get() and item access.
+        """
+        if name in self._contents or name in self._computed:
+            raise SettingsError('Setting already exists: {!r}'.format(name))
+        observing = self._observes_settings()
+        self._computed[name] = Computed(name, func)
+        if not observing and self._observes_settings():
+            for setting in self._contents.values():
+                setting.add_observer(self._on_setting_changed)
+
+    def add_constraint(self, constraint, message=None):
+        """
+        Adds a condition on the values of several settings, eg,
+
+        >>> settings.add_constraint(lambda v: v['min_samples'] <= v['max_samples'])
+
+        Setting a value that breaks a constraint raises a SettingsError and
+        leaves the value unchanged. The settings each constraint reads are
+        recorded, so setting a value only checks the constraints that read
+        it. Use batch() to set several values before they are checked.
+
+        :raise: SettingsError if the current values break the constraint
+        :param Constraint|callable  constraint: Constraint, or a function
+                                                called with the settings'
+                                                values, see Constraint.
+        :param str                  message:    Description for errors if
+                                                constraint is a function.
+        :rtype: Constraint
+        """
+        if not isinstance(constraint, Constraint):
+            constraint = Constraint(constraint, message)
+        if not constraint.check(self):
+            raise SettingsError(
+                'Constraint failed: {}'.format(constraint.message))
+        self._constraints.append(constraint)
+        self._index_constraint(constraint, frozenset(), constraint.dependencies)
+        return constraint
+
+    def add_observer(self, callback, keys=None):
+        """
+        Calls callback with a SettingChange every time a setting's value
+        changes, including settings added after the observer. Callbacks are
+        called synchronously by set(), in the order added.
+
+        :param callable     callback:
+        :param list[str]    keys:       Restricts changes to keys if given.
+        """
+        if not self._observes_settings():
+            for setting in self._contents.values():
+                setting.add_observer(self._on_setting_changed)
+        keys = frozenset(keys) if keys is not None else None
+        self._observers += ((callback, keys),)
+
     def as_argparser(self, keys=None, hidden=False, **kwargs):
         """
         Create an ArgumentParser for the current settings.
@@ -152,27 +339,85 @@ class SettingsGroup(object):
 
         return parser
 
-    def as_dict(self, ordered=False, values_only=False):
+    def as_dict(self, ordered=False, values_only=False, computed=False):
         """
         Returns the settings as a dictionary mapping setting_name to value.
 
         :param bool ordered:     If True, returns an OrderedDict instead of dict
         :param bool values_only: If True, only writes values instead of full properties
+        :param bool computed:    If True, includes the computed values after
+                                 the settings. Without values_only, each is
+                                 a dict of its name and value, and computed.
         :rtype: dict
         """
         generator = ((s.name, s.get()) if values_only else (s.name, s.as_dict())
                      for s in self._contents.values())
         data_type = OrderedDict if ordered else dict
-        return data_type(generator)
+        data = data_type(generator)
+        if computed:
+            for name in self._computed:
+                value = self.get(name)
+                data[name] = value if values_only else {
+                    'computed': True, 'name': name, 'value': value}
+        return data
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager that checks the constraints once for all the values
+        set inside it, when it exits, eg, to swap a minimum and maximum.
+
+        If a constraint fails, or an exception is raised inside it, the
+        settings read by constraints are restored to their values from
+        before the batch. Other settings keep their new values.
+
+        eg,
+
+        >>> with settings.batch():
+        ...     settings.set('min_samples', 64)
+        ...     settings.set('max_samples', 128)
+
+        :raise: SettingsError if a constraint fails
+        """
+        self._constraint_depth += 1
+        succeeded = False
+        try:
+            yield self
+            succeeded = True
+        finally:
+            self._constraint_depth -= 1
+            if not self._constraint_depth:
+                self._finish_batch(succeeded)
+
+    def fingerprint(self):
+        # type: () -> str
+        """
+        Returns a digest of the settings' names, types, properties and
+        values in order, eg, as a cache key. It is the same in every process.
+        Only the settings changed since the last call are rehashed. UI
+        properties are not included.
+
+        :raise: SettingsError if a value or property can't be pickled
+        :rtype: str
+        """
+        fingerprint = self._content_digest()
+        if fingerprint is None:
+            # Raises the error for the setting that can't be pickled
+            for setting in self._contents.values():
+                setting.fingerprint()
+        return fingerprint
 
     def get(self, key):
         """
-        :raise: KeyError if key is not a valid setting
+        :raise: KeyError if key is not a valid setting or computed value
 
         :param str key:
         :return: Value for the given setting name.
         """
-        return self._contents[key].get()
+        setting = self._contents.get(key)
+        if setting is None:
+            return self._get_computed(key)
+        return setting.get()
 
     def has_visible(self):
         """
@@ -182,18 +427,41 @@ class SettingsGroup(object):
         """
         return any(not s.property('hidden') for s in self._contents.values())
 
+    def remove_constraint(self, constraint):
+        """
+        :raise: ValueError if constraint is not in the group
+        :param Constraint constraint: As returned by add_constraint
+        """
+        self._constraints.remove(constraint)
+        self._index_constraint(constraint, constraint.dependencies, frozenset())
+
+    def remove_observer(self, callback):
+        """
+        :raise: ValueError if callback is not an observer
+        :param callable callback:
+        """
+        observers = [o for o in self._observers if o[0] != callback]
+        if len(observers) == len(self._observers):
+            raise ValueError('Not an observer: {!r}'.format(callback))
+        self._observers = tuple(observers)
+        # Settings only notify the group while it has observers
+        if not self._observes_settings():
+            for setting in self._contents.values():
+                setting.remove_observer(self._on_setting_changed)
+
     def reset(self):
         """
         Restores all settings to their default value
 
         :return:
         """
-        for setting in self._contents.values():
-            setting.reset()
+        with self.batch():
+            for setting in self._contents.values():
+                setting.reset()
 
     def set(self, key, value):
         """
-        Sets a setting's value. Triggers the settingChanged signal to be emitted.
+        Sets a setting's value. Observers are notified if the value changes.
 
         :raise: KeyError if key is not a valid setting
 
@@ -203,6 +471,31 @@ class SettingsGroup(object):
         setting = self._contents[key]
         setting.set(value)
 
+    def set_many(self, values):
+        """
+        Sets several values in a batch, see batch().
+
+        :raise: KeyError if a key is not a valid setting
+        :raise: SettingsError if a value is invalid or breaks a constraint
+        :param dict values: {setting_name: value}
+        """
+        with self.batch():
+            for key, value in values.items():
+                self.set(key, value)
+
+    def schema_id(self):
+        """
+        Returns a digest of the settings' names, types and properties, but not
+        their values. Groups created from the same definition share an id,
+        which is stable across processes.
+
+        :rtype: str
+        """
+        digest = hashlib.sha1()
+        for setting in self._contents.values():
+            digest.update(setting._schema_digest())
+        return digest.hexdigest()
+
     def setting(self, key):
         """
         :param str  key:
@@ -210,16 +503,18 @@ class SettingsGroup(object):
         """
         return self._contents.get(key)
 
-    def to_json(self, ordered=True, values_only=False):
+    def to_json(self, ordered=True, values_only=False, computed=False):
         """
         Writes the settings to a json object. Unrecognised objects will be
         converted to their __name__ attribute if available, otherwise to __str__
 
         :param bool ordered:     If True, preserves the settings order
         :param bool values_only: If True, only writes the settings names and values
+        :param bool computed:    If True, writes the computed values, see
+                                 as_dict. from_json skips them.
 
         """
-        data = self.as_dict(ordered=ordered, values_only=values_only)
+        data = self.as_dict(ordered=ordered, values_only=values_only, computed=computed)
         return json.dumps(data, default=util.object_to_string)
 
     def update(self, settings):
@@ -234,8 +529,12 @@ class SettingsGroup(object):
                 * List of tuples; (setting_name, value)
         """
         if isinstance(settings, SettingsGroup):
-            settings = settings.as_dict(ordered=True)
-        if isinstance(settings, dict):
+            self._add_settings([setting.copy() for setting in settings])
+            for computed in settings._computed.values():
+                self.add_computed(computed.name, computed.func)
+            for constraint in settings._constraints:
+                self.add_constraint(Constraint(constraint.func, constraint.message))
+        elif isinstance(settings, dict):
             for setting, data in settings.items():
                 # Dictionary of properties {setting_name: {...}}
                 if isinstance(data, dict):
@@ -258,3 +557,217 @@ class SettingsGroup(object):
                 else:
                     setting, value = item
                     self.add_setting(setting, value)
+
+    def watch(self, keys=None, maxsize=1024):
+        """
+        Returns an asynchronous stream of SettingChanges for use with asyncio.
+        Python 3 only.
+
+        eg,
+
+        >>> async for change in settings.watch(['max_count']):
+        ...     print(change.name, change.value)
+
+        :param list[str]    keys:       Restricts changes to keys if given.
+        :param int          maxsize:    Maximum number of settings with
+                                        pending changes, see ChangeStream.
+        :rtype: settings_manager.watch.ChangeStream
+        """
+        # Imported here as asyncio is not available in python 2
+        from settings_manager.watch import ChangeStream
+        return ChangeStream(self, keys=keys, maxsize=maxsize)
+
+    def _add_compiled(self, settings, template):
+        # type: (list[Setting], SettingsGroup) -> None
+        """
+        Adds settings created by a Schema to an empty group, copying the
+        digests from the Schema's template group rather than computing them
+        """
+        for setting in settings:
+            setting._groups = (self,)
+        self._contents = OrderedDict((setting.name, setting) for setting in settings)
+        self._digests = dict(template._digests)
+        self._digest_sum = template._digest_sum
+        self._modified = set(template._modified)
+        self._ui_values = dict(template._ui_values)
+        for computed in template._computed.values():
+            self.add_computed(computed.name, computed.func)
+        for constraint in template._constraints:
+            self.add_constraint(Constraint(constraint.func, constraint.message))
+
+    def _add_settings(self, settings):
+        # type: (list[Setting]) -> None
+        """ Adds already validated Setting objects """
+        for setting in settings:
+            if setting.name in self._contents or setting.name in self._computed:
+                raise SettingsError(
+                    'Setting already exists: {!r}'.format(setting.name))
+            self._contents[setting.name] = setting
+            self._track_setting(setting)
+            if self._observes_settings():
+                setting.add_observer(self._on_setting_changed)
+
+    def _check_constraint(self, constraint, proposed=None):
+        # type: (Constraint, dict) -> bool
+        """ Checks a constraint, indexing the settings it read """
+        old = constraint.dependencies
+        valid = constraint.check(self, proposed)
+        if constraint.dependencies != old:
+            self._index_constraint(constraint, old, constraint.dependencies)
+        return valid
+
+    def _check_constraints(self, setting, value):
+        # type: (Setting, object) -> None
+        """
+        Setting validator checking the constraints that read the setting
+
+        :raise: SettingsError if a constraint fails
+        """
+        constraints = self._constraints_by_name.get(setting.name)
+        if not constraints:
+            return
+        if self._constraint_depth:
+            self._batch_originals.setdefault(setting.name, setting._value)
+            self._pending_constraints.update(constraints)
+            return
+        proposed = {setting.name: value}
+        # Indexing may modify the set
+        for constraint in list(constraints):
+            if not self._check_constraint(constraint, proposed):
+                raise SettingsError(
+                    'Constraint failed: {}'.format(constraint.message))
+
+    def _content_digest(self):
+        # type: () -> str
+        """
+        Returns the fingerprint, updating the digests of the modified
+        settings, or None if the settings can't be pickled.
+        """
+        if self._modified:
+            # Popped rather than iterated, settings may add names while
+            # hashing, eg, when set from another thread. Those not popped
+            # are kept for the next call.
+            modified = []
+            while self._modified:
+                modified.append(self._modified.pop())
+            total = self._digest_sum
+            try:
+                for name in modified:
+                    setting = self._contents[name]
+                    position, old_digest = self._digests[name]
+                    digest = _position_digest(position, setting._content_digest())
+                    total += digest - old_digest
+                    self._digests[name] = (position, digest)
+                    self._track_ui_values(setting)
+            except Exception:
+                self._modified.update(modified)
+                return None
+            finally:
+                self._digest_sum = total % _DIGEST_MODULUS
+        return '{:040x}'.format(self._digest_sum)
+
+    def _finish_batch(self, succeeded):
+        # type: (bool) -> None
+        """
+        Checks the constraints deferred by batch(), restoring the original
+        values if one fails or the batch didn't succeed
+
+        :raise: SettingsError if a constraint fails
+        """
+        pending, self._pending_constraints = self._pending_constraints, set()
+        originals, self._batch_originals = self._batch_originals, {}
+        failed = None
+        if succeeded:
+            # Checked in the order added so that errors are deterministic
+            for constraint in self._constraints:
+                if constraint in pending and not self._check_constraint(constraint):
+                    failed = constraint
+                    break
+        if failed is not None or not succeeded:
+            for name, value in originals.items():
+                self._contents[name]._set(value)
+        if failed is not None:
+            raise SettingsError(
+                'Constraint failed: {}'.format(failed.message))
+
+    def _get_computed(self, key):
+        """
+        :raise: KeyError if key is not a computed value
+        :param str key:
+        """
+        computed = self._computed[key]
+        if not computed.valid:
+            value, dependencies = computed.evaluate(self)
+            for name in computed.dependencies - dependencies:
+                self._dependents[name].discard(key)
+            for name in dependencies - computed.dependencies:
+                self._dependents.setdefault(name, set()).add(key)
+            computed.dependencies = dependencies
+            computed.value = value
+            computed.valid = True
+        return copy.copy(computed.value)
+
+    def _index_constraint(self, constraint, old, new):
+        # type: (Constraint, frozenset, frozenset) -> None
+        """
+        Updates the constraints read by each setting, adding the validator
+        to settings read by their first constraint and removing it from
+        settings no longer read by any
+        """
+        for name in old - new:
+            constraints = self._constraints_by_name[name]
+            constraints.discard(constraint)
+            if not constraints:
+                del self._constraints_by_name[name]
+                setting = self._contents[name]
+                setting._validators = tuple(
+                    v for v in setting._validators if v != self._check_constraints)
+        for name in new - old:
+            if name not in self._constraints_by_name:
+                setting = self._contents[name]
+                self._constraints_by_name[name] = set()
+                setting._validators += (self._check_constraints,)
+            self._constraints_by_name[name].add(constraint)
+
+    def _invalidate_computed(self, names):
+        # type: (iter[str]) -> None
+        """ Invalidates the computed values that depend on names """
+        # A computed value is only valid if its dependencies are, so there
+        # is no need to visit the dependents of an invalid value
+        stack = list(names)
+        while stack:
+            for key in self._dependents.get(stack.pop(), ()):
+                computed = self._computed[key]
+                if computed.valid:
+                    computed.invalidate()
+                    stack.append(key)
+
+    def _observes_settings(self):
+        # type: () -> bool
+        """ Whether settings notify _on_setting_changed """
+        return bool(self._observers or self._computed)
+
+    def _on_setting_changed(self, change):
+        # type: (SettingChange) -> None
+        if self._computed:
+            self._invalidate_computed((change.name,))
+        for callback, keys in self._observers:
+            if keys is None or change.name in keys:
+                callback(change)
+
+    def _track_ui_values(self, setting):
+        # type: (Setting) -> None
+        """ Updates the UI properties compared by __eq__ """
+        ui_values = tuple(setting._properties.get(key)
+                          for key in setting.ui_properties)
+        if any(value is not None for value in ui_values):
+            self._ui_values[setting.name] = ui_values
+        else:
+            self._ui_values.pop(setting.name, None)
+
+    def _track_setting(self, setting):
+        # type: (Setting) -> None
+        """ Includes an added setting in the content digest """
+        self._digests[setting.name] = (len(self._digests), 0)
+        self._modified.add(setting.name)
+        setting._groups += (self,)
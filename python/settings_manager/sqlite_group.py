@@ -0,0 +1,470 @@
+"""
+SettingsGroup stored in a SQLite database, for very large groups or groups
+shared by several tools on one host.
+
+eg,
+
+>>> settings = SQLiteSettingsGroup(path='/var/tmp/render_settings.db')
+>>> settings.get('samples')  # Only loads the 'samples' setting
+16
+>>> settings.set_many({'min_samples': 4, 'max_samples': 64})  # One transaction
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+import sqlite3
+import sys
+
+from settings_manager.exceptions import SettingsError
+from settings_manager.setting import Setting, SettingChange, restore_setting
+from settings_manager.settings_group import (SettingsGroup, _DIGEST_MODULUS,
+                                             _position_digest)
+from settings_manager import util
+
+
+# Layout of the settings table, stored as the database's user_version
+_FORMAT_VERSION = 1
+
+_CREATE_TABLE = (
+    'CREATE TABLE settings ('
+    'position INTEGER PRIMARY KEY, '
+    'name TEXT UNIQUE NOT NULL, '
+    'definition TEXT NOT NULL, '
+    'value TEXT NOT NULL, '
+    'schema_digest BLOB NOT NULL, '
+    'value_digest BLOB NOT NULL)'
+)
+
+# Dicts are ordered from python 3.7
+_dict = OrderedDict if sys.version_info < (3, 7) else dict
+
+_SCALARS = (type(None), bool, int, float, str)
+if sys.version_info[0] < 3:
+    _SCALARS += (long, unicode)
+
+
+def _encode(obj):
+    # type: (object) -> object
+    """
+    Converts obj to json types. Containers other than lists and classes are
+    tagged objects so that they're restored as the same type, see _decode.
+    """
+    if isinstance(obj, _SCALARS):
+        return obj
+    if isinstance(obj, list):
+        return [_encode(item) for item in obj]
+    if isinstance(obj, dict):
+        return {'dict': [[_encode(k), _encode(v)] for k, v in obj.items()]}
+    if isinstance(obj, tuple):
+        return {'tuple': [_encode(item) for item in obj]}
+    if isinstance(obj, (set, frozenset)):
+        return {obj.__class__.__name__: [_encode(item) for item in obj]}
+    if isinstance(obj, type):
+        if obj.__module__ in ('builtins', '__builtin__'):
+            return {'type': obj.__name__}
+        return {'type': '{}.{}'.format(obj.__module__, obj.__name__)}
+    raise SettingsError('Unable to store {!r}, only json types, tuples, sets '
+                        'and classes can be stored'.format(obj))
+
+
+def _decode(obj):
+    # type: (object) -> object
+    if isinstance(obj, list):
+        return [_decode(item) for item in obj]
+    if isinstance(obj, dict):
+        (tag, items), = obj.items()
+        if tag == 'dict':
+            return _dict((_decode(k), _decode(v)) for k, v in items)
+        if tag == 'tuple':
+            return tuple(_decode(item) for item in items)
+        if tag == 'set':
+            return set(_decode(item) for item in items)
+        if tag == 'frozenset':
+            return frozenset(_decode(item) for item in items)
+        if tag == 'type':
+            # Only resolved from modules that are already imported
+            cls = util.class_from_string(items)
+            if cls is None:
+                raise SettingsError(
+                    'Unknown class {!r}, its module must be imported'.format(items))
+            return cls
+    return obj
+
+
+def _dumps(obj):
+    # type: (object) -> str
+    return json.dumps(_encode(obj))
+
+
+def _loads(text):
+    # type: (str) -> object
+    data = json.loads(text)
+    # Convert data from unicode to string (python 2 only)
+    if sys.version_info[0] < 3:
+        data = util.byteify(data)
+    return _decode(data)
+
+
+def _load_definition(text):
+    # type: (str) -> tuple
+    """ Returns the Setting._definition() stored by _dumps """
+    cls, name, data_type, subtype, properties = _loads(text)
+    if not issubclass(cls, Setting):
+        raise SettingsError('Not a Setting class: {!r}'.format(cls))
+    return cls, name, data_type, subtype, properties
+
+
+def _create_table(connection, path):
+    # type: (sqlite3.Connection, str) -> None
+    """
+    Creates the settings table if it doesn't exist.
+
+    :raise: SettingsError if the database has a different layout
+    """
+    exists = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'settings'"
+    if connection.execute(exists).fetchone() is None:
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Another connection may have created it first
+            if connection.execute(exists).fetchone() is None:
+                connection.execute(_CREATE_TABLE)
+                connection.execute('PRAGMA user_version = {}'.format(_FORMAT_VERSION))
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+    version = connection.execute('PRAGMA user_version').fetchone()[0]
+    if version != _FORMAT_VERSION:
+        raise SettingsError(
+            'Unsupported settings database version {}: {}'.format(version, path))
+
+
+class _Contents(object):
+    """
+    Mapping of {setting_name: Setting} used as SQLiteSettingsGroup._contents,
+    loading the settings from the database
+    """
+
+    def __init__(self, group):
+        # type: (SQLiteSettingsGroup) -> None
+        self._group = group
+
+    def __contains__(self, name):
+        return self._group._has_setting(name)
+
+    def __getitem__(self, name):
+        setting = self._group._load_setting(name)
+        if setting is None:
+            raise KeyError(name)
+        return setting
+
+    def __iter__(self):
+        return self._group._names()
+
+    def __len__(self):
+        return self._group._count()
+
+    def __bool__(self):
+        return len(self) > 0
+
+    __nonzero__ = __bool__
+
+    def get(self, name, default=None):
+        setting = self._group._load_setting(name)
+        return default if setting is None else setting
+
+    def values(self):
+        return self._group._load_settings()
+
+
+class SQLiteSettingsGroup(SettingsGroup):
+    """
+    SettingsGroup whose settings' definitions and values are stored in a
+    SQLite database rather than held in memory.
+
+    Settings are loaded when they're accessed, and the cache_size most
+    recently used are kept in memory. Values set on a Setting are written to
+    the database immediately. Properties changed with set_property are written
+    when the setting is evicted from the cache, a transaction ends, or the
+    group is closed.
+
+    Definitions and values are stored as json, and may only hold json types,
+    tuples, sets and classes. Classes are found in the modules that are
+    already imported, nothing is imported or unpickled when reading, so a
+    shared database can't run code in the processes that read it. UI
+    properties, eg, widgets, are not stored. Choices providers can't be
+    stored.
+
+    Writes outside a transaction are committed individually. batch(),
+    set_many() and update() are each a single transaction, which is rolled
+    back if it fails. transaction() groups other writes.
+
+    Several groups, eg, in different processes, can share a database. Each
+    keeps its own cache: call refresh() to see changes made by the others.
+    Settings held outside the group, eg, by a SettingsViewer, aren't updated
+    by a refresh or rollback.
+    """
+
+    def __init__(self, settings=None, path=':memory:', cache_size=1024):
+        """
+        :param list|dict|SettingsGroup    settings:
+            Settings to add, see SettingsGroup. Settings already in the
+            database are loaded.
+        :param str  path:       Path of the database, created if it doesn't
+                                exist.
+        :param int  cache_size: Maximum number of settings held in memory
+        """
+        # Transactions are managed explicitly, see transaction()
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        _create_table(self._connection, path)
+        self._mapping = _Contents(self)
+        # {name: Setting} of the loaded settings, least recently used first
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        # Properties of each cached setting when loaded, see _write_properties
+        self._loaded_properties = {}
+        self._transaction_depth = 0
+        self._data_version = self._connection.execute(
+            'PRAGMA data_version').fetchone()[0]
+        super(SQLiteSettingsGroup, self).__init__(settings)
+
+    @property
+    def _contents(self):
+        # type: () -> _Contents
+        return self._mapping
+
+    @_contents.setter
+    def _contents(self, contents):
+        # type: (OrderedDict) -> None
+        # Set empty by SettingsGroup.__init__, or with the settings created
+        # by a Schema
+        if contents:
+            self._add_settings(list(contents.values()))
+
+    @contextmanager
+    def batch(self):
+        """
+        See SettingsGroup.batch. The values are written in a single
+        transaction, which is rolled back if a constraint fails.
+        """
+        with self.transaction():
+            with super(SQLiteSettingsGroup, self).batch():
+                yield self
+
+    def clear_cache(self):
+        """
+        Writes any changed properties and drops the loaded settings, so that
+        they're loaded from the database again
+        """
+        self._write_properties()
+        self._cache.clear()
+        self._loaded_properties.clear()
+
+    def close(self):
+        """ Writes any changed properties and closes the database """
+        self._write_properties()
+        self._cache.clear()
+        self._loaded_properties.clear()
+        self._connection.close()
+
+    def refresh(self):
+        # type: () -> bool
+        """
+        Drops the loaded settings if another connection has changed the
+        database since the last refresh.
+
+        :return: Whether the database had changed
+        """
+        version = self._connection.execute('PRAGMA data_version').fetchone()[0]
+        if version == self._data_version:
+            return False
+        self._data_version = version
+        self.clear_cache()
+        return True
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager that commits every write made inside it as a single
+        transaction. If an exception is raised, the transaction is rolled
+        back and the loaded settings are dropped.
+        """
+        if not self._transaction_depth:
+            # Takes the write lock now rather than on the first write
+            self._connection.execute('BEGIN IMMEDIATE')
+        self._transaction_depth += 1
+        succeeded = False
+        try:
+            yield self
+            succeeded = True
+        finally:
+            self._transaction_depth -= 1
+            if not self._transaction_depth:
+                self._end_transaction(succeeded)
+
+    def update(self, settings):
+        """ See SettingsGroup.update. The settings are added in a single transaction. """
+        with self.transaction():
+            super(SQLiteSettingsGroup, self).update(settings)
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _add_settings(self, settings):
+        # type: (list[Setting]) -> None
+        with self.transaction():
+            for setting in settings:
+                if setting.name in self._contents or setting.name in self._computed:
+                    raise SettingsError(
+                        'Setting already exists: {!r}'.format(setting.name))
+                self._connection.execute(
+                    'INSERT INTO settings (name, definition, value, schema_digest, '
+                    'value_digest) VALUES (?, ?, ?, ?, ?)',
+                    (setting.name, _dumps(setting._definition()),
+                     _dumps(setting._value),
+                     sqlite3.Binary(setting._schema_digest()),
+                     sqlite3.Binary(util.digest(setting._value))))
+        for setting in settings:
+            setting._groups = ()
+            self._track_loaded(setting)
+
+    def _content_digest(self):
+        # type: () -> str
+        # The digests are stored with each setting, only the loaded settings
+        # are digested as their properties may not be written yet. UI
+        # properties aren't stored, only the loaded settings can have them.
+        self._modified.clear()
+        total = 0
+        self._ui_values = {}
+        rows = self._connection.execute(
+            'SELECT name, schema_digest, value_digest FROM settings '
+            'ORDER BY position').fetchall()
+        try:
+            for position, (name, schema_digest, value_digest) in enumerate(rows):
+                setting = self._cache.get(name)
+                if setting is None:
+                    digest = bytes(schema_digest) + bytes(value_digest)
+                else:
+                    digest = setting._content_digest()
+                    self._track_ui_values(setting)
+                total += _position_digest(position, digest)
+        except Exception:
+            return None
+        return '{:040x}'.format(total % _DIGEST_MODULUS)
+
+    def _count(self):
+        # type: () -> int
+        return self._connection.execute('SELECT COUNT(*) FROM settings').fetchone()[0]
+
+    def _end_transaction(self, succeeded):
+        # type: (bool) -> None
+        """ Commits the transaction, or rolls it back if it didn't succeed """
+        if succeeded:
+            try:
+                self._write_properties()
+            except Exception:
+                self._end_transaction(False)
+                raise
+            self._connection.execute('COMMIT')
+        else:
+            self._connection.execute('ROLLBACK')
+            # Loaded settings may hold values that were rolled back
+            self._cache.clear()
+            self._loaded_properties.clear()
+
+    def _has_setting(self, name):
+        # type: (str) -> bool
+        if name in self._cache:
+            return True
+        return self._connection.execute(
+            'SELECT 1 FROM settings WHERE name = ?', (name,)).fetchone() is not None
+
+    def _load_setting(self, name):
+        # type: (str) -> Setting
+        """ Returns the setting from the cache or database, None if it doesn't exist """
+        setting = self._cache.pop(name, None)
+        if setting is not None:
+            # Most recently used
+            self._cache[name] = setting
+            return setting
+        row = self._connection.execute(
+            'SELECT definition, value FROM settings WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+        setting = restore_setting(_load_definition(row[0]), _loads(row[1]))
+        self._track_loaded(setting)
+        return setting
+
+    def _load_settings(self):
+        # type: () -> iter[Setting]
+        """ Yields every setting in order, loading those not in the cache """
+        rows = self._connection.execute(
+            'SELECT name, definition, value FROM settings ORDER BY position').fetchall()
+        for name, definition, value in rows:
+            setting = self._cache.get(name)
+            if setting is None:
+                setting = restore_setting(_load_definition(definition), _loads(value))
+                self._track_loaded(setting)
+            yield setting
+
+    def _names(self):
+        # type: () -> iter[str]
+        rows = self._connection.execute(
+            'SELECT name FROM settings ORDER BY position').fetchall()
+        return iter([row[0] for row in rows])
+
+    def _observes_settings(self):
+        # type: () -> bool
+        # Loaded settings always notify _on_value_changed, which forwards
+        # the change to _on_setting_changed
+        return True
+
+    def _track_loaded(self, setting):
+        # type: (Setting) -> None
+        """ Writes the setting's changes to the database and caches it """
+        setting.add_observer(self._on_value_changed)
+        if setting.name in self._constraints_by_name:
+            setting._validators += (self._check_constraints,)
+        self._cache[setting.name] = setting
+        self._loaded_properties[setting.name] = setting._properties
+        while len(self._cache) > self._cache_size:
+            name, evicted = self._cache.popitem(last=False)
+            self._write_properties([evicted])
+            del self._loaded_properties[name]
+
+    def _write_properties(self, settings=None):
+        # type: (list[Setting]) -> None
+        """
+        Writes the definitions of the settings, defaulting to the cached
+        settings, whose properties have changed since they were loaded.
+        set_property replaces the properties, so they're compared by identity.
+        """
+        if settings is None:
+            settings = list(self._cache.values())
+        for setting in settings:
+            if setting._properties is not self._loaded_properties.get(setting.name):
+                self._connection.execute(
+                    'UPDATE settings SET definition = ?, schema_digest = ? '
+                    'WHERE name = ?',
+                    (_dumps(setting._definition()),
+                     sqlite3.Binary(setting._schema_digest()), setting.name))
+                self._loaded_properties[setting.name] = setting._properties
+
+    # ======================================================================== #
+    #                                  SLOTS                                   #
+    # ======================================================================== #
+
+    def _on_value_changed(self, change):
+        # type: (SettingChange) -> None
+        self._connection.execute(
+            'UPDATE settings SET value = ?, value_digest = ? WHERE name = ?',
+            (_dumps(change.value), sqlite3.Binary(util.digest(change.value)),
+             change.name))
+        # A different Setting object for the same name, eg, one evicted from
+        # the cache and held by a widget, is now out of date
+        cached = self._cache.get(change.name)
+        if cached is not None and cached._value != change.value:
+            del self._cache[change.name]
+            del self._loaded_properties[change.name]
+        self._on_setting_changed(change)
@@ -0,0 +1,276 @@
+"""
+Durable storage of a SettingsGroup's values that writes only the changes.
+
+Values are stored in two files: a snapshot of every value, and a log that
+each change is appended to. Loading reads the snapshot and replays the log.
+When the log is long, compact() writes a new snapshot and starts an empty
+log. Files are replaced atomically, so a crash leaves the previous snapshot
+intact and at most loses a partly written line of the log.
+
+eg,
+
+>>> store = SettingsStore(settings, 'render_settings.json', autosave=True)
+>>> store.load()
+>>> settings.set('samples', 16)  # Appends a line to render_settings.json.log
+"""
+from collections import OrderedDict
+import json
+import os
+import sys
+import tempfile
+
+from settings_manager.exceptions import SettingsError
+from settings_manager import util
+
+
+# Python 2.x has no atomic replace, rename is atomic on posix
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _fsync_directory(path):
+    # type: (str) -> None
+    """ Persists a rename in the directory, where supported """
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:  # Windows can't open directories
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _dumps(data):
+    # type: (object) -> str
+    return json.dumps(data, default=util.object_to_string)
+
+
+def _loads(line):
+    # type: (str) -> object
+    data = json.loads(line, object_pairs_hook=OrderedDict)
+    # Convert data from unicode to string (python 2 only)
+    if sys.version_info[0] < 3:
+        data = util.byteify(data)
+    return data
+
+
+class SettingsStore(object):
+    """
+    Stores the values of a group in a snapshot file at path and a log at
+    path + '.log'. The settings themselves are defined by the group.
+
+    Changes are tracked as they're made and written by flush(), which only
+    writes the settings changed since the last flush. With autosave, every
+    change is written as it's made. The log is compacted into a new snapshot
+    when it has more than compact_threshold lines.
+
+    Both files start with a generation, incremented by each compaction, so
+    that a log left behind by an interrupted compaction isn't replayed over
+    the newer snapshot. Call load() before writing to existing files.
+    """
+
+    def __init__(self, group, path, autosave=False, compact_threshold=None, sync=True):
+        """
+        :param settings_manager.SettingsGroup   group:
+        :param str  path:               Snapshot path
+        :param bool autosave:           If True, writes every change as it's
+                                        made, otherwise see flush().
+        :param int  compact_threshold:  Log lines before compacting, defaults
+                                        to the larger of 1000 and the number
+                                        of settings. 0 never compacts.
+        :param bool sync:               If True, each write is flushed to disk
+                                        with fsync before returning.
+        """
+        self.autosave = autosave
+        self.compact_threshold = compact_threshold
+        self.sync = sync
+        self._group = group
+        self._path = path
+        self._generation = 0
+        self._log_lines = 0  # Lines in the log, excluding the header
+        self._dirty = OrderedDict()  # Names of the settings to write
+        self._loading = False
+        group.add_observer(self._on_setting_changed)
+
+    @property
+    def group(self):
+        # type: () -> settings_manager.SettingsGroup
+        return self._group
+
+    @property
+    def log_path(self):
+        # type: () -> str
+        return self._path + '.log'
+
+    @property
+    def path(self):
+        # type: () -> str
+        return self._path
+
+    def close(self):
+        """ Writes any pending changes and stops tracking changes """
+        self.flush()
+        self._group.remove_observer(self._on_setting_changed)
+
+    def compact(self):
+        """
+        Writes every value to a new snapshot and starts an empty log. The
+        pending changes are included in the snapshot.
+        """
+        generation = self._generation + 1
+        values = self._group.as_dict(ordered=True, values_only=True)
+        self._write_atomic(self._path, [_dumps({'generation': generation}),
+                                        _dumps(values)])
+        self._write_atomic(self.log_path, [_dumps({'generation': generation})])
+        self._generation = generation
+        self._log_lines = 0
+        self._dirty.clear()
+
+    def flush(self, settings=None):
+        """
+        Appends the values of changed settings to the log, compacting it if
+        it's too long. Can be connected to SettingsViewer.settingsChanged.
+
+        :param list[settings_manager.Setting] settings:
+            Settings to write, defaults to every setting changed since the
+            last flush.
+        """
+        if settings is None:
+            names = list(self._dirty)
+            self._dirty.clear()
+        else:
+            names = []
+            for setting in settings:
+                names.append(setting.name)
+                self._dirty.pop(setting.name, None)
+        if not names:
+            return
+
+        threshold = self.compact_threshold
+        if threshold is None:
+            threshold = max(1000, len(self._group))
+        if threshold and self._log_lines + len(names) > threshold:
+            self.compact()
+            return
+        if not os.path.exists(self.log_path):
+            self._write_atomic(self.log_path, [_dumps({'generation': self._generation})])
+        # Read from the settings, which includes values set in a batch
+        lines = ''.join(_dumps([name, self._group.setting(name).get()]) + '\n'
+                        for name in names)
+        with open(self.log_path, 'a') as f:
+            f.write(lines)
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        self._log_lines += len(names)
+
+    def load(self):
+        """
+        Sets the group's values from the snapshot and log, if they exist.
+        Values for settings that aren't in the group, or that are no longer
+        valid, are skipped. The settings are set in a batch, so constraints
+        are checked once.
+
+        :raise: SettingsError if the values break the group's constraints
+        """
+        values = OrderedDict()
+        self._generation = 0
+        self._log_lines = 0
+        if os.path.exists(self._path):
+            with open(self._path, 'r') as f:
+                lines = f.read().splitlines()
+            try:
+                self._generation = _loads(lines[0])['generation']
+                values.update(_loads(lines[1]))
+            except (IndexError, KeyError, TypeError, ValueError):
+                raise SettingsError('Invalid settings store: {!r}'.format(self._path))
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                lines = f.read().split(b'\n')
+            generation = None
+            try:
+                # Without a newline, the header was partly written
+                if len(lines) > 1:
+                    generation = _loads(lines[0].decode('utf-8'))['generation']
+            except (KeyError, TypeError, ValueError):
+                pass
+            if generation == self._generation:
+                end = len(lines[0]) + 1  # Bytes up to the last complete line
+                # The last item follows the last newline, so is only
+                # non-empty if a line was partly written
+                complete = not lines[-1]
+                for line in lines[1:-1]:
+                    try:
+                        name, value = _loads(line.decode('utf-8'))
+                    except (TypeError, ValueError):
+                        complete = False
+                        break
+                    values[name] = value
+                    self._log_lines += 1
+                    end += len(line) + 1
+                if not complete:
+                    # A partly written line from a crash, only possible at the
+                    # end of the log. Later changes would be appended to it.
+                    self._truncate_log(end)
+            else:
+                # Interrupted compaction, the snapshot has every value
+                os.remove(self.log_path)
+
+        self._loading = True
+        try:
+            with self._group.batch():
+                for name, value in values.items():
+                    setting = self._group.setting(name)
+                    if setting is None:
+                        continue
+                    try:
+                        setting.set(value)
+                    except SettingsError:
+                        continue
+        finally:
+            self._loading = False
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _truncate_log(self, size):
+        # type: (int) -> None
+        with open(self.log_path, 'r+b') as f:
+            f.truncate(size)
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+
+    def _write_atomic(self, path, lines):
+        # type: (str, list[str]) -> None
+        """ Replaces the file by renaming a complete temporary file over it """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(''.join(line + '\n' for line in lines))
+                f.flush()
+                if self.sync:
+                    os.fsync(f.fileno())
+            _replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        if self.sync:
+            _fsync_directory(path)
+
+    # ======================================================================== #
+    #                                  SLOTS                                   #
+    # ======================================================================== #
+
+    def _on_setting_changed(self, change):
+        # type: (settings_manager.setting.SettingChange) -> None
+        if self._loading:
+            return
+        self._dirty[change.name] = None
+        if self.autosave:
+            self.flush()
@@ -0,0 +1,228 @@
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+import copy
+import threading
+
+try:
+    from types import MappingProxyType
+except ImportError:  # Python 2.x
+    MappingProxyType = dict
+
+from settings_manager.constraints import Constraint
+from settings_manager.exceptions import SettingsError
+from settings_manager.setting import Setting, SettingChange
+from settings_manager.settings_group import SettingsGroup
+
+
+# Published state of a ThreadSafeSettingsGroup. Neither mapping is modified
+# once published, a write publishes a new Snapshot instead.
+Snapshot = namedtuple('Snapshot', 'contents values')
+
+
+class ThreadSafeSettingsGroup(SettingsGroup):
+    """
+    SettingsGroup that can be read from any number of threads while others
+    write to it.
+
+    Reads never take a lock. The settings and their values are held in an
+    immutable Snapshot which writers replace with a single assignment
+    (read-copy-update), so a reader sees all of a write or none of it, and
+    iterating is safe while settings are added. Writers are serialised by a
+    lock and a batch of changes is published once, see batch().
+
+    Publishing copies the values, so each write is O(n) in the number of
+    settings. Group multiple writes with batch() or update().
+
+    Values set directly on a Setting, eg, by a SettingsViewer widget, are
+    published the same as values set through the group. Computed values are
+    invalidated when changes are published and evaluated under the lock.
+    """
+
+    def __init__(self, settings=None):
+        """
+        :param list|dict|SettingsGroup    settings:
+            See SettingsGroup
+        """
+        self._lock = threading.RLock()
+        self._snapshot = Snapshot(OrderedDict(), {})
+        # Values changed in the current batch, published when it exits
+        self._batch_depth = 0
+        self._batch_values = {}
+        super(ThreadSafeSettingsGroup, self).__init__(settings)
+
+    @property
+    def _contents(self):
+        # type: () -> OrderedDict
+        return self._snapshot.contents
+
+    @_contents.setter
+    def _contents(self, contents):
+        # type: (OrderedDict) -> None
+        with self._lock:
+            self._snapshot = Snapshot(
+                contents, dict((name, s.get()) for name, s in contents.items()))
+
+    def as_dict(self, ordered=False, values_only=False, computed=False):
+        """
+        See SettingsGroup.as_dict. Values are read from a single snapshot.
+
+        :rtype: dict
+        """
+        if not values_only:
+            return super(ThreadSafeSettingsGroup, self).as_dict(
+                ordered=ordered, computed=computed)
+        contents, values = self._snapshot
+        data_type = OrderedDict if ordered else dict
+        data = data_type((name, copy.copy(values[name])) for name in contents)
+        if computed:
+            for name in self._computed:
+                data[name] = self.get(name)
+        return data
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager that publishes every value set inside it as a single
+        change. Other writers wait until the batch exits, readers, including
+        observers, see the values from before the batch until then.
+        Constraints are checked before publishing, see SettingsGroup.batch.
+
+        eg,
+
+        >>> with settings.batch():
+        ...     settings.set('min_samples', 4)
+        ...     settings.set('max_samples', 16)
+
+        :raise: SettingsError if a constraint fails
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                with super(ThreadSafeSettingsGroup, self).batch():
+                    yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._batch_values:
+                    values, self._batch_values = self._batch_values, {}
+                    self._publish_values(values)
+
+    def get(self, key):
+        """
+        :raise: KeyError if key is not a valid setting
+
+        :param str key:
+        :return: Value for the given setting name.
+        """
+        values = self._snapshot.values
+        if key in values:
+            return copy.copy(values[key])
+        return self._get_computed(key)
+
+    def reset(self):
+        """ Restores all settings to their default value as a single change """
+        with self.batch():
+            super(ThreadSafeSettingsGroup, self).reset()
+
+    def set(self, key, value):
+        """
+        See SettingsGroup.set
+        """
+        with self._lock:
+            super(ThreadSafeSettingsGroup, self).set(key, value)
+
+    def snapshot(self):
+        """
+        Returns a read only mapping of {setting_name: value} for consistent
+        reads of several values. Values must not be modified.
+
+        :rtype: types.MappingProxyType
+        """
+        return MappingProxyType(self._snapshot.values)
+
+    def update(self, settings):
+        """
+        See SettingsGroup.update. All of the settings are validated before
+        any are added, and they are published together.
+        """
+        group = SettingsGroup(settings)
+        settings = list(group)
+        for setting in settings:
+            # Detach from the temporary group, whose constraints would
+            # otherwise validate the settings outside of this group's batch
+            setting._observers = ()
+            setting._validators = ()
+            setting._groups = ()
+        self._add_settings(settings)
+        for computed in group._computed.values():
+            self.add_computed(computed.name, computed.func)
+        for constraint in group._constraints:
+            self.add_constraint(Constraint(constraint.func, constraint.message))
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _add_compiled(self, settings, template):
+        # type: (list[Setting], SettingsGroup) -> None
+        for setting in settings:
+            setting.add_observer(self._on_value_changed)
+        super(ThreadSafeSettingsGroup, self)._add_compiled(settings, template)
+
+    def _add_settings(self, settings):
+        # type: (list[Setting]) -> None
+        # Settings are validated before this, only publishing is serialised
+        with self._lock:
+            contents, values = self._snapshot
+            for setting in settings:
+                if setting.name in contents or setting.name in self._computed:
+                    raise SettingsError(
+                        'Setting already exists: {!r}'.format(setting.name))
+            contents = OrderedDict(contents)
+            values = dict(values)
+            for setting in settings:
+                setting.add_observer(self._on_value_changed)
+                if self._observes_settings():
+                    setting.add_observer(self._on_setting_changed)
+                contents[setting.name] = setting
+                values[setting.name] = setting.get()
+            self._snapshot = Snapshot(contents, values)
+            for setting in settings:
+                self._track_setting(setting)
+
+    def _content_digest(self):
+        # type: () -> str
+        # The digests are updated in place, calls from several threads would
+        # count a change twice
+        with self._lock:
+            return super(ThreadSafeSettingsGroup, self)._content_digest()
+
+    def _get_computed(self, key):
+        with self._lock:
+            return super(ThreadSafeSettingsGroup, self)._get_computed(key)
+
+    def _invalidate_computed(self, names):
+        with self._lock:
+            super(ThreadSafeSettingsGroup, self)._invalidate_computed(names)
+
+    def _observes_settings(self):
+        # type: () -> bool
+        # Computed values are invalidated by _publish_values instead, so that
+        # a value computed during a batch isn't kept after it's published
+        return bool(self._observers)
+
+    def _on_value_changed(self, change):
+        # type: (SettingChange) -> None
+        with self._lock:
+            if self._batch_depth:
+                self._batch_values[change.name] = change.value
+            else:
+                self._publish_values({change.name: change.value})
+
+    def _publish_values(self, changed):
+        # type: (dict) -> None
+        contents, values = self._snapshot
+        values = dict(values)
+        values.update(changed)
+        self._snapshot = Snapshot(contents, values)
+        if self._computed:
+            self._invalidate_computed(changed)
@@ -1,4 +1,11 @@
-from settings_manager.ui.modelview import SettingDictionaryView
-from settings_manager.ui.settings_viewer import SettingsViewer
-from settings_manager.ui.setting_widgets import (create_setting_widget,
-                                                 get_default_setting_widget)
+# Attributes are imported on first access so that importing the package, eg,
+# for type checks, doesn't import Qt
+from settings_manager import util
+
+util.lazy_attributes(globals(), {
+    'SettingDictionaryView': 'settings_manager.ui.modelview',
+    'SettingsViewer': 'settings_manager.ui.settings_viewer',
+    'create_setting_widget': 'settings_manager.ui.setting_widgets',
+    'get_default_setting_widget': 'settings_manager.ui.setting_widgets',
+    'register_setting_widget': 'settings_manager.ui.setting_widgets',
+})
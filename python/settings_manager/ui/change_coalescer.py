@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+from Qt import QtCore
+
+from settings_manager.setting import Setting
+
+
+class ChangeCoalescer(QtCore.QObject):
+    """
+    Collects changed settings and emits them together as a single
+    settingsChanged signal.
+
+    The first change starts a timer of interval milliseconds, any further
+    changes before it fires are added to the same batch. An interval of 0
+    emits once control returns to the event loop, ie, once per frame. A
+    setting changed several times in a batch is only included once, in the
+    order it was first changed.
+
+    eg,
+
+    >>> coalescer = ChangeCoalescer(interval=50)
+    >>> widget.settingChanged.connect(coalescer.add)
+    >>> coalescer.settingsChanged.connect(rerender)
+    """
+    settingsChanged = QtCore.Signal(list)  # list[Setting]
+
+    def __init__(self, interval=0, parent=None):
+        # type: (int, QtCore.QObject) -> None
+        super(ChangeCoalescer, self).__init__(parent)
+        self._pending = OrderedDict()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    def add(self, setting):
+        # type: (Setting) -> None
+        """ Adds a changed setting to the current batch """
+        self._pending.setdefault(setting.name, setting)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """ Emits the current batch immediately, if there is one """
+        self._timer.stop()
+        if not self._pending:
+            return
+        settings = list(self._pending.values())
+        self._pending.clear()
+        self.settingsChanged.emit(settings)
+
+    def interval(self):
+        # type: () -> int
+        return self._timer.interval()
+
+    def pending(self):
+        # type: () -> list[Setting]
+        """ Settings changed since the last batch was emitted """
+        return list(self._pending.values())
+
+    def set_interval(self, interval):
+        # type: (int) -> None
+        self._timer.setInterval(interval)
@@ -1,45 +1,132 @@
 from Qt import QtCore, QtGui, QtWidgets
 
+from settings_manager.search import SearchIndex
+
+
+def _state_value(state):
+    # type: (QtCore.Qt.CheckState|int) -> int
+    # Some bindings return check states from the model as ints, which don't
+    # compare equal to their enum
+    return int(getattr(state, 'value', state or 0))
+
+
+_CHECKED = _state_value(QtCore.Qt.Checked)
+
 
 class CheckableComboBox(QtWidgets.QComboBox):
+    """
+    QComboBox where each item can be checked, showing a summary of the
+    checked items instead of the current item.
+
+    The checked rows are tracked as the model changes, so counting and
+    iterating the checked items doesn't read every item. Use
+    setCheckedItems to check many items as a single change.
+    """
     itemStateChanged = QtCore.Signal(QtGui.QStandardItem)
 
     def __init__(self, parent=None):
         super(CheckableComboBox, self).__init__(parent)
-        self.view().pressed.connect(self.onItemPressed)
         self._changed = False
         self._default_string = 'Select Items...'
-        self._selected_string = self._default_string
+        # Rows that are checked, kept in sync with the model
+        self._checked = set()  # type: set[int]
+        # {text: row}, built on first use and cleared when rows change
+        self._rows_by_text = None  # type: dict[str, int]
+        # Elided summary of the checked items and the width it was built for
+        self._selected_string = (None, None)  # type: tuple[int, str]
+        # Optional popup filter, see setFilterEnabled
+        self._filter_edit = None  # type: QtWidgets.QLineEdit
+        self._search_index = None  # type: SearchIndex
+        self._hidden = set()  # type: set[int]
+
+        self.view().pressed.connect(self.onItemPressed)
+        self._connect_model(self.model())
+
+    def checkedCount(self):
+        # type: () -> int
+        return len(self._checked)
 
     def checkedItems(self):
-        for row in range(self.model().rowCount()):
-            item = self.model().item(row, self.modelColumn())
-            if item.checkState() == QtCore.Qt.Checked:
-                yield item
+        # type: () -> iter[QtGui.QStandardItem]
+        """ Yields the checked items in row order """
+        model = self.model()
+        for row in sorted(self._checked):
+            yield model.item(row, self.modelColumn())
+
+    def filterEnabled(self):
+        # type: () -> bool
+        return self._filter_edit is not None
 
     def hidePopup(self):
         if not self._changed:
             super(CheckableComboBox, self).hidePopup()
+            if self._filter_edit is not None:
+                self._filter_edit.clear()
         self._changed = False
 
     def itemChecked(self, index):
         # type: (int) -> bool
-        item = self.model().item(index, self.modelColumn())
-        return item.checkState() == QtCore.Qt.Checked
+        return index in self._checked
 
     def paintEvent(self, event):
         painter = QtWidgets.QStylePainter(self)
         painter.setPen(self.palette().color(QtGui.QPalette.Text))
         opt = QtWidgets.QStyleOptionComboBox()
         self.initStyleOption(opt)
-        opt.currentText = self._selected_string
+        rect = self.style().subControlRect(QtWidgets.QStyle.CC_ComboBox, opt,
+                                           QtWidgets.QStyle.SC_ComboBoxEditField, self)
+        opt.currentText = self._elided_selection_string(rect.width())
         painter.drawComplexControl(QtWidgets.QStyle.CC_ComboBox, opt)
         painter.drawControl(QtWidgets.QStyle.CE_ComboBoxLabel, opt)
 
+    def setCheckedItems(self, texts):
+        # type: (iter[str]) -> None
+        """
+        Checks the items with the given texts and unchecks every other item.
+        Only items that change state are updated, and itemStateChanged is
+        emitted once with None.
+
+        :param texts: Display text of each item to check
+        """
+        rows_by_text = self._get_rows_by_text()
+        rows = set(rows_by_text[text] for text in texts if text in rows_by_text)
+        changed = rows.symmetric_difference(self._checked)
+        if not changed:
+            return
+        model = self.model()
+        column = self.modelColumn()
+        for row in changed:
+            state = QtCore.Qt.Checked if row in rows else QtCore.Qt.Unchecked
+            model.item(row, column).setCheckState(state)
+        self.itemStateChanged.emit(None)
+
     def setDefaultText(self, text):
         # type: (str) -> None
         self._default_string = text
-        self._set_selection_string()
+        self._invalidate_selection_string()
+
+    def setFilterEnabled(self, enabled):
+        # type: (bool) -> None
+        """
+        Shows a line edit at the top of the popup which hides the items that
+        don't contain its text.
+        """
+        if enabled == self.filterEnabled():
+            return
+        if enabled:
+            self._filter_edit = QtWidgets.QLineEdit()
+            self._filter_edit.setPlaceholderText('Filter...')
+            self._filter_edit.setClearButtonEnabled(True)
+            self._filter_edit.textChanged.connect(self._on_filter_text_changed)
+            # The view is inside a private container widget with a layout.
+            # Each is held so that PySide doesn't collect the wrappers early.
+            container = self.view().parentWidget()
+            layout = container.layout()
+            layout.insertWidget(0, self._filter_edit)
+        else:
+            self._filter_edit.deleteLater()
+            self._filter_edit = None
+            self._clear_text_caches()
 
     def setItemChecked(self, index, checked=True):
         # type: (int, bool) -> None
@@ -47,15 +134,84 @@ class CheckableComboBox(QtWidgets.QComboBox):
         state = QtCore.Qt.Checked if checked else QtCore.Qt.Unchecked
         item.setCheckState(state)
         self.itemStateChanged.emit(item)
-        self._set_selection_string()
 
-    def _set_selection_string(self):
-        selected = [i.data(QtCore.Qt.DisplayRole) for i in self.checkedItems()]
-        if selected:
-            self._selected_string = '({}) {}'.format(
-                len(selected), ', '.join(selected))
+    def setModel(self, model):
+        # type: (QtCore.QAbstractItemModel) -> None
+        self._disconnect_model(self.model())
+        super(CheckableComboBox, self).setModel(model)
+        self._connect_model(model)
+        self._on_model_reset()
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _clear_text_caches(self):
+        self._rows_by_text = None
+        if self._search_index is not None:
+            self._search_index = None
+            self._hidden = set()
+            # Rows may have moved, show them all until the next filter
+            for row in range(self.count()):
+                self.view().setRowHidden(row, False)
+
+    def _connect_model(self, model):
+        # type: (QtCore.QAbstractItemModel) -> None
+        model.dataChanged.connect(self._on_data_changed)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.rowsMoved.connect(self._on_model_reset)
+        model.modelReset.connect(self._on_model_reset)
+
+    def _disconnect_model(self, model):
+        # type: (QtCore.QAbstractItemModel) -> None
+        model.dataChanged.disconnect(self._on_data_changed)
+        model.rowsInserted.disconnect(self._on_rows_inserted)
+        model.rowsRemoved.disconnect(self._on_rows_removed)
+        model.rowsMoved.disconnect(self._on_model_reset)
+        model.modelReset.disconnect(self._on_model_reset)
+
+    def _elided_selection_string(self, width):
+        # type: (int) -> str
+        cached_width, text = self._selected_string
+        if cached_width == width:
+            return text
+        if self._checked:
+            # Only join as many items as could be shown before eliding
+            max_length = width // max(1, self.fontMetrics().averageCharWidth())
+            texts = []
+            length = 0
+            for item in self.checkedItems():
+                if length > max_length:
+                    break
+                texts.append(item.text())
+                length += len(texts[-1]) + 2
+            text = '({}) {}'.format(len(self._checked), ', '.join(texts))
         else:
-            self._selected_string = self._default_string
+            text = self._default_string
+        text = self.fontMetrics().elidedText(text, QtCore.Qt.ElideRight, width)
+        self._selected_string = (width, text)
+        return text
+
+    def _get_rows_by_text(self):
+        # type: () -> dict[str, int]
+        if self._rows_by_text is None:
+            self._rows_by_text = dict(
+                (self.itemText(row), row) for row in range(self.count()))
+        return self._rows_by_text
+
+    def _invalidate_selection_string(self):
+        self._selected_string = (None, None)
+        self.update()
+
+    def _read_checked(self, first, last):
+        # type: (int, int) -> None
+        """ Updates the checked rows from the model for rows first to last """
+        for row in range(first, last + 1):
+            if _state_value(self.itemData(row, QtCore.Qt.CheckStateRole)) == _CHECKED:
+                self._checked.add(row)
+            else:
+                self._checked.discard(row)
 
     # ======================================================================== #
     #                               CONNECTIONS                                #
@@ -63,7 +219,50 @@ class CheckableComboBox(QtWidgets.QComboBox):
 
     def onItemPressed(self, index):
         # type: (QtCore.Qt.QModelIndex) -> None
-        item = self.model().itemFromIndex(index)
-        checked = item.checkState() == QtCore.Qt.Unchecked
+        checked = not self.itemChecked(index.row())
         self.setItemChecked(index.row(), checked=checked)
         self._changed = True
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        # type: (QtCore.QModelIndex, QtCore.QModelIndex, list[int]) -> None
+        if not top_left.column() <= self.modelColumn() <= bottom_right.column():
+            return
+        if not roles or QtCore.Qt.DisplayRole in roles:
+            self._clear_text_caches()
+        self._read_checked(top_left.row(), bottom_right.row())
+        self._invalidate_selection_string()
+
+    def _on_filter_text_changed(self, text):
+        # type: (str) -> None
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+            self._hidden = set()
+            for row in range(self.count()):
+                self._search_index.add(row, self.itemText(row))
+        hidden = set(range(self.count())) - self._search_index.search(text)
+        view = self.view()
+        for row in hidden.symmetric_difference(self._hidden):
+            view.setRowHidden(row, row in hidden)
+        self._hidden = hidden
+
+    def _on_model_reset(self, *args):
+        self._clear_text_caches()
+        self._checked = set()
+        self._read_checked(0, self.count() - 1)
+        self._invalidate_selection_string()
+
+    def _on_rows_inserted(self, parent, first, last):
+        # type: (QtCore.QModelIndex, int, int) -> None
+        count = last - first + 1
+        self._checked = set(row + count if row >= first else row for row in self._checked)
+        self._clear_text_caches()
+        self._read_checked(first, last)
+        self._invalidate_selection_string()
+
+    def _on_rows_removed(self, parent, first, last):
+        # type: (QtCore.QModelIndex, int, int) -> None
+        count = last - first + 1
+        self._checked = set(row - count if row > last else row
+                            for row in self._checked if not first <= row <= last)
+        self._clear_text_caches()
+        self._invalidate_selection_string()
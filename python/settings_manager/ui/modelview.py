@@ -1,23 +1,35 @@
-from PySide2 import QtCore, QtGui, QtWidgets
+from Qt import QtCore, QtGui, QtWidgets
 
 from settings_manager.exceptions import SettingsError
+from settings_manager.search import SearchIndex
 from settings_manager.setting import Setting
 from settings_manager.ui.setting_widgets import create_setting_widget
 from settings_manager.ui.setting_widgets.setting_ui import SettingUI
 
 
 class SettingNode(object):
-    def __init__(self, name, value=None, parent=None):
-        # type: (str, object, SettingNode) -> None
+    def __init__(self, name, value=None, parent=None, key=None):
+        # type: (str, object, SettingNode, object) -> None
         self._name = name
+        # Key in the parent's dictionary, name is its display string
+        self._key = name if key is None else key
+        # Settings are only built on first request as most nodes are never
+        # edited, see SettingNode.setting
         self._setting = None
-        if value is not None:
-            try:
-                self._setting = Setting(name, value)
-            except SettingsError:
-                pass
-        self.value = value
+        self._setting_built = False
+        # Dictionary values become branches whose children are created on
+        # demand by fetch_more, from the (key, value) items of the branch
+        # taken when it's first fetched, so that changes made to the
+        # dictionary afterwards can't break fetching
+        self._branch = value if isinstance(value, dict) else None
+        self._branch_items = None  # type: list[tuple]
+        self.value = None if self._branch is not None else value
+        # Display text and size hint for the value, cached by SettingModel
+        # until the value changes
+        self.display_text = None    # type: str
+        self.size_hint = None       # type: QtCore.QSize
         self._parent = None     # type: SettingNode
+        self._row = -1
         self._children = []
 
         if parent is not None:
@@ -25,7 +37,7 @@ class SettingNode(object):
 
     def __repr__(self):
         return 'Node({!r}, {!r}, {!r})'.format(
-            self._name, self._setting.get(), self._parent
+            self._name, self.value, self._parent
         )
 
     def __str__(self):
@@ -36,6 +48,11 @@ class SettingNode(object):
         # type: () -> list[SettingNode]
         return self._children[:]
 
+    @property
+    def key(self):
+        # type: () -> object
+        return self._key
+
     @property
     def name(self):
         # type: () -> str
@@ -49,13 +66,25 @@ class SettingNode(object):
     @property
     def setting(self):
         # type: () -> Setting
+        if not self._setting_built:
+            self._setting_built = True
+            if self.value is not None:
+                try:
+                    self._setting = Setting(self._name, self.value)
+                except SettingsError:
+                    pass
         return self._setting
 
     def add_child(self, node):
         # type: (SettingNode) -> None
+        node._row = len(self._children)
         self._children.append(node)
         node._parent = self
 
+    def can_fetch_more(self):
+        # type: () -> bool
+        return self.unfetched_count() > 0
+
     def child_by_index(self, index):
         # type: (int) -> SettingNode
         return self._children[index]
@@ -73,6 +102,48 @@ class SettingNode(object):
     def clear(self):
         """ Removes all children """
         self._children = []
+        self._branch_items = None
+
+    def fetch_more(self, count=None):
+        # type: (int) -> list[SettingNode]
+        """
+        Creates child nodes for the next count keys of the branch data that
+        have not been fetched yet, or all remaining keys if count is None.
+
+        :return: List of the newly created nodes
+        """
+        if self._branch is None:
+            return []
+        if self._branch_items is None:
+            self._branch_items = list(self._branch.items())
+        start = len(self._children)
+        stop = None if count is None else start + count
+        return [SettingNode(str(key), value, self, key=key)
+                for key, value in self._branch_items[start:stop]]
+
+    def has_children(self):
+        # type: () -> bool
+        """ Whether the node has children, fetched or not """
+        return bool(self._children or self._branch)
+
+    def is_branch(self):
+        # type: () -> bool
+        return self._branch is not None
+
+    def is_fetched(self):
+        # type: () -> bool
+        """ Whether any children have been requested from the branch data """
+        return self._branch_items is not None
+
+    def key_path(self):
+        # type: () -> tuple
+        """ Tuple of dictionary keys leading to the node, excluding the root """
+        curr = self
+        keys = []
+        while curr.parent is not None:
+            keys.append(curr.key)
+            curr = curr.parent
+        return tuple(reversed(keys))
 
     def path(self, skip_root=False):
         # type: (bool) -> str
@@ -87,12 +158,53 @@ class SettingNode(object):
 
     def remove_child(self, node):
         # type: (SettingNode) -> None
-        self._children.remove(node)
-        node._parent = None
+        self.remove_children(node.row(), 1)
+
+    def remove_children(self, row, count):
+        # type: (int, int) -> None
+        """ Removes count children starting at row """
+        removed = self._children[row:row + count]
+        del self._children[row:row + count]
+        for node in removed:
+            node._parent = None
+        for idx in range(row, len(self._children)):
+            self._children[idx]._row = idx
+        if self._branch_items is not None:
+            del self._branch_items[row:row + count]
 
     def row(self):
         # type: () -> int
-        return -1 if self._parent is None else self._parent._children.index(self)
+        return -1 if self._parent is None else self._row
+
+    def set_branch(self, data):
+        # type: (dict) -> None
+        """
+        Replaces the branch data. Fetched children are kept in their current
+        order, keys in data without a child are queued to be fetched after
+        them. Children whose key is not in data must be removed first.
+        """
+        self._branch = data
+        self.value = None
+        if self._branch_items is not None:
+            known = set(child.key for child in self._children)
+            # Only the items after the fetched children are read
+            self._branch_items = ([(child.key, None) for child in self._children] +
+                                  [(key, value) for key, value in data.items()
+                                   if key not in known])
+
+    def set_value(self, value):
+        # type: (object) -> None
+        """
+        Sets a new leaf value, discarding any previously built Setting. The
+        value is written through to the parent's dictionary.
+        """
+        self.value = value
+        self.display_text = None
+        self.size_hint = None
+        self._setting = None
+        self._setting_built = False
+        if self._parent is not None and self._parent.is_branch():
+            self._parent._branch[self._key] = value
 
     def to_string(self, level=0):
         # type: (int) -> str
@@ -101,38 +213,200 @@ class SettingNode(object):
             string += child.to_string(level + 1)
         return string
 
+    def unfetched_items(self):
+        # type: () -> list[tuple]
+        """ Returns the (key, value) items of the branch data without a child """
+        if self._branch is None:
+            return []
+        if self._branch_items is None:
+            return list(self._branch.items())
+        return self._branch_items[len(self._children):]
+
+    def unfetched_count(self):
+        # type: () -> int
+        if self._branch is None:
+            return 0
+        if self._branch_items is None:
+            return len(self._branch)
+        return len(self._branch_items) - len(self._children)
+
 
 class SettingModel(QtCore.QAbstractItemModel):
     columns = ('key', 'value')
+    # Maximum number of child nodes created per fetchMore call
+    fetch_batch_size = 256
+    # Maximum number of list items displayed before the text is truncated
+    max_display_items = 20
+
+    nodesChanged = QtCore.Signal(list)  # list[SettingNode]
 
     def __init__(self, parent=None):
         # type: (QtWidgets.QWidget) -> None
         super(SettingModel, self).__init__(parent)
         self._root = SettingNode('root')
+        # Fetched nodes by their key path
+        self._nodes = {}  # type: dict[tuple, SettingNode]
+        # Node whose rows are being inserted, it can't be fetched again by
+        # slots connected to rowsAboutToBeInserted
+        self._fetching = None  # type: SettingNode
 
     @property
     def root(self):
         # type: () -> SettingNode
         return self._root
 
+    def display_text(self, value):
+        # type: (object) -> str
+        """ Returns the display string for a value, truncating large lists """
+        if isinstance(value, list):
+            lines = list(map(str, value[:self.max_display_items]))
+            hidden = len(value) - self.max_display_items
+            if hidden > 0:
+                lines.append('... ({} more)'.format(hidden))
+            return '\n'.join(lines) + '\n'
+        return str(value)
+
+    def fetch_all(self):
+        """
+        Fetches every node that has not been populated yet, eg, so that the
+        whole tree can be searched.
+        """
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            self._fetch(node, node.unfetched_count())
+            pending.extend(child for child in node.children if child.is_branch())
+
+    def index_from_node(self, node, column=0):
+        # type: (SettingNode, int) -> QtCore.QModelIndex
+        if node is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row(), column, node)
+
+    def index_from_path(self, path, column=0):
+        # type: (tuple, int) -> QtCore.QModelIndex
+        """
+        :raise: KeyError if path does not exist
+        :param tuple    path:   Tuple of keys from the root dictionary
+        :param int      column:
+        """
+        return self.index_from_node(self.node_from_path(path), column)
+
+    def node_from_index(self, index):
+        # type: (QtCore.QModelIndex) -> SettingNode
+        return index.internalPointer() if index.isValid() else self._root
+
+    def node_from_path(self, path):
+        # type: (tuple) -> SettingNode
+        """
+        Returns the node for a tuple of keys, fetching any branches leading
+        to it that have not been populated yet.
+
+        :raise: KeyError if path does not exist
+        :param tuple    path:   Tuple of keys from the root dictionary
+        """
+        path = tuple(path)
+        node = self._nodes.get(path)
+        if node is not None:
+            return node
+
+        node = self._root
+        for depth in range(1, len(path) + 1):
+            child = self._nodes.get(path[:depth])
+            while child is None and node.can_fetch_more():
+                self.fetchMore(self.index_from_node(node))
+                child = self._nodes.get(path[:depth])
+            if child is None:
+                raise KeyError(path)
+            node = child
+        return node
+
     def set_data(self, data):
         # type: (dict) -> None
+        """
+        Sets the dictionary to display. Nodes are populated lazily as branches
+        are expanded, only the first batch of top level keys is created here.
+        """
         self.beginResetModel()
-        self.rebuild_tree(data, self._root)
+        self._root = SettingNode('root', data)
+        self._nodes = {}
+        self._register(self._root.fetch_more(self.fetch_batch_size))
         self.endResetModel()
 
-    def rebuild_tree(self, data, parent=None):
-        # type: (dict, SettingNode) -> None
-        for key, val in data.items():
-            is_dict = isinstance(val, dict)
-            node = SettingNode(str(key), None if is_dict else val, parent)
-            if is_dict:
-                self.rebuild_tree(val, node)
+    def set_value(self, path, value):
+        # type: (tuple, object) -> bool
+        """
+        Sets the value at a path of keys.
+
+        :raise: KeyError if path does not exist
+        :return: Whether the value was changed
+        """
+        return bool(self.set_values({tuple(path): value}))
+
+    def set_values(self, values):
+        # type: (dict[tuple, object]) -> list[SettingNode]
+        """
+        Sets multiple values, emitting a single dataChanged range per parent
+        and a single nodesChanged for all of the modified nodes.
+
+        :raise: KeyError if any path does not exist
+        :raise: SettingsError if any path is a branch
+        :param dict values: Dictionary of {key_path: value}
+        :return: List of the modified nodes
+        """
+        # Resolve everything before modifying to avoid partial updates
+        nodes = [(self.node_from_path(path), value)
+                 for path, value in values.items()]
+        for node, _ in nodes:
+            if node.is_branch():
+                raise SettingsError(
+                    'Cannot set the value of a branch: {}'.format(node.path()))
+
+        changed = []
+        rows = {}  # type: dict[SettingNode, list[int]]
+        for node, value in nodes:
+            if node.value != value:
+                node.set_value(value)
+                changed.append(node)
+                rows.setdefault(node.parent, []).append(node.row())
+
+        for parent, parent_rows in rows.items():
+            parent_index = self.index_from_node(parent)
+            self.dataChanged.emit(self.index(min(parent_rows), 1, parent_index),
+                                  self.index(max(parent_rows), 1, parent_index))
+        if changed:
+            self.nodesChanged.emit(changed)
+        return changed
+
+    def update_data(self, data):
+        # type: (dict) -> None
+        """
+        Updates the model to match data without resetting it. Only the rows
+        that were removed or added and the values that changed emit signals,
+        existing nodes are kept so expanded branches and the selection are
+        preserved.
+
+        Keys that are new to a branch are added after its existing keys.
+        """
+        if not self._root.is_fetched():
+            # No data has been set, there are no rows to keep
+            self.set_data(data)
+            return
+        changed = self._update_branch(self._root, data)
+        if changed:
+            self.nodesChanged.emit(changed)
 
     # ======================================================================== #
     #                                SUBCLASSED                                #
     # ======================================================================== #
 
+    def canFetchMore(self, parent):
+        # type: (QtCore.QModelIndex) -> bool
+        if parent.column() > 0:
+            return False
+        node = self.node_from_index(parent)
+        return node is not self._fetching and node.can_fetch_more()
+
     def columnCount(self, parent=QtCore.QModelIndex()):
         # type: (QtCore.QModelIndex) -> int
         return len(self.columns)
@@ -147,17 +421,35 @@ class SettingModel(QtCore.QAbstractItemModel):
             if col == 0:
                 return node.name
             elif col == 1:
-                if isinstance(node.value, list):
-                    return '\n'.join(map(str, node.value)) + '\n'
-                return str(node.value)
+                return self._display_text(node)
+        elif role == QtCore.Qt.SizeHintRole and col == 1:
+            # Avoids the delegate laying out the text on every query
+            if node.size_hint is None:
+                metrics = QtGui.QFontMetrics(QtWidgets.QApplication.font())
+                size = metrics.size(0, self._display_text(node))
+                node.size_hint = QtCore.QSize(
+                    size.width() + metrics.averageCharWidth(), size.height())
+            return node.size_hint
+
+    def fetchMore(self, parent):
+        # type: (QtCore.QModelIndex) -> None
+        self._fetch_batch(self.node_from_index(parent))
 
     def flags(self, index):
         # type: (QtCore.QModelIndex) -> QtCore.Qt.ItemFlags
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
         flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
         if index.column() == 1:
             flags |= QtCore.Qt.ItemIsEditable
         return flags
 
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        # type: (QtCore.QModelIndex) -> bool
+        if parent.column() > 0:
+            return False
+        return self.node_from_index(parent).has_children()
+
     def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
         # type: (int, QtCore.Qt.Orientation, int) -> str
         if role == QtCore.Qt.DisplayRole:
@@ -166,13 +458,14 @@ class SettingModel(QtCore.QAbstractItemModel):
 
     def index(self, row, column, parent=QtCore.QModelIndex()):
         # type: (int, int, QtCore.QModelIndex) -> QtCore.QModelIndex
-        parent_node = parent.internalPointer() if parent.isValid() else self._root
-        child = parent_node.child_by_index(row)
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        child = self.node_from_index(parent).child_by_index(row)
         return self.createIndex(row, column, child)
 
     def parent(self, child):
         # type: (QtCore.QModelIndex) -> QtCore.QModelIndex
-        node = child.internalPointer() if child.isValid() else self._root
+        node = self.node_from_index(child)
         parent = node.parent
         if parent is not None and parent != self._root:
             return self.createIndex(parent.row(), 0, parent)
@@ -180,8 +473,10 @@ class SettingModel(QtCore.QAbstractItemModel):
 
     def rowCount(self, parent=QtCore.QModelIndex()):
         # type: (QtCore.QModelIndex) -> int
-        node = parent.internalPointer() if parent.isValid() else self._root
-        return node.child_count()
+        # Only the first column has children
+        if parent.column() > 0:
+            return 0
+        return self.node_from_index(parent).child_count()
 
     def setData(self, index, value, role=QtCore.Qt.EditRole):
         # type: (QtCore.QModelIndex, object, int) -> bool
@@ -189,15 +484,284 @@ class SettingModel(QtCore.QAbstractItemModel):
             return False
         node = index.internalPointer()
         if value != node.value:
-            node.value = value
+            node.set_value(value)
             self.dataChanged.emit(index, index)
+            self.nodesChanged.emit([node])
         return True
 
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _display_text(self, node):
+        # type: (SettingNode) -> str
+        if node.display_text is None:
+            node.display_text = self.display_text(node.value)
+        return node.display_text
+
+    def _fetch(self, node, count):
+        # type: (SettingNode, int) -> None
+        if count <= 0 or node is self._fetching:
+            return
+        start = node.child_count()
+        self._fetching = node
+        try:
+            self.beginInsertRows(self.index_from_node(node), start, start + count - 1)
+            nodes = node.fetch_more(count)
+        finally:
+            self._fetching = None
+        self._register(nodes)
+        self.endInsertRows()
+
+    def _fetch_batch(self, node):
+        # type: (SettingNode) -> None
+        self._fetch(node, min(self.fetch_batch_size, node.unfetched_count()))
+
+    def _register(self, nodes):
+        # type: (list[SettingNode]) -> None
+        for node in nodes:
+            self._nodes[node.key_path()] = node
+
+    def _unregister(self, node):
+        # type: (SettingNode) -> None
+        """ Removes the node and all of its fetched descendants """
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            self._nodes.pop(node.key_path(), None)
+            pending.extend(node.children)
+
+    def _update_branch(self, node, data):
+        # type: (SettingNode, dict) -> list[SettingNode]
+        changed = []
+        if not node.is_fetched():
+            node.set_branch(data)
+            return changed
+
+        # Indexes are created from the nodes as they're used, as rows move
+        # when others are removed
+        parent = self.index_from_node(node)
+        # Nodes that no longer exist or have switched between a branch and
+        # a value are removed, in contiguous ranges from the end
+        stale = [row for row, child in enumerate(node.children)
+                 if child.key not in data or
+                 child.is_branch() != isinstance(data[child.key], dict)]
+        while stale:
+            last = first = stale.pop()
+            while stale and stale[-1] == first - 1:
+                first = stale.pop()
+            self.beginRemoveRows(parent, first, last)
+            for child in node.children[first:last + 1]:
+                self._unregister(child)
+            node.remove_children(first, last - first + 1)
+            self.endRemoveRows()
+
+        # New keys are queued after the existing children, they only need
+        # to be inserted if the view has already fetched everything
+        fully_fetched = not node.can_fetch_more()
+        node.set_branch(data)
+
+        for child in node.children:
+            value = data[child.key]
+            if child.is_branch():
+                changed.extend(self._update_branch(child, value))
+            elif child.value != value:
+                child.set_value(value)
+                index = self.index_from_node(child, 1)
+                self.dataChanged.emit(index, index)
+                changed.append(child)
+
+        if fully_fetched:
+            self._fetch_batch(node)
+        return changed
+
+
+class SettingFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Filters a SettingModel by node name, keeping the parent branches of
+    matching nodes visible.
+
+    Node names are held in a SearchIndex which is updated as the source
+    model fetches and removes rows, so filtering only costs the lookup.
+    Branch data that hasn't been fetched is searched directly, and only the
+    matching nodes and their ancestors are fetched.
+    Filtering through set_filter_text is delayed until the text has stopped
+    changing for filter_delay milliseconds to stay responsive while typing.
+    """
+    # Milliseconds without changes to the filter text before filtering
+    filter_delay = 200
+
+    def __init__(self, parent=None):
+        # type: (QtCore.QObject) -> None
+        super(SettingFilterProxyModel, self).__init__(parent)
+        self._index = SearchIndex()
+        self._filter_text = ''
+        # Matching nodes and their ancestors, or None if not filtering
+        self._accepted = None  # type: set[SettingNode]
+        # Whether _apply_filter is fetching the matches, the filter is
+        # invalidated once they're all fetched
+        self._fetching_matches = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def filter_text(self):
+        # type: () -> str
+        return self._filter_text
+
+    def set_filter_text(self, text, delay=None):
+        # type: (str, int) -> None
+        """
+        Filters the rows by text after delay milliseconds, defaults to
+        filter_delay. Each call restarts the delay.
+        """
+        self._filter_text = text
+        delay = self.filter_delay if delay is None else delay
+        if delay > 0:
+            self._timer.start(delay)
+        else:
+            self._timer.stop()
+            self._apply_filter()
+
+    # ======================================================================== #
+    #                                SUBCLASSED                                #
+    # ======================================================================== #
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        # type: (int, QtCore.QModelIndex) -> bool
+        if self._accepted is None:
+            return True
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        return index.internalPointer() in self._accepted
+
+    def setSourceModel(self, model):
+        # type: (SettingModel) -> None
+        previous = self.sourceModel()
+        if previous is not None:
+            previous.rowsInserted.disconnect(self._on_rows_inserted)
+            previous.rowsAboutToBeRemoved.disconnect(self._on_rows_about_to_be_removed)
+            previous.modelReset.disconnect(self._on_model_reset)
+        super(SettingFilterProxyModel, self).setSourceModel(model)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        model.modelReset.connect(self._on_model_reset)
+        self._on_model_reset()
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _accept(self, nodes):
+        # type: (set[SettingNode]) -> None
+        """ Adds the nodes and all of their ancestors to the accepted nodes """
+        root = self.sourceModel().root
+        for node in nodes:
+            while node is not None and node is not root and node not in self._accepted:
+                self._accepted.add(node)
+                node = node.parent
+
+    def _apply_filter(self):
+        if not self._filter_text:
+            self._accepted = None
+        else:
+            self._accepted = set()
+            self._accept(self._index.search(self._filter_text))
+            self._fetching_matches = True
+            try:
+                self._fetch_matches()
+            finally:
+                self._fetching_matches = False
+        self.invalidateFilter()
+
+    def _fetch_matches(self):
+        """
+        Searches the branch data that hasn't been fetched and fetches only
+        the nodes whose name contains the filter text, and their ancestors.
+        The fetched rows are accepted by _on_rows_inserted.
+        """
+        model = self.sourceModel()
+        query = self._filter_text.lower()
+        paths = []
+        # (key path of the parent, unfetched items)
+        pending = []
+        nodes = [model.root]
+        while nodes:
+            node = nodes.pop()
+            pending.append((node.key_path(), node.unfetched_items()))
+            nodes.extend(child for child in node.children if child.is_branch())
+        while pending:
+            parent_path, items = pending.pop()
+            for key, value in items:
+                path = parent_path + (key,)
+                if query in str(key).lower():
+                    paths.append(path)
+                if isinstance(value, dict):
+                    pending.append((path, value.items()))
+        for path in paths:
+            self._accept([model.node_from_path(path)])
+
+    def _index_nodes(self, nodes):
+        # type: (list[SettingNode]) -> None
+        pending = list(nodes)
+        while pending:
+            node = pending.pop()
+            self._index.add(node, node.name)
+            pending.extend(node.children)
+
+    # ======================================================================== #
+    #                                  SLOTS                                   #
+    # ======================================================================== #
+
+    def _on_model_reset(self):
+        self._index.clear()
+        self._index_nodes(self.sourceModel().root.children)
+        if self._accepted is not None:
+            self._apply_filter()
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        # type: (QtCore.QModelIndex, int, int) -> None
+        node = self.sourceModel().node_from_index(parent)
+        pending = node.children[first:last + 1]
+        while pending:
+            node = pending.pop()
+            self._index.discard(node)
+            if self._accepted is not None:
+                self._accepted.discard(node)
+            pending.extend(node.children)
+
+    def _on_rows_inserted(self, parent, first, last):
+        # type: (QtCore.QModelIndex, int, int) -> None
+        nodes = self.sourceModel().node_from_index(parent).children[first:last + 1]
+        self._index_nodes(nodes)
+        if self._accepted is None:
+            return
+        # The proxy has already filtered the new rows, refilter if any match
+        query = self._filter_text.lower()
+        matches = set(n for n in nodes if query in n.name.lower())
+        if matches:
+            self._accept(matches)
+            if not self._fetching_matches:
+                self.invalidateFilter()
+
+    def _on_timeout(self):
+        self._apply_filter()
+
 
 class SettingDelegate(QtWidgets.QStyledItemDelegate):
+    @staticmethod
+    def node_from_index(index):
+        # type: (QtCore.QModelIndex) -> SettingNode
+        """ Returns the SettingNode for an index of a SettingModel or a proxy """
+        model = index.model()
+        while isinstance(model, QtCore.QAbstractProxyModel):
+            index = model.mapToSource(index)
+            model = index.model()
+        return index.internalPointer()
+
     def createEditor(self, parent, option, index):
         if index.isValid():
-            node = index.internalPointer()
+            node = self.node_from_index(index)
             if node.setting is not None:
                 try:
                     widget = create_setting_widget(node.setting, parent)
@@ -209,7 +773,7 @@ class SettingDelegate(QtWidgets.QStyledItemDelegate):
 
     def setEditorData(self, editor, index):
         if isinstance(editor, SettingUI):
-            node = index.internalPointer()
+            node = self.node_from_index(index)
             editor.setValue(node.value)
         else:
             super(SettingDelegate, self).setEditorData(editor, index)
@@ -226,33 +790,68 @@ class SettingDictionaryView(QtWidgets.QTreeView):
         super(SettingDictionaryView, self).__init__(parent)
         self.data = data
 
-        self.setModel(SettingModel())
+        self._model = SettingModel(self)
+        self._proxy = SettingFilterProxyModel(self)
+        self._proxy.setSourceModel(self._model)
+        self.setModel(self._proxy)
         self.setItemDelegate(SettingDelegate(self))
 
-        self.model().dataChanged.connect(self._on_data_changed)
+        self._model.nodesChanged.connect(self._on_nodes_changed)
 
         if data is not None:
             self.set_data(data)
 
+    @property
+    def setting_model(self):
+        # type: () -> SettingModel
+        """ Source model, model() returns the filter proxy """
+        return self._model
+
     def set_data(self, data):
         # type: (dict) -> None
-        self.model().set_data(data)
-
-    def _on_data_changed(self, from_index, to_index):
-        # type: (QtCore.QModelIndex, QtCore.QModelIndex) -> None
-        if not from_index.isValid():
-            return
-        node = from_index.internalPointer()
-        path = node.path(skip_root=True)
+        self.data = data
+        self._model.set_data(data)
 
-        # Walk the path through the dictionary and set the final value
-        parts = path.split('.')
-        curr = self.data
-        for part in parts[:-1]:
-            curr = curr[part]
-        curr[parts[-1]] = node.value
+    def set_filter_text(self, text):
+        # type: (str) -> None
+        """
+        Only shows keys containing text, and their parents. Filtering is
+        delayed while the text keeps changing, see SettingFilterProxyModel.
+        """
+        self._proxy.set_filter_text(text)
 
-        self.settingChanged.emit(path, node.value)
+    def update_data(self, data):
+        # type: (dict) -> None
+        """ Updates the view to display data, keeping the current view state """
+        self.data = data
+        self._model.update_data(data)
+
+    def set_value(self, path, value):
+        # type: (tuple, object) -> bool
+        """
+        Sets the value at a tuple of keys from the root dictionary.
+
+        :raise: KeyError if path does not exist
+        :return: Whether the value was changed
+        """
+        return self._model.set_value(path, value)
+
+    def set_values(self, values):
+        # type: (dict[tuple, object]) -> list[SettingNode]
+        """
+        Sets multiple values from a dictionary of {key_path: value}. The model
+        is updated in a single batch.
+
+        :return: List of the modified nodes
+        """
+        return self._model.set_values(values)
+
+    def _on_nodes_changed(self, nodes):
+        # type: (list[SettingNode]) -> None
+        # The model writes values through to the dictionary, only the
+        # change needs to be reported
+        for node in nodes:
+            self.settingChanged.emit(node.path(skip_root=True), node.value)
 
 
 if __name__ == '__main__':
@@ -1,15 +1,35 @@
-from Qt import QtCore, QtGui, QtWidgets
-
 from settings_manager.exceptions import SettingsError
-from settings_manager.setting import Setting
-from settings_manager.ui.setting_widgets.setting_ui import SettingUI
-from settings_manager.ui.setting_widgets.bool_setting import BoolSetting
-from settings_manager.ui.setting_widgets.choice_setting import ChoiceSetting
-from settings_manager.ui.setting_widgets.float_setting import FloatSetting
-from settings_manager.ui.setting_widgets.int_setting import IntSetting
-from settings_manager.ui.setting_widgets.list_setting import ListSetting
-from settings_manager.ui.setting_widgets.list_choice_setting import ListChoiceSetting
-from settings_manager.ui.setting_widgets.string_setting import StringSetting
+from settings_manager import util
+
+# Widgets are imported on first access so that importing the package doesn't
+# import Qt, see util.lazy_attributes
+_load = util.lazy_attributes(globals(), {
+    'SettingUI': 'settings_manager.ui.setting_widgets.setting_ui',
+    'BoolSetting': 'settings_manager.ui.setting_widgets.bool_setting',
+    'ChoiceSetting': 'settings_manager.ui.setting_widgets.choice_setting',
+    'FloatSetting': 'settings_manager.ui.setting_widgets.float_setting',
+    'IntSetting': 'settings_manager.ui.setting_widgets.int_setting',
+    'ListSetting': 'settings_manager.ui.setting_widgets.list_setting',
+    'ListChoiceSetting': 'settings_manager.ui.setting_widgets.list_choice_setting',
+    'StringSetting': 'settings_manager.ui.setting_widgets.string_setting',
+})
+
+
+# {(data_type, subtype, choices, minmax): widget}. Keys are matched by
+# get_setting_widget_class, a None subtype, choices or minmax matches any
+# setting. Default widgets are stored by name so that they are only imported
+# when first used.
+_registry = {
+    (object, None, True, True): 'ListChoiceSetting',
+    (object, None, True, False): 'ChoiceSetting',
+    (bool, None, False, None): 'BoolSetting',
+    (float, None, False, None): 'FloatSetting',
+    (int, None, False, None): 'IntSetting',
+    (list, None, False, None): 'ListSetting',
+    (str, None, False, None): 'StringSetting',
+}
+# Memoised results of get_setting_widget_class, cleared on registration
+_cache = {}
 
 
 def create_setting_widget(setting, parent=None):
@@ -23,26 +43,93 @@ def create_setting_widget(setting, parent=None):
 
 def get_default_setting_widget(setting):
     """
-    Returns the default widget for a Settings object.
-    Default widgets are created using Qt.py
+    Returns the default widget for a Settings object, see
+    register_setting_widget. Default widgets are created using Qt.py
 
     :param Setting              setting:
     :rtype: type[QtWidgets.QWidget]
     """
-    data_type = setting.type
-    choices = setting.property('choices')
-    minmax = setting.property('minmax')
-    if choices and minmax:
-        return ListChoiceSetting
-    elif choices:
-        return ChoiceSetting
-    elif data_type == str:
-        return StringSetting
-    elif data_type == int:
-        return IntSetting
-    elif data_type == float:
-        return FloatSetting
-    elif data_type == bool:
-        return BoolSetting
-    elif data_type == list:
-        return ListSetting
+    return get_setting_widget_class(setting.type, setting.subtype,
+                                    setting.property_is_set('choices'),
+                                    setting.property_is_set('minmax'))
+
+
+def get_setting_widget_class(data_type, subtype=None, choices=False, minmax=False):
+    """
+    Returns the registered widget for settings of the given type, or None.
+
+    Registered keys are tried for each class in the method resolution order
+    of data_type, most derived first, so a widget registered for a base class
+    is used for its subclasses. For each class, the keys with an exact
+    subtype, choices and minmax take priority over the keys matching any.
+    Results are cached until the next registration.
+
+    :param type data_type:
+    :param type subtype:    Content type for lists
+    :param bool choices:    Whether the setting has choices
+    :param bool minmax:     Whether the setting has a minmax
+    :rtype: type[QtWidgets.QWidget]
+    """
+    key = (data_type, subtype, bool(choices), bool(minmax))
+    try:
+        return _cache[key]
+    except KeyError:
+        pass
+
+    widget = next((_registry[k] for k in _candidate_keys(*key) if k in _registry), None)
+    if isinstance(widget, str):
+        widget = _load(widget)
+    _cache[key] = widget
+    return widget
+
+
+def register_setting_widget(widget, data_type, subtype=None, choices=False, minmax=None):
+    """
+    Registers the default widget for settings of data_type, replacing any
+    widget registered with the same arguments. Setting the 'widget' property
+    on a Setting overrides the default.
+
+    eg,
+
+    >>> register_setting_widget(PathSetting, pathlib.Path)
+    >>> register_setting_widget(ColourSetting, list, subtype=float, minmax=True)
+
+    :param type widget:     Widget class, initialised with (setting, parent=)
+    :param type data_type:  Type of setting to use the widget for, including
+                            subclasses
+    :param type subtype:    Content type for lists. None matches any.
+    :param bool choices:    Whether the widget is for settings with choices.
+                            None matches either.
+    :param bool minmax:     Whether the widget is for settings with a minmax.
+                            None matches either.
+    """
+    _registry[(data_type, subtype, choices, minmax)] = widget
+    _cache.clear()
+
+
+def unregister_setting_widget(data_type, subtype=None, choices=False, minmax=None):
+    """
+    Removes a widget added with register_setting_widget, using the same
+    arguments.
+
+    :raise: KeyError if no widget is registered with the arguments
+    """
+    del _registry[(data_type, subtype, choices, minmax)]
+    _cache.clear()
+
+
+def _candidate_keys(data_type, subtype, choices, minmax):
+    # type: (type, type, bool, bool) -> iter[tuple]
+    """ Registry keys matching the arguments, in order of priority """
+    subtypes = (None,) if subtype is None else _mro(subtype) + (None,)
+    for cls in _mro(data_type):
+        for sub in subtypes:
+            for has_choices in (choices, None):
+                for has_minmax in (minmax, None):
+                    yield cls, sub, has_choices, has_minmax
+
+
+def _mro(cls):
+    # type: (type) -> tuple[type]
+    # Old style python 2 classes don't have an __mro__
+    return getattr(cls, '__mro__', (cls, object))
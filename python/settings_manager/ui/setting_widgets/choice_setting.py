@@ -8,28 +8,59 @@ class ChoiceSetting(QtWidgets.QComboBox, SettingUI):
     def __init__(self, setting=None, parent=None):
         # type: (Setting, QtWidgets.QWidget) -> None
         super(ChoiceSetting, self).__init__(parent)
+        self._choices = []
         SettingUI.__init__(self, setting)
         self.currentTextChanged.connect(self.onValueChanged)
+        self.choicesChanged.connect(self._on_choices_changed)
 
     def setSetting(self, setting):
         # type: (Setting) -> None
+        # Choices are loaded first so that the current value can be shown
+        self._set_choices(setting.property('choices'))
         super(ChoiceSetting, self).setSetting(setting)
-        choices = setting.property('choices')
-        self.clear()
-        self.addItems(list(map(str, choices)))
 
     def setValue(self, value):
         # type: (str) -> None
         # setCurrentText is qt5 only
-        idx = self._setting.property('choices').index(value)
+        idx = self._choices.index(value)
         self.setCurrentIndex(idx)
 
     def value(self):
         # type: () -> str
         idx = self.currentIndex()
-        choice = self._setting.property('choices')[idx]
+        # No choice is shown, eg, the value is no longer a choice
+        if idx < 0:
+            return None
+        choice = self._choices[idx]
         return self.setting.type(choice)
 
     def onValueChanged(self, value):
         # Use the value which preserves the choice's type
-        super(ChoiceSetting, self).onValueChanged(self.value())
+        value = self.value()
+        if value is not None:
+            super(ChoiceSetting, self).onValueChanged(value)
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _set_choices(self, choices):
+        # type: (list) -> None
+        # Changing the items would otherwise set the first choice
+        blocked = self.blockSignals(True)
+        self._choices = choices
+        self.clear()
+        self.addItems(list(map(str, choices)))
+        self.setCurrentIndex(-1)
+        self.blockSignals(blocked)
+
+    # ======================================================================== #
+    #                                  SLOTS                                   #
+    # ======================================================================== #
+
+    def _on_choices_changed(self):
+        self._set_choices(self._setting.property('choices'))
+        value = self._setting.get()
+        # A value that is no longer a choice is kept, but not shown
+        if value in self._choices:
+            self.setValue(value)
@@ -11,16 +11,12 @@ class ListChoiceSetting(CheckableComboBox, SettingUI):
         super(ListChoiceSetting, self).__init__(parent)
         SettingUI.__init__(self, setting)
         self.itemStateChanged.connect(self.onValueChanged)
+        self.choicesChanged.connect(self._on_choices_changed)
 
     def setSetting(self, setting):
         # type: (Setting) -> None
         super(ListChoiceSetting, self).setSetting(setting)
-        # Load choices
-        choices = setting.property('choices')
-        current_values = setting.get() or ()
-        self.addItems(list(map(str, choices)))
-        for idx, value in enumerate(choices):
-            self.setItemChecked(idx, value in current_values)
+        self._load_choices()
 
         # Set a useful default message
         minmax = setting.property('minmax')
@@ -30,10 +26,8 @@ class ListChoiceSetting(CheckableComboBox, SettingUI):
         # type: (str|list[str]) -> None
         if not isinstance(value, list):
             value = [value]
-        value = list(map(str, value))
-        for row in range(self.model().rowCount()):
-            self.setItemChecked(row, self.itemText(row) in value)
-        self.itemStateChanged.emit(None)
+        # Updates the setting once rather than for every item
+        self.setCheckedItems(map(str, value))
 
     def value(self):
         # type: () -> list[str]
@@ -46,7 +40,7 @@ class ListChoiceSetting(CheckableComboBox, SettingUI):
         # checked items and check whether checking the item enables or disables
         # it, modifying the number accordingly and only allowing it if the new
         # value is within the given range
-        num_selected = len(list(self.checkedItems()))
+        num_selected = self.checkedCount()
         num_selected += -1 if self.itemChecked(index.row()) else 1
         lo, hi = self._setting.property('minmax')
         if lo <= num_selected <= hi:
@@ -56,3 +50,22 @@ class ListChoiceSetting(CheckableComboBox, SettingUI):
         # type: (QtGui.QStandardItem) -> None
         # Use the value which preserves the choice's type
         super(ListChoiceSetting, self).onValueChanged(self.value())
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _load_choices(self):
+        self.clear()
+        self.addItems(list(map(str, self._setting.property('choices'))))
+        self.setCheckedItems(map(str, self._setting.get() or ()))
+
+    # ======================================================================== #
+    #                                  SLOTS                                   #
+    # ======================================================================== #
+
+    def _on_choices_changed(self):
+        # Values that are no longer choices are kept, but not shown
+        blocked = self.blockSignals(True)
+        self._load_choices()
+        self.blockSignals(blocked)
@@ -33,6 +33,179 @@ class EnterItemDialog(QtWidgets.QDialog):
         self.ok_btn.clicked.connect(self.accept)
 
 
+class ListSettingModel(QtCore.QAbstractListModel):
+    """
+    List model over a python list of strings.
+
+    Edits are applied to the list in place and announce only the rows they
+    change, so that editing, inserting and moving items doesn't rebuild the
+    list. itemsChanged is emitted once per edit, however many rows it
+    changes.
+
+    The model holds its own copy of the items, not the setting's list. A
+    ListSetting sets the whole list on its setting after each edit, which
+    copies and validates every item, so an edit costs O(n) in the length of
+    the list however few rows it changes.
+    """
+    itemsChanged = QtCore.Signal()
+
+    def __init__(self, items=None, parent=None):
+        # type: (list[str], QtCore.QObject) -> None
+        super(ListSettingModel, self).__init__(parent)
+        self._items = list(items or [])
+
+    def insert_items(self, row, items):
+        # type: (int, list[str]) -> None
+        """ Inserts items before row. A row of -1 appends them. """
+        if not items:
+            return
+        row = len(self._items) if row < 0 else min(row, len(self._items))
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(items) - 1)
+        self._items[row:row] = items
+        self.endInsertRows()
+        self.itemsChanged.emit()
+
+    def items(self):
+        # type: () -> list[str]
+        """ Returns a copy of the items """
+        return list(self._items)
+
+    def move_items(self, rows, destination):
+        # type: (list[int], int) -> None
+        """
+        Moves the items at rows before the item at destination, in their
+        current order. A destination of rowCount() moves them to the end.
+        """
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        if rows[-1] - rows[0] + 1 == len(rows):
+            # A block can't move inside itself
+            if rows[0] <= destination <= rows[-1] + 1:
+                return
+            self.beginMoveRows(QtCore.QModelIndex(), rows[0], rows[-1],
+                               QtCore.QModelIndex(), destination)
+            self._items = self._reordered(rows, destination)
+            self.endMoveRows()
+        else:
+            self.layoutAboutToBeChanged.emit()
+            order = self._reordered(rows, destination, list(range(len(self._items))))
+            self._items = [self._items[row] for row in order]
+            new_rows = dict((old, new) for new, old in enumerate(order))
+            old_indexes = self.persistentIndexList()
+            new_indexes = [self.index(new_rows[index.row()]) for index in old_indexes]
+            self.changePersistentIndexList(old_indexes, new_indexes)
+            self.layoutChanged.emit()
+        self.itemsChanged.emit()
+
+    def remove_items(self, rows):
+        # type: (list[int]) -> None
+        """
+        Removes the items at rows. Consecutive rows are removed together, and
+        itemsChanged is emitted once.
+        """
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        # Remove from the end so that the remaining rows keep their index
+        for first, last in reversed(self._ranges(rows)):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self._items[first:last + 1]
+            self.endRemoveRows()
+        self.itemsChanged.emit()
+
+    def set_items(self, items):
+        # type: (list[str]) -> None
+        """ Replaces every item. itemsChanged is not emitted. """
+        self.beginResetModel()
+        self._items = list(items)
+        self.endResetModel()
+
+    # ======================================================================== #
+    #                                SUBCLASSED                                #
+    # ======================================================================== #
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        # type: (QtCore.QModelIndex, int) -> str
+        if index.isValid() and role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self._items[index.row()]
+
+    def flags(self, index):
+        # type: (QtCore.QModelIndex) -> QtCore.Qt.ItemFlags
+        if not index.isValid():
+            # Items are dropped between rows, not onto them
+            return QtCore.Qt.ItemIsDropEnabled
+        return (QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable |
+                QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsDragEnabled)
+
+    def insertRows(self, row, count, parent=QtCore.QModelIndex()):
+        # type: (int, int, QtCore.QModelIndex) -> bool
+        if parent.isValid():
+            return False
+        self.insert_items(row, [''] * count)
+        return True
+
+    def moveRows(self, source_parent, source_row, count, destination_parent, destination_child):
+        # type: (QtCore.QModelIndex, int, int, QtCore.QModelIndex, int) -> bool
+        if source_parent.isValid() or destination_parent.isValid():
+            return False
+        self.move_items(range(source_row, source_row + count), destination_child)
+        return True
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        # type: (int, int, QtCore.QModelIndex) -> bool
+        if parent.isValid():
+            return False
+        self.remove_items(range(row, row + count))
+        return True
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        # type: (QtCore.QModelIndex) -> int
+        return 0 if parent.isValid() else len(self._items)
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        # type: (QtCore.QModelIndex, object, int) -> bool
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        value = str(value)
+        if self._items[index.row()] != value:
+            self._items[index.row()] = value
+            self.dataChanged.emit(index, index)
+            self.itemsChanged.emit()
+        return True
+
+    def supportedDropActions(self):
+        # type: () -> QtCore.Qt.DropActions
+        return QtCore.Qt.MoveAction
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _reordered(self, rows, destination, items=None):
+        # type: (list[int], int, list) -> list
+        """ Returns items with the sorted rows moved before destination """
+        items = self._items if items is None else items
+        row_set = set(rows)
+        remaining = [item for row, item in enumerate(items) if row not in row_set]
+        # Rows taken out from before the destination move it back
+        destination -= sum(1 for row in rows if row < destination)
+        moving = [items[row] for row in rows]
+        return remaining[:destination] + moving + remaining[destination:]
+
+    @staticmethod
+    def _ranges(rows):
+        # type: (list[int]) -> list[tuple[int, int]]
+        """ Groups sorted rows into (first, last) runs of consecutive rows """
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1] = (ranges[-1][0], row)
+            else:
+                ranges.append((row, row))
+        return ranges
+
+
 class ListSetting(QtWidgets.QWidget, SettingUI):
     def __init__(self, setting=None, parent=None):
         # type: (Setting, QtWidgets.QWidget) -> None
@@ -40,11 +213,16 @@ class ListSetting(QtWidgets.QWidget, SettingUI):
 
         # ----- Widgets -----
 
-        self.list_widget = QtWidgets.QListWidget()
-        self.list_widget.setAcceptDrops(True)
-        self.list_widget.setDragEnabled(True)
-        self.list_widget.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
-        self.list_widget.setDropIndicatorShown(True)
+        self.list_model = ListSettingModel(parent=self)
+        self.list_view = QtWidgets.QListView()
+        self.list_view.setModel(self.list_model)
+        self.list_view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setDragEnabled(True)
+        self.list_view.setAcceptDrops(True)
+        self.list_view.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
+        self.list_view.setDefaultDropAction(QtCore.Qt.MoveAction)
+        self.list_view.setDropIndicatorShown(True)
 
         self.add_btn = QtWidgets.QPushButton('+')
         self.add_btn.setFixedWidth(self.add_btn.sizeHint().height())
@@ -54,6 +232,9 @@ class ListSetting(QtWidgets.QWidget, SettingUI):
         self.sub_btn.setFixedWidth(self.sub_btn.sizeHint().height())
         self.sub_btn.setEnabled(False)
 
+        paste_shortcut = QtWidgets.QShortcut(QtGui.QKeySequence.Paste, self.list_view)
+        paste_shortcut.setContext(QtCore.Qt.WidgetShortcut)
+
         # ----- Layout -----
 
         btn_layout = QtWidgets.QVBoxLayout()
@@ -62,7 +243,7 @@ class ListSetting(QtWidgets.QWidget, SettingUI):
         btn_layout.addStretch()
 
         main_layout = QtWidgets.QHBoxLayout()
-        main_layout.addWidget(self.list_widget)
+        main_layout.addWidget(self.list_view)
         main_layout.addLayout(btn_layout)
 
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -72,21 +253,51 @@ class ListSetting(QtWidgets.QWidget, SettingUI):
 
         self.add_btn.clicked.connect(self._on_add_btn_clicked)
         self.sub_btn.clicked.connect(self._on_sub_btn_clicked)
-        self.list_widget.itemChanged.connect(self.onValueChanged)
-        self.list_widget.model().rowsMoved.connect(self._on_rows_moved)
-        self.list_widget.selectionModel().selectionChanged.connect(self._on_selection_changed)
+        paste_shortcut.activated.connect(self.paste)
+        self.list_model.itemsChanged.connect(self.onValueChanged)
+        self.list_view.selectionModel().selectionChanged.connect(self._on_selection_changed)
 
         # ----- Initialise -----
 
         SettingUI.__init__(self, setting)
 
-    def onValueChanged(self, value):
-        # Use self.value() as it uses a list of strings, whereas the
-        # valueChanged uses a single QtWidgets.ListWidgetItem or None
+    def add_items(self, items, row=-1):
+        # type: (list[str], int) -> int
+        """
+        Inserts items before row, or at the end, as a single change. Items
+        beyond the maximum length of the setting are ignored.
+
+        :rtype: int
+        :return: Number of items added
+        """
+        minmax = self._setting.property('minmax') if self._setting else None
+        if minmax:
+            items = items[:max(0, minmax[1] - self.list_model.rowCount())]
+        self.list_model.insert_items(row, [str(item) for item in items])
+        return len(items)
+
+    def onValueChanged(self, value=None):
+        # Use self.value() as the model only signals that the items changed
         value = self.value()
         super(ListSetting, self).onValueChanged(value)
         self._enable_buttons()
 
+    def paste(self):
+        """
+        Adds each non empty line of the clipboard text after the current
+        item, or at the end if there is no current item.
+        """
+        text = QtWidgets.QApplication.clipboard().text()
+        lines = [line.strip() for line in text.splitlines()]
+        current = self.list_view.currentIndex()
+        row = current.row() + 1 if current.isValid() else -1
+        self.add_items([line for line in lines if line], row)
+
+    def remove_selected(self):
+        """ Removes the selected items as a single change """
+        rows = [index.row() for index in self.list_view.selectionModel().selectedRows()]
+        self.list_model.remove_items(rows)
+
     def setSetting(self, setting):
         # type: (Setting) -> None
         super(ListSetting, self).setSetting(setting)
@@ -94,42 +305,34 @@ class ListSetting(QtWidgets.QWidget, SettingUI):
 
     def setValue(self, value):
         # type: (list) -> None
-        self.list_widget.clear()
-        for x in value:
-            self._add_item(str(x))
+        self.list_model.set_items([str(x) for x in value])
+        # set_items doesn't emit itemsChanged
+        self.onValueChanged()
 
     def sizeHint(self):
         return QtCore.QSize(100, 80)
 
     def value(self):
         # type: () -> list[str]
-        num_items = self.list_widget.count()
-        lst = [self.list_widget.item(row).text() for row in range(num_items)]
-        return lst
+        return self.list_model.items()
 
     # ======================================================================== #
     #                                PROTECTED                                 #
     # ======================================================================== #
 
-    def _add_item(self, text):
-        # type: (str) -> QtWidgets.QListWidgetItem
-        item = QtWidgets.QListWidgetItem(text, self.list_widget)
-        item.setFlags(item.flags() | QtCore.Qt.ItemIsEditable)
-        return item
-
     def _enable_buttons(self):
         if self._setting is None:
             self.add_btn.setEnabled(False)
             self.sub_btn.setEnabled(False)
             return
 
-        has_selection = bool(self.list_widget.selectedIndexes())
-        value = self._setting.get()
+        has_selection = self.list_view.selectionModel().hasSelection()
+        count = self.list_model.rowCount()
         minmax = self._setting.property('minmax')
         if minmax:
             lo, hi = minmax
-            self.add_btn.setEnabled(hi > len(value))
-            self.sub_btn.setEnabled(has_selection and lo < len(value))
+            self.add_btn.setEnabled(hi > count)
+            self.sub_btn.setEnabled(has_selection and lo < count)
         else:
             self.add_btn.setEnabled(True)
             self.sub_btn.setEnabled(has_selection)
@@ -142,17 +345,10 @@ class ListSetting(QtWidgets.QWidget, SettingUI):
         enter_item = EnterItemDialog()
         if enter_item.exec_():
             text = enter_item.line_edit.text()
-            self._add_item(text)
-
-    def _on_rows_moved(self, parent, start, end, destination, row):
-        # Force the setting to update
-        self.onValueChanged(None)
+            self.add_items([text])
 
     def _on_selection_changed(self, selected, deselected):
         self._enable_buttons()
 
     def _on_sub_btn_clicked(self):
-        for item in self.list_widget.selectedItems():
-            index = self.list_widget.indexFromItem(item)
-            self.list_widget.takeItem(index.row())
-            self.list_widget.itemChanged.emit(item)
+        self.remove_selected()
@@ -19,6 +19,9 @@ class SettingUI(object):
 
     """
     settingChanged = QtCore.Signal(object)  # Setting
+    # Emitted in the widget's thread when a setting's ChoicesProvider has new
+    # choices, see Setting.choices_provider
+    choicesChanged = QtCore.Signal()
 
     def __init__(self, setting=None):
         # type: (Setting) -> None
@@ -51,7 +54,13 @@ class SettingUI(object):
 
         :param Setting  setting:
         """
+        provider = self._setting.choices_provider() if self._setting else None
+        if provider is not None:
+            provider.remove_listener(self._on_choices_provided)
         self._setting = setting
+        provider = setting.choices_provider()
+        if provider is not None:
+            provider.add_listener(self._on_choices_provided)
         value = self._setting.get()
         self.setNone(True) if value is None else self.setValue(value)
 
@@ -95,3 +104,8 @@ class SettingUI(object):
             return
         self._setting.set(value)
         self.settingChanged.emit(self._setting)
+
+    def _on_choices_provided(self):
+        # Providers may refresh in a background thread, the signal queues
+        # the call to the widget's thread
+        self.choicesChanged.emit()
@@ -3,14 +3,25 @@ from collections import namedtuple
 
 from Qt import QtWidgets, QtCore, QtGui
 
-from settings_manager.setting import Setting
+from settings_manager.conditions import ConditionGraph, State
+from settings_manager.history import History
+from settings_manager.search import SearchIndex
+from settings_manager.setting import Setting, SettingChange
 from settings_manager.settings_group import SettingsGroup
+from settings_manager.ui.change_coalescer import ChangeCoalescer
 from settings_manager.ui.setting_widgets import create_setting_widget
 
 
 Row = namedtuple('Row', 'label widget null')
 
 
+def _disconnect(callbacks):
+    # type: (list[callable]) -> None
+    """ Calls the callbacks in reverse order, removing them """
+    while callbacks:
+        callbacks.pop()()
+
+
 class SettingsViewer(QtWidgets.QDialog):
     """
     Default widget for the settings object.
@@ -23,11 +34,29 @@ class SettingsViewer(QtWidgets.QDialog):
            added labelled 'None'. Checking this will disable the widget, and any
            child widgets.
 
-    Settings are added in sorted order. SettingsViewer will respect the 'parent'
-    property of settings, and recursively enable / disable dependent setting
-    widgets whenever a value is changed.
+    Settings are added in sorted order. Rows are enabled and shown according
+    to the enabled_if and visible_if properties of the settings, see
+    settings_manager.conditions. When values change, only the conditions
+    that depend on them are evaluated, once per batch of changes.
+
+    settingChanged is emitted for every change made by the viewer.
+    settingsChanged emits the settings changed within coalesce_interval
+    milliseconds as one list, which is cheaper to handle while a value is
+    being dragged, and includes values set outside the viewer. Row appearance
+    and conditions are updated once per batch.
+
+    Changes to the settings are recorded in a History, undone and redone by
+    the undo_action and redo_action, which use the standard shortcuts. The
+    history is discarded when the dialog is closed or deleted.
     """
     settingChanged = QtCore.Signal(object)  # Setting
+    settingsChanged = QtCore.Signal(list)  # list[Setting]
+    # Milliseconds to collect changes for settingsChanged, 0 is once per frame
+    coalesce_interval = 0
+    # Milliseconds without changes to the filter text before filtering
+    filter_delay = 200
+    # Maximum number of changes to undo, 0 disables undo
+    history_steps = 100
 
     @classmethod
     def launch(cls, settings, parent=None):
@@ -50,6 +79,36 @@ class SettingsViewer(QtWidgets.QDialog):
         super(SettingsViewer, self).__init__(parent)
         self._rows = {}
         self._settings = settings
+        # Setting names, labels and tooltips for set_filter_text
+        self._search_index = SearchIndex()
+        self._filter_text = ''
+        self._filtered = set()  # Names of the rows hidden by the filter
+        self._conditions = None  # type: ConditionGraph
+        self._condition_hidden = set()  # Names of the rows hidden by conditions
+
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.timeout.connect(self._apply_filter)
+
+        self._coalescer = ChangeCoalescer(self.coalesce_interval, self)
+        self._coalescer.settingsChanged.connect(self._on_settings_changed)
+
+        self._history = None  # type: History
+        self._observed = None  # type: SettingsGroup
+        # Undo the viewer's observation of the settings, see _observe_settings.
+        # They don't reference the viewer's C++ object, so can be called once
+        # it's deleted.
+        self._disconnect_callbacks = []
+        self.destroyed.connect(partial(_disconnect, self._disconnect_callbacks))
+        self._undo_action = QtWidgets.QAction('Undo', self)
+        self._undo_action.setShortcut(QtGui.QKeySequence.Undo)
+        self._undo_action.setEnabled(False)
+        self._undo_action.triggered.connect(self.undo)
+        self._redo_action = QtWidgets.QAction('Redo', self)
+        self._redo_action.setShortcut(QtGui.QKeySequence.Redo)
+        self._redo_action.setEnabled(False)
+        self._redo_action.triggered.connect(self.redo)
+        self.addActions([self._undo_action, self._redo_action])
 
         # Stretch the widgets rather than the labels
         layout = QtWidgets.QGridLayout()
@@ -59,18 +118,41 @@ class SettingsViewer(QtWidgets.QDialog):
         if self._settings is not None:
             self.rebuild_layout(self._settings)
 
+    @property
+    def history(self):
+        # type: () -> History
+        """ History of the settings' changes, None if undo is disabled """
+        return self._history
+
+    @property
+    def redo_action(self):
+        # type: () -> QtWidgets.QAction
+        return self._redo_action
+
     @property
     def settings(self):
         # type: () -> SettingsGroup
         return self._settings
 
+    @property
+    def undo_action(self):
+        # type: () -> QtWidgets.QAction
+        return self._undo_action
+
     def clear(self):
+        self._coalescer.flush()
         layout = self.layout()
+        self._search_index.clear()
+        self._filtered.clear()
+        self._conditions = None
+        self._condition_hidden.clear()
         while self._rows:
             name, row = self._rows.popitem()
             for widget in row:
                 if widget:
                     layout.removeWidget(widget)
+                    # Removing from the layout leaves it parented and visible
+                    widget.setParent(None)
 
     def get_row(self, setting):
         # type: (Setting|str) -> Row
@@ -86,6 +168,7 @@ class SettingsViewer(QtWidgets.QDialog):
         build_settings = build_settings or tuple(settings)
         layout = self.layout()
         self._settings = settings
+        self._observe_settings(settings)
 
         # Count instead of enumerate to avoid invalid rows when skipping
         row = 0
@@ -118,9 +201,48 @@ class SettingsViewer(QtWidgets.QDialog):
                 )
                 layout.addWidget(null_checkbox, row, 2)
 
-            self._rows[name] = Row(label, widget, null_checkbox)
+            self._rows[setting.name] = Row(label, widget, null_checkbox)
+            self._search_index.add(setting.name, setting.name,
+                                   setting.property('label'),
+                                   setting.property('tooltip'))
             row += 1
 
+        conditions = ConditionGraph(settings)
+        if conditions:
+            self._conditions = conditions
+            self._apply_conditions(conditions.update())
+        if self._filter_text:
+            self._apply_filter()
+
+    def done(self, result):
+        # type: (int) -> None
+        """ Stops observing the settings, see QDialog.done """
+        self._stop_observing()
+        super(SettingsViewer, self).done(result)
+
+    def filter_text(self):
+        # type: () -> str
+        return self._filter_text
+
+    def flush_changes(self):
+        """ Emits settingsChanged for any pending changes immediately """
+        self._coalescer.flush()
+
+    def redo(self):
+        # type: () -> list[str]
+        """ Redoes the last undone change, see History.redo """
+        if self._history is None:
+            return []
+        names = self._history.redo()
+        self._update_widgets(names)
+        return names
+
+    def showEvent(self, event):
+        # Observing stops when the dialog is closed, see done()
+        if self._settings is not None:
+            self._observe_settings(self._settings)
+        super(SettingsViewer, self).showEvent(event)
+
     def set_setting_modified(self, setting, modified):
         # type: (Setting, bool) -> None
         """ Updates the row to appear different when modified from default """
@@ -129,6 +251,16 @@ class SettingsViewer(QtWidgets.QDialog):
         font.setBold(modified)
         row.label.setFont(font)
 
+    def set_setting_enabled(self, setting, enabled):
+        # type: (Setting|str, bool) -> None
+        """ Enables or disables the row. A None value keeps the widget disabled. """
+        row = self.get_row(setting)
+        row.label.setEnabled(enabled)
+        if row.null:
+            row.null.setEnabled(enabled)
+            enabled = enabled and not row.null.isChecked()
+        row.widget.setEnabled(enabled)
+
     def set_setting_hidden(self, setting, hidden):
         # type: (Setting|str, bool) -> None
         # Get the row and hide/show each widget
@@ -138,6 +270,21 @@ class SettingsViewer(QtWidgets.QDialog):
             if widget:
                 getattr(widget, method)()
 
+    def set_filter_text(self, text, delay=None):
+        # type: (str, int) -> None
+        """
+        Only shows the rows whose setting name, label or tooltip contains
+        text. Filtering happens after delay milliseconds, defaults to
+        filter_delay, and each call restarts the delay.
+        """
+        self._filter_text = text
+        delay = self.filter_delay if delay is None else delay
+        if delay > 0:
+            self._filter_timer.start(delay)
+        else:
+            self._filter_timer.stop()
+            self._apply_filter()
+
     def set_setting_none(self, setting, is_none):
         # type: (Setting|str, bool) -> bool
         row = self.get_row(setting)
@@ -147,18 +294,138 @@ class SettingsViewer(QtWidgets.QDialog):
         row.null.setCheckState(state)
         return True
 
+    def undo(self):
+        # type: () -> list[str]
+        """ Undoes the last change, see History.undo """
+        if self._history is None:
+            return []
+        names = self._history.undo()
+        self._update_widgets(names)
+        return names
+
+    # ======================================================================== #
+    #                                PROTECTED                                 #
+    # ======================================================================== #
+
+    def _apply_conditions(self, states):
+        # type: (dict[str, State]) -> None
+        """ Applies the changed states from ConditionGraph.update as one update """
+        states = dict((name, state) for name, state in states.items()
+                      if name in self._rows)
+        if not states:
+            return
+        matches = None
+        self.setUpdatesEnabled(False)
+        try:
+            for name, state in states.items():
+                self.set_setting_enabled(name, state.enabled)
+                if not state.visible:
+                    self._condition_hidden.add(name)
+                    self.set_setting_hidden(name, True)
+                elif name in self._condition_hidden:
+                    self._condition_hidden.discard(name)
+                    # Shown unless the filter would have hidden it
+                    if self._filter_text:
+                        if matches is None:
+                            matches = self._search_index.search(self._filter_text)
+                        if name not in matches:
+                            self._filtered.add(name)
+                            continue
+                    self.set_setting_hidden(name, False)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _apply_filter(self):
+        # Only rows whose visibility changes are modified. Rows that were
+        # already hidden by set_setting_hidden are left alone.
+        matches = self._search_index.search(self._filter_text)
+        for name in self._filtered & matches:
+            if name not in self._condition_hidden:
+                self.set_setting_hidden(name, False)
+        self._filtered -= matches
+        for name in set(self._rows) - matches - self._filtered:
+            if not self._rows[name].label.isHidden():
+                self.set_setting_hidden(name, True)
+                self._filtered.add(name)
+
+    def _observe_settings(self, settings):
+        # type: (SettingsGroup) -> None
+        """
+        Records the changes to settings and updates the rows for values set
+        outside the viewer. Keeps the history if settings are unchanged.
+        """
+        if settings is self._observed:
+            return
+        self._stop_observing()
+        self._observed = settings
+        settings.add_observer(self._on_value_changed)
+        self._disconnect_callbacks.append(
+            partial(settings.remove_observer, self._on_value_changed))
+        if self.history_steps > 0:
+            history = History(settings, max_steps=self.history_steps)
+            self._disconnect_callbacks.append(history.close)
+            history.add_listener(self._on_history_changed)
+            # Called first, closing the history notifies its listeners
+            self._disconnect_callbacks.append(
+                partial(history.remove_listener, self._on_history_changed))
+            self._history = history
+        self._on_history_changed()
+
+    def _stop_observing(self):
+        _disconnect(self._disconnect_callbacks)
+        self._observed = None
+        self._history = None
+        self._on_history_changed()
+
+    def _update_widgets(self, names):
+        # type: (list[str]) -> None
+        """ Shows the values of settings that were set outside the widgets """
+        for name in names:
+            setting = self._settings.setting(name)
+            row = self._rows.get(name)
+            if row is not None:
+                value = setting.get()
+                if value is not None:
+                    row.widget.setValue(value)
+                self.set_setting_none(name, value is None)
+            self._on_setting_changed(setting)
+
     # ======================================================================== #
     #                                  SLOTS                                   #
     # ======================================================================== #
 
+    def _on_history_changed(self):
+        history = self._history
+        self._undo_action.setEnabled(history is not None and history.can_undo())
+        self._redo_action.setEnabled(history is not None and history.can_redo())
+
     def _on_none_checkbox_checked(self, setting, state):
         # type:(Setting, QtCore.Qt.CheckState) -> None
         row = self._rows[setting]
-        is_none = state == QtCore.Qt.Checked
+        # PySide6 emits the state as an int, which doesn't compare equal to
+        # the enum
+        is_none = row.null.isChecked()
         row.widget.setNone(is_none)
+        if self._conditions is not None and not self._conditions.state(setting.name).enabled:
+            row.widget.setEnabled(False)
         self._on_setting_changed(setting)
 
     def _on_setting_changed(self, setting):
         # type: (Setting) -> None
-        self.set_setting_modified(setting, setting.is_modified())
+        self._coalescer.add(setting)
         self.settingChanged.emit(setting)
+
+    def _on_value_changed(self, change):
+        # type: (SettingChange) -> None
+        # Includes the viewer's changes, which the coalescer only adds once
+        self._coalescer.add(self._observed.setting(change.name))
+
+    def _on_settings_changed(self, settings):
+        # type: (list[Setting]) -> None
+        for setting in settings:
+            if setting.name in self._rows:
+                self.set_setting_modified(setting, setting.is_modified())
+        if self._conditions is not None:
+            self._apply_conditions(
+                self._conditions.update(setting.name for setting in settings))
+        self.settingsChanged.emit(settings)
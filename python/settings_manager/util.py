@@ -1,6 +1,6 @@
 from collections import OrderedDict
 import argparse
-import inspect
+import importlib
 import sys
 
 
@@ -45,6 +45,7 @@ def class_from_string(string):
             mod_name, cls_name = parts
             mod = sys.modules.get(mod_name)
             if mod is not None:
+                import inspect
                 cls = getattr(mod, cls_name, None)
                 # Make sure the object is a class, not an instance
                 if not inspect.isclass(cls):
@@ -52,6 +53,111 @@ def class_from_string(string):
     return cls
 
 
+class _Mapping(tuple):
+    """ Sorted items of a dict, see _canonical """
+
+
+class _Set(tuple):
+    """ Sorted members of a set, see _canonical """
+
+
+def _canonical(obj):
+    # type: (object) -> object
+    """
+    Returns obj with equal values made identical for pickling: dicts and sets
+    are sorted, and numbers that compare equal, eg, True, 1 and 1.0, or 0.0
+    and -0.0, are the same int.
+    """
+    cls = type(obj)
+    if cls is bool:
+        return int(obj)
+    if cls is float:
+        return int(obj) if obj.is_integer() else obj
+    if isinstance(obj, dict):
+        items = [(_canonical(k), _canonical(v)) for k, v in obj.items()]
+        return _Mapping(sorted(items, key=lambda item: _pickled(item[0])))
+    if isinstance(obj, (set, frozenset)):
+        return _Set(sorted((_canonical(m) for m in obj), key=_pickled))
+    if cls is list:
+        return [_canonical(item) for item in obj]
+    if cls is tuple:
+        return tuple(_canonical(item) for item in obj)
+    return obj
+
+
+def _pickled(obj):
+    # type: (object) -> bytes
+    import io
+    import pickle
+    stream = io.BytesIO()
+    pickler = pickle.Pickler(stream, 2)
+    pickler.fast = True
+    pickler.dump(obj)
+    return stream.getvalue()
+
+
+def digest(obj):
+    # type: (object) -> bytes
+    """
+    Returns a sha1 digest of the pickled object that is the same in every
+    process, eg, for cache keys. Unlike pickle.dumps, shared references are
+    not memoised, and values that compare equal have the same digest, eg,
+    dicts with their keys in a different order, sets, and True and 1.
+
+    :raise: pickle.PicklingError, TypeError or AttributeError if the object
+            can't be pickled. Recursive objects are not supported.
+    """
+    import hashlib
+    return hashlib.sha1(_pickled(_canonical(obj))).digest()
+
+
+def lazy_attributes(module_globals, attributes):
+    """
+    Defers importing a module's attributes until they are first accessed
+    (PEP 562), so that importing a package doesn't import every submodule and
+    their dependencies, eg, Qt. Python versions before 3.7 don't support
+    module __getattr__ and import the attributes immediately.
+
+    eg, in a package __init__.py
+
+    >>> _load = lazy_attributes(globals(), {
+    ...     'SettingsViewer': 'settings_manager.ui.settings_viewer',
+    ... })
+
+    :param dict module_globals: globals() of the module to add attributes to
+    :param dict attributes:     {attribute_name: module_path} to import from
+    :rtype: function
+    :return: Function returning an attribute by name, importing it if needed
+    """
+    module_name = module_globals['__name__']
+
+    def __getattr__(name):
+        module_path = attributes.get(name)
+        if module_path is None:
+            raise AttributeError(
+                'module {!r} has no attribute {!r}'.format(module_name, name))
+        value = getattr(importlib.import_module(module_path), name)
+        module_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(module_globals) | set(attributes))
+
+    def load(name):
+        try:
+            return module_globals[name]
+        except KeyError:
+            return __getattr__(name)
+
+    if sys.version_info < (3, 7):
+        for attribute in attributes:
+            __getattr__(attribute)
+    else:
+        module_globals['__getattr__'] = __getattr__
+        module_globals['__dir__'] = __dir__
+    return load
+
+
 def object_to_string(value):
     # type: (object) -> str
     """ Converts unknown objects to strings """
@@ -0,0 +1,127 @@
+"""
+Asynchronous change streams for SettingsGroup (python 3 only).
+"""
+from collections import OrderedDict
+import asyncio
+import threading
+
+from settings_manager.setting import SettingChange
+
+
+# Python 3.7+, get_event_loop is deprecated outside a running loop
+_get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class ChangeStream(object):
+    """
+    Asynchronous iterator of the SettingChanges made to a SettingsGroup,
+    created with SettingsGroup.watch().
+
+    Writers calling set() are never blocked by the consumer. Changes are
+    buffered per setting, a setting that changes again before the consumer
+    has read it is merged into a single change from the first old value to
+    the latest value, or discarded if it has changed back. If more than
+    maxsize settings have pending changes the oldest is discarded and
+    counted in dropped, so a slow consumer always sees the latest value for
+    each setting it is sent.
+
+    set() may be called from any thread, changes are delivered to the event
+    loop the stream is iterated in.
+
+    eg,
+
+    >>> async def log_changes(settings):
+    ...     async with settings.watch(['max_count']) as stream:
+    ...         async for change in stream:
+    ...             print(change.name, change.old_value, change.value)
+    """
+
+    def __init__(self, group, keys=None, maxsize=1024, loop=None):
+        """
+        :param SettingsGroup        group:
+        :param list[str]            keys:       Restricts changes to keys if
+                                                given.
+        :param int                  maxsize:    Maximum number of settings
+                                                with pending changes.
+        :param asyncio.AbstractEventLoop loop:  Loop the consumer runs in,
+                                                defaults to the loop running
+                                                when it's first iterated.
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1: {}'.format(maxsize))
+        self._group = group
+        self._loop = loop
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # type: OrderedDict[str, SettingChange]
+        self._waiter = None  # type: asyncio.Future
+        self._closed = False
+        self.dropped = 0
+        group.add_observer(self._on_change, keys=keys)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            with self._lock:
+                if self._pending:
+                    return self._pending.popitem(last=False)[1]
+                if self._closed:
+                    raise StopAsyncIteration
+                if self._loop is None:
+                    self._loop = _get_running_loop()
+                self._waiter = self._loop.create_future()
+                waiter = self._waiter
+            await waiter
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stops receiving changes. Iteration ends once the pending changes have
+        been consumed.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            waiter, self._waiter = self._waiter, None
+        self._group.remove_observer(self._on_change)
+        self._wake(waiter)
+
+    def pending(self):
+        # type: () -> int
+        """ Number of settings with changes waiting to be consumed """
+        return len(self._pending)
+
+    def _on_change(self, change):
+        # type: (SettingChange) -> None
+        with self._lock:
+            previous = self._pending.get(change.name)
+            if previous is not None:
+                # A value changed back before being consumed is not a change
+                if change.value == previous.old_value:
+                    del self._pending[change.name]
+                    return
+                change = change._replace(old_value=previous.old_value)
+            elif len(self._pending) >= self._maxsize:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[change.name] = change
+            waiter, self._waiter = self._waiter, None
+        self._wake(waiter)
+
+    def _wake(self, waiter):
+        # type: (asyncio.Future) -> None
+        if waiter is None:
+            return
+        # The writer may be on another thread to the loop
+        def set_result():
+            if not waiter.done():
+                waiter.set_result(None)
+        self._loop.call_soon_threadsafe(set_result)
@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager import autoreload
+from settings_manager.autoreload import AutoReloader
+from settings_manager.exceptions import SettingsError
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+def write(path, data):
+    # Replaced like an editor would, with a new inode and modification time
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.rename(temp_path, path)
+
+
+@pytest.fixture
+def settings_file(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup([
+        {'samples': {'default': 4, 'minmax': (1, 64)}},
+        {'renderer': {'default': 'arnold', 'choices': ['arnold', 'redshift']}},
+        {'output': '/tmp'},
+    ])
+    with open(path, 'w') as f:
+        f.write(group.to_json())
+    return path
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_reload_changes(settings_file):
+    group = SettingsGroup.from_json(settings_file)
+    reloader = AutoReloader(group, settings_file)
+    changes = []
+    group.add_observer(changes.append)
+    assert reloader.check() == []
+
+    data = read(settings_file)
+    data['samples']['value'] = 16
+    data['renderer']['label'] = 'Render engine'
+    write(settings_file, data)
+    assert reloader.check() == ['samples', 'renderer']
+    assert group.get('samples') == 16
+    assert group.setting('renderer').property('label') == 'Render engine'
+    assert [(c.name, c.value) for c in changes] == [('samples', 16)]
+
+    # Unmodified contents aren't applied
+    write(settings_file, data)
+    assert reloader.check() == []
+    assert len(changes) == 1
+
+
+def test_runtime_overrides(settings_file):
+    group = SettingsGroup.from_json(settings_file)
+    reloader = AutoReloader(group, settings_file)
+    group.set('samples', 32)
+    group.setting('renderer').set_property('label', 'Renderer')
+
+    data = read(settings_file)
+    data['output']['value'] = '/jobs'
+    data['renderer']['default'] = 'redshift'
+    data['renderer']['value'] = 'redshift'
+    write(settings_file, data)
+    assert sorted(reloader.check()) == ['output', 'renderer']
+    assert group.get('samples') == 32
+    assert group.get('renderer') == 'redshift'
+    assert group.setting('renderer').property('label') == 'Renderer'
+
+    # Hand written entries without values follow the default
+    data['output'] = {'default': '/other', 'data_type': 'str'}
+    data['extra'] = 2
+    write(settings_file, data)
+    assert sorted(reloader.check()) == ['extra', 'output']
+    assert group.get('output') == '/jobs'
+    assert group.get('extra') == 2
+
+
+def test_default_changes(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    write(path, {'samples': 4, 'threads': 8})
+    group = SettingsGroup.from_json(path)
+    reloader = AutoReloader(group, path)
+    group.set('threads', 16)
+    write(path, {'samples': 8, 'threads': 2})
+    reloader.check()
+    assert group.get('samples') == 8
+    assert group.get('threads') == 16
+    assert group.setting('threads').property('default') == 2
+
+
+def test_invalid_file(settings_file):
+    group = SettingsGroup.from_json(settings_file)
+    reloader = AutoReloader(group, settings_file)
+    with open(settings_file, 'w') as f:
+        f.write('{"samples": ')
+    with pytest.raises(SettingsError):
+        reloader.check()
+    # Not read again until it's modified
+    assert reloader.check() == []
+
+    data = json.loads(group.to_json())
+    data['samples']['data_type'] = 'str'
+    write(settings_file, data)
+    with pytest.raises(SettingsError):
+        reloader.check()
+    data['samples']['data_type'] = 'int'
+    data['samples']['value'] = 100
+    write(settings_file, data)
+    with pytest.raises(SettingsError):
+        reloader.check()
+    assert group.get('samples') == 4
+
+
+def test_invalid_entries_change_nothing(settings_file):
+    group = SettingsGroup.from_json(settings_file)
+    reloader = AutoReloader(group, settings_file)
+    group.set('renderer', 'redshift')
+    original = read(settings_file)
+
+    # The label is valid but the value doesn't suit the new choices, and
+    # the second entry is valid but the third isn't
+    data = read(settings_file)
+    data['renderer']['label'] = 'Engine'
+    data['renderer']['choices'] = ['arnold', 'cycles']
+    write(settings_file, data)
+    with pytest.raises(SettingsError):
+        reloader.check()
+    assert group.setting('renderer').property('label') == 'renderer'
+    assert group.setting('renderer').property('choices') == ['arnold', 'redshift']
+
+    data = read(settings_file)
+    data['output']['label'] = 'Output'
+    data['samples']['minmax'] = [1, 2]
+    write(settings_file, data)
+    with pytest.raises(SettingsError):
+        reloader.check()
+    assert group.setting('output').property('label') == 'output'
+    assert group.get('samples') == 4
+
+    # Properties are restored when the batch fails
+    group.add_constraint(lambda v: v['samples'] < 8, 'samples < 8')
+    data = read(settings_file)
+    data['samples']['label'] = 'Samples'
+    data['samples']['value'] = 16
+    write(settings_file, data)
+    with pytest.raises(SettingsError):
+        reloader.check()
+    assert group.setting('samples').property('label') == 'samples'
+    assert group.get('samples') == 4
+
+    write(settings_file, original)
+    reloader.check()
+
+
+def test_type_changes(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    write(path, {'paths': ['a'], 'samples': 4})
+    group = SettingsGroup.from_json(path)
+    reloader = AutoReloader(group, path)
+    for data in ({'paths': [1], 'samples': 4},
+                 {'paths': {'default': [], 'subtype': 'int'}, 'samples': 4},
+                 {'paths': ['a'], 'samples': 4.5}):
+        write(path, data)
+        with pytest.raises(SettingsError):
+            reloader.check()
+    assert group.get('paths') == ['a']
+    assert group.get('samples') == 4
+
+
+def test_removed_properties_are_reset(settings_file):
+    group = SettingsGroup.from_json(settings_file)
+    data = read(settings_file)
+    data['renderer']['label'] = 'Engine'
+    data['renderer']['tooltip'] = 'Renderer to use'
+    write(settings_file, data)
+    reloader = AutoReloader(group, settings_file)
+    assert group.setting('renderer').property('label') == 'Engine'
+
+    del data['renderer']['label']
+    del data['renderer']['tooltip']
+    del data['renderer']['choices']
+    write(settings_file, data)
+    assert reloader.check() == ['renderer']
+    setting = group.setting('renderer')
+    assert setting.property('label') == 'renderer'
+    assert setting.property('tooltip') == ''
+    assert setting.property('choices') is None
+
+
+def test_background_thread(settings_file, monkeypatch):
+    monkeypatch.setattr(autoreload, 'inotify_simple', None)
+    group = ThreadSafeSettingsGroup.from_json(settings_file)
+    reloader = AutoReloader(group, settings_file, interval=0.01)
+    changed = threading.Event()
+    group.add_observer(lambda change: changed.set())
+    reloader.start()
+    try:
+        data = read(settings_file)
+        data['samples']['value'] = 8
+        write(settings_file, data)
+        assert changed.wait(5)
+        assert group.get('samples') == 8
+    finally:
+        reloader.stop(timeout=5)
+    assert reloader._thread is None
+
+    errors = []
+    reloader = AutoReloader(group, settings_file, interval=0.01, on_error=errors.append)
+    reloader.start()
+    try:
+        with open(settings_file, 'w') as f:
+            f.write('invalid')
+        for _ in range(500):
+            if errors:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        reloader.stop(timeout=5)
+    assert isinstance(errors[0], SettingsError)
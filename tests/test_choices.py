@@ -0,0 +1,187 @@
+import pickle
+import threading
+
+import pytest
+
+from settings_manager import Setting
+from settings_manager.choices import ChoicesProvider, freeze_choices
+from settings_manager.exceptions import SettingsError
+
+
+class Source(object):
+    """ Counts calls and returns the current choices """
+    def __init__(self, choices):
+        self.choices = choices
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.choices
+
+
+def renderers():
+    return ['arnold', 'redshift']
+
+
+def test_provider_caches():
+    source = Source(['a', 'b'])
+    provider = ChoicesProvider(source)
+    assert provider.is_stale()
+    assert provider.choices() == ['a', 'b']
+    assert provider.choice_set() == frozenset(['a', 'b'])
+    provider.choices()
+    assert source.calls == 1
+    assert not provider.is_stale()
+
+
+def test_provider_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('settings_manager.choices._clock', lambda: now[0])
+    source = Source(['a'])
+    provider = ChoicesProvider(source, ttl=10)
+    provider.choices()
+    now[0] += 5
+    provider.choices()
+    assert source.calls == 1
+    now[0] += 10
+    source.choices = ['b']
+    assert provider.choices() == ['b']
+    assert source.calls == 2
+
+
+def test_provider_stale_while_revalidate(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('settings_manager.choices._clock', lambda: now[0])
+    release = threading.Event()
+    source = Source(['a'])
+
+    def slow():
+        if source.calls:
+            release.wait(5)
+        return source()
+
+    provider = ChoicesProvider(slow, ttl=10, stale_while_revalidate=True)
+    changed = []
+    provider.add_listener(lambda: changed.append(provider.choices()))
+    provider.choices()
+
+    now[0] += 20
+    source.choices = ['a', 'b']
+    # The stale choices are returned while the refresh runs
+    assert provider.choices() == ['a']
+    assert provider.choices() == ['a']
+    release.set()
+    provider.wait(5)
+    assert source.calls == 2
+    assert provider.choices() == ['a', 'b']
+    assert changed == [['a', 'b']]
+
+
+def test_provider_refresh_error():
+    available = [True]
+
+    def query():
+        if not available[0]:
+            raise IOError('Database unavailable')
+        return ['a']
+
+    provider = ChoicesProvider(query)
+    provider.choices()
+    available[0] = False
+    provider.refresh(wait=False)
+    provider.wait(5)
+    assert isinstance(provider.error, IOError)
+    assert provider.choices() == ['a']
+
+
+def test_provider_listeners():
+    class Widget(object):
+        def __init__(self):
+            self.calls = 0
+
+        def on_choices(self):
+            self.calls += 1
+
+    source = Source(['a'])
+    provider = ChoicesProvider(source)
+    provider.choices()
+    widget = Widget()
+    provider.add_listener(widget.on_choices)
+
+    provider.refresh()  # Unchanged choices don't notify
+    source.choices = ['b']
+    provider.invalidate()
+    assert provider.choices() == ['b']
+    assert widget.calls == 1
+
+    provider.remove_listener(widget.on_choices)
+    with pytest.raises(ValueError):
+        provider.remove_listener(widget.on_choices)
+
+    # Bound methods are weakly referenced
+    provider.add_listener(widget.on_choices)
+    del widget
+    source.choices = ['c']
+    provider.refresh()
+    assert not provider._listeners
+
+
+def test_freeze_choices():
+    assert freeze_choices([1, 2]) == frozenset([1, 2])
+    unhashable = [[1], [2]]
+    assert freeze_choices(unhashable) is unhashable
+
+
+def test_setting_with_provider():
+    source = Source(['arnold', 'redshift'])
+    s = Setting('renderer', 'arnold', choices=source)
+    provider = s.choices_provider()
+    assert isinstance(provider, ChoicesProvider)
+    assert s.property('choices') == ['arnold', 'redshift']
+    s.set('redshift')
+    with pytest.raises(SettingsError):
+        s.set('cycles')
+
+    source.choices = ['cycles']
+    provider.refresh()
+    s.set('cycles')
+    assert source.calls == 2
+
+    # Copies share the provider and its cache
+    assert s.copy().choices_provider() is provider
+    assert Setting('renderer', 'cycles', choices=provider).choices_provider() is provider
+    assert Setting('renderer', [], choices=source, minmax=(0, 1)).type is list
+
+
+def test_setting_provider_not_called_on_init():
+    source = Source(['arnold', 'redshift'])
+    provider = ChoicesProvider(source)
+    s = Setting('renderer', 'arnold', choices=provider)
+    multi = Setting('renderers', ['arnold'], choices=provider, minmax=(1, 2))
+    assert source.calls == 0
+    # Values are checked once the choices are computed
+    with pytest.raises(SettingsError):
+        s.set('cycles')
+    assert source.calls == 1
+    with pytest.raises(SettingsError):
+        multi.set(['cycles'])
+    # A default that isn't a choice is rejected once they're cached
+    with pytest.raises(SettingsError):
+        Setting('renderer', 'cycles', choices=provider)
+    assert source.calls == 1
+
+
+def test_setting_provider_infers_type():
+    s = Setting('frame', None, choices=lambda: [1001, 1002])
+    assert s.type is int
+    s = Setting('frames', [], choices=lambda: [1001, 1002])
+    assert s.subtype is int
+    assert s.property('minmax') == (0, 2)
+
+
+def test_setting_provider_pickle():
+    s = Setting('renderer', 'arnold', choices=renderers)
+    copied = pickle.loads(pickle.dumps(s))
+    assert copied.get() == 'arnold'
+    assert copied.choices_provider().func is renderers
+    assert copied.property('choices') == ['arnold', 'redshift']
@@ -0,0 +1,86 @@
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager.conditions import ConditionGraph, State
+from settings_manager.exceptions import SettingsError
+
+
+class Counter(object):
+    """ Counts calls to a condition """
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, values):
+        self.calls += 1
+        return self.func(values)
+
+
+@pytest.fixture
+def settings():
+    return SettingsGroup([
+        {'renderer': {'default': 'arnold', 'choices': ['arnold', 'redshift']}},
+        {'use_proxy': False},
+        {'proxy_width': {'default': 960, 'enabled_if': 'use_proxy'}},
+        {'proxy_filter': {'default': 'box', 'enabled_if': 'proxy_width'}},
+        {'denoiser': {'default': 'oidn', 'visible_if': {'renderer': 'arnold'}}},
+        {'samples': 4},
+    ])
+
+
+def test_initial_states(settings):
+    graph = ConditionGraph(settings)
+    assert len(graph) == 3
+    assert 'samples' not in graph
+    states = graph.update()
+    assert states == {
+        'proxy_width': State(False, True),
+        # Disabled by proxy_width, although its own condition is true
+        'proxy_filter': State(False, True),
+        'denoiser': State(True, True),
+    }
+    assert graph.state('samples') == State(True, True)
+
+
+def test_update_affected_only(settings):
+    counter = Counter(lambda v: v['samples'] > 2)
+    settings.setting('denoiser').set_property('enabled_if', counter)
+    graph = ConditionGraph(settings)
+    graph.update()
+    assert counter.calls == 1
+
+    assert graph.update(['use_proxy', 'proxy_filter']) == {}
+    settings.set('use_proxy', True)
+    assert graph.update(['use_proxy']) == {
+        'proxy_width': State(True, True), 'proxy_filter': State(True, True)}
+    assert counter.calls == 1
+
+    settings.set('renderer', 'redshift')
+    settings.set('samples', 1)
+    assert graph.update(['renderer', 'samples']) == {'denoiser': State(False, False)}
+    assert counter.calls == 2
+
+
+def test_dynamic_dependencies():
+    settings = SettingsGroup([('mode', 'a'), ('a', True), ('b', False),
+                              {'value': {'default': 1, 'enabled_if': lambda v: v[v['mode']]}}])
+    graph = ConditionGraph(settings)
+    assert graph.update()['value'].enabled
+    assert graph.update(['b']) == {}
+    settings.set('mode', 'b')
+    assert graph.update(['mode']) == {'value': State(False, True)}
+    settings.set('b', True)
+    assert graph.update(['b']) == {'value': State(True, True)}
+
+
+def test_circular_conditions():
+    settings = SettingsGroup([{'a': {'default': True, 'enabled_if': 'b'}},
+                              {'b': {'default': True, 'enabled_if': 'a'}}])
+    with pytest.raises(SettingsError):
+        ConditionGraph(settings).update()
+
+
+def test_invalid_condition():
+    settings = SettingsGroup([{'a': {'default': True, 'enabled_if': 1}}])
+    with pytest.raises(SettingsError):
+        ConditionGraph(settings)
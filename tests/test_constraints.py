@@ -0,0 +1,200 @@
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager.constraints import Constraint, less_equal, sum_equal
+from settings_manager.exceptions import SettingsError
+from settings_manager.schema import Schema
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+DEFINITION = [
+    ('min_samples', 4),
+    ('max_samples', 16),
+    ('diffuse', 0.5),
+    ('specular', 0.5),
+    ('label', 'beauty'),
+]
+
+
+def test_add_constraint():
+    group = SettingsGroup(DEFINITION)
+    constraint = group.add_constraint(less_equal('min_samples', 'max_samples'))
+    assert constraint.dependencies == frozenset(['min_samples', 'max_samples'])
+    group.set('min_samples', 8)
+    with pytest.raises(SettingsError):
+        group.set('min_samples', 32)
+    assert group.get('min_samples') == 8
+    with pytest.raises(SettingsError):
+        group.set('max_samples', 2)
+    assert group.get('max_samples') == 16
+
+    # Setting objects are validated by the group's constraints
+    with pytest.raises(SettingsError):
+        group.setting('min_samples').set(32)
+
+    with pytest.raises(SettingsError):
+        group.add_constraint(lambda v: v['min_samples'] > 100)
+    with pytest.raises(SettingsError):
+        group.add_constraint(lambda v: v['missing'])
+    assert len(group._constraints) == 1
+
+
+def test_function_constraint():
+    group = SettingsGroup(DEFINITION)
+    group.add_constraint(lambda v: v['max_samples'] % v['min_samples'] == 0,
+                         'max_samples must be a multiple of min_samples')
+    group.set('max_samples', 8)
+    with pytest.raises(SettingsError) as info:
+        group.set('max_samples', 10)
+    assert 'multiple of min_samples' in str(info.value)
+
+    group.add_constraint(sum_equal(['diffuse', 'specular'], 1.0))
+    with pytest.raises(SettingsError):
+        group.set('diffuse', 0.7)
+
+
+def test_only_checks_affected_constraints():
+    group = SettingsGroup(DEFINITION)
+    calls = []
+
+    def check(values):
+        calls.append(1)
+        return values['min_samples'] <= values['max_samples']
+
+    group.add_constraint(check)
+    del calls[:]
+    group.set('label', 'depth')
+    group.set('diffuse', 0.1)
+    assert not calls
+    group.set('min_samples', 2)
+    assert len(calls) == 1
+
+
+def test_dynamic_dependencies():
+    group = SettingsGroup([('enabled', 'no'), ('low', 1), ('high', 2)])
+    constraint = group.add_constraint(
+        lambda v: v['enabled'] == 'no' or v['low'] <= v['high'])
+    assert constraint.dependencies == frozenset(['enabled'])
+    group.set('low', 5)
+    with pytest.raises(SettingsError):
+        group.set('enabled', 'yes')
+    group.set('low', 1)
+    group.set('enabled', 'yes')
+    assert constraint.dependencies == frozenset(['enabled', 'low', 'high'])
+    with pytest.raises(SettingsError):
+        group.set('low', 5)
+
+
+def test_remove_constraint():
+    group = SettingsGroup(DEFINITION)
+    constraint = group.add_constraint(less_equal('min_samples', 'max_samples'))
+    group.remove_constraint(constraint)
+    group.set('min_samples', 32)
+    assert not group.setting('min_samples')._validators
+    with pytest.raises(ValueError):
+        group.remove_constraint(constraint)
+
+
+def test_batch():
+    group = SettingsGroup(DEFINITION)
+    calls = []
+
+    def check(values):
+        calls.append(1)
+        return values['min_samples'] <= values['max_samples']
+
+    group.add_constraint(check)
+    del calls[:]
+    # Invalid in between, valid once both are set
+    with group.batch():
+        group.set('min_samples', 64)
+        group.set('max_samples', 128)
+        with group.batch():
+            group.set('min_samples', 32)
+    assert len(calls) == 1
+    assert group.get('min_samples') == 32
+
+    with pytest.raises(SettingsError):
+        with group.batch():
+            group.set('min_samples', 256)
+            group.set('label', 'depth')
+    assert group.get('min_samples') == 32
+    assert group.get('label') == 'depth'
+
+    with pytest.raises(ValueError):
+        with group.batch():
+            group.set('max_samples', 1)
+            raise ValueError('failed')
+    assert group.get('max_samples') == 128
+
+
+def test_reset():
+    group = SettingsGroup(DEFINITION)
+    group.add_constraint(less_equal('min_samples', 'max_samples'))
+    group.set('max_samples', 128)
+    group.set('min_samples', 64)
+    # Resetting min_samples first would break the constraint on its own
+    group.reset()
+    assert group.get('max_samples') == 16
+
+
+def test_copies():
+    group = SettingsGroup(DEFINITION)
+    group.add_constraint(less_equal('min_samples', 'max_samples'))
+    for copied in (SettingsGroup(group), ThreadSafeSettingsGroup(group),
+                   Schema.compile(group).create()):
+        assert len(copied._constraints) == 1
+        assert copied._constraints[0] is not group._constraints[0]
+        with pytest.raises(SettingsError):
+            copied.set('min_samples', 32)
+    # The original isn't validated by the copies' constraints
+    assert group.setting('min_samples')._validators == (group._check_constraints,)
+
+
+def test_threadsafe_batch():
+    group = ThreadSafeSettingsGroup(DEFINITION)
+    group.add_constraint(less_equal('min_samples', 'max_samples'))
+    with pytest.raises(SettingsError):
+        group.set('min_samples', 32)
+    assert group.get('min_samples') == 4
+
+    with group.batch():
+        group.set('min_samples', 64)
+        group.set('max_samples', 128)
+    assert group.snapshot()['min_samples'] == 64
+
+    with pytest.raises(SettingsError):
+        with group.batch():
+            group.set('max_samples', 1)
+    assert group.snapshot()['max_samples'] == 128
+    assert group.setting('max_samples').get() == 128
+
+
+def test_constraint_repr():
+    constraint = Constraint(lambda v: True, 'always')
+    assert repr(constraint) == "Constraint('always')"
+    assert less_equal('a', 'b').message == 'a <= b'
+
+
+def test_threadsafe_update_batch():
+    source = SettingsGroup([('lo', 1), ('hi', 2)])
+    source.add_constraint(less_equal('lo', 'hi'))
+    group = ThreadSafeSettingsGroup()
+    group.update(source)
+    assert group.setting('lo')._validators == (group._check_constraints,)
+    assert group.setting('lo')._groups == (group,)
+    # Valid once both are set
+    with group.batch():
+        group.set('hi', 20)
+        group.set('lo', 10)
+    assert group.snapshot()['lo'] == 10
+
+
+def test_schema_create_values():
+    group = SettingsGroup([('lo', 1), ('hi', 2)])
+    group.add_constraint(less_equal('lo', 'hi'))
+    # lo alone would break the constraint
+    created = Schema.compile(group).create({'lo': 5, 'hi': 10})
+    assert created.get('lo') == 5
+    with pytest.raises(SettingsError):
+        Schema.compile(group).create({'lo': 5})
@@ -0,0 +1,138 @@
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager.constraints import less_equal
+from settings_manager.exceptions import SettingsError
+from settings_manager.history import History
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+DEFINITION = [('min_samples', 4), ('max_samples', 16), ('label', 'beauty'),
+              ('passes', ['beauty'])]
+
+
+def test_undo_redo():
+    group = SettingsGroup(DEFINITION)
+    history = History(group, merge_interval=0)
+    assert not history.can_undo()
+    assert history.undo() == []
+
+    group.set('min_samples', 8)
+    group.set('label', 'depth')
+    assert len(history) == 2
+    assert history.undo() == ['label']
+    assert group.get('label') == 'beauty'
+    assert history.can_redo()
+    assert history.undo() == ['min_samples']
+    assert group.get('min_samples') == 4
+    assert not history.can_undo()
+
+    assert history.redo() == ['min_samples']
+    assert group.get('min_samples') == 8
+    # A new change discards the redo steps
+    group.set('max_samples', 32)
+    assert not history.can_redo()
+    assert history.redo() == []
+    assert history._value_count == 2
+
+
+def test_values_are_not_shared():
+    group = SettingsGroup(DEFINITION)
+    history = History(group)
+    group.set('passes', ['beauty', 'depth'])
+    history.undo()
+    group.setting('passes')._value.append('normal')
+    history.redo()
+    history.undo()
+    assert group.get('passes') == ['beauty']
+
+
+def test_merge(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr('settings_manager.history._clock', lambda: now[0])
+    group = SettingsGroup(DEFINITION)
+    history = History(group, merge_interval=1.0)
+    for value in range(5, 10):
+        now[0] += 0.5
+        group.set('min_samples', value)
+    assert len(history) == 1
+
+    # Changes to other settings, checkpoints and pauses aren't merged
+    group.set('label', 'depth')
+    group.set('min_samples', 10)
+    history.checkpoint()
+    group.set('min_samples', 11)
+    now[0] += 2.0
+    group.set('min_samples', 12)
+    assert len(history) == 5
+
+    history.undo()
+    history.undo()
+    history.undo()
+    history.undo()
+    assert group.get('min_samples') == 9
+    history.undo()
+    assert group.get('min_samples') == 4
+
+    # Changing a value back to the original leaves nothing to undo
+    group.set('min_samples', 5)
+    group.set('min_samples', 4)
+    assert not history.can_undo()
+
+
+def test_eviction():
+    group = SettingsGroup([('value_{}'.format(i), i) for i in range(10)])
+    history = History(group, max_steps=3, merge_interval=0)
+    for i in range(10):
+        group.set('value_{}'.format(i), -1)
+    assert len(history) == 3
+    assert history._value_count == 3
+
+    history = History(group, max_values=4, merge_interval=0)
+    with history.transaction():
+        for i in range(3):
+            group.set('value_{}'.format(i), i)
+    with history.transaction():
+        for i in range(3, 8):
+            group.set('value_{}'.format(i), i)
+    # The latest step is kept even though it holds too many values
+    assert len(history) == 1
+    history.undo()
+    assert group.get('value_7') == -1
+    assert group.get('value_0') == 0
+
+
+def test_transaction_and_constraints():
+    group = SettingsGroup(DEFINITION)
+    group.add_constraint(less_equal('min_samples', 'max_samples'))
+    history = History(group)
+    with history.transaction():
+        group.set('min_samples', 64)
+        group.set('max_samples', 128)
+        group.set('min_samples', 32)
+    assert len(history) == 1
+    # Undone and redone in a batch, as min_samples is invalid on its own
+    assert history.undo() == ['min_samples', 'max_samples']
+    assert group.get('max_samples') == 16
+    history.redo()
+    assert group.get('min_samples') == 32
+
+    # A failed batch restores the values and doesn't add a step
+    with pytest.raises(SettingsError):
+        with history.transaction():
+            group.set('min_samples', 256)
+    assert len(history) == 1
+
+
+def test_listeners_and_close():
+    group = ThreadSafeSettingsGroup(DEFINITION)
+    history = History(group)
+    calls = []
+    history.add_listener(lambda: calls.append(history.can_undo()))
+    group.set('label', 'depth')
+    history.undo()
+    assert calls == [True, False]
+    history.close()
+    group.set('label', 'normal')
+    assert not history.can_undo()
+    assert not group._observers
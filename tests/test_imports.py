@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import settings_manager
+
+# Cumulative import time of the core package in microseconds, as reported by
+# python -X importtime. This is several times the typical time so that it
+# only fails when something heavy, eg, Qt, is imported.
+IMPORT_BUDGET = 150000
+PYTHON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(settings_manager.__file__)))
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 7),
+                                reason='Requires -X importtime and PEP 562')
+
+
+def import_times(statement):
+    # type: (str) -> tuple[dict[str, int], set[str]]
+    """
+    Runs statement in a new interpreter.
+
+    :return: {module_name: cumulative_microseconds} and the loaded modules
+    """
+    script = statement + '\nimport sys\nprint("\\n".join(sys.modules))'
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=dict(os.environ, PYTHONPATH=PYTHON_PATH),
+        universal_newlines=True)
+    stdout, stderr = process.communicate()
+    assert process.returncode == 0, stderr
+
+    times = {}
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        cumulative = cumulative.strip()
+        if cumulative.isdigit():
+            times[name.strip()] = int(cumulative)
+    return times, set(stdout.split())
+
+
+def is_qt_module(name):
+    # type: (str) -> bool
+    root = name.split('.', 1)[0]
+    return root in ('Qt', 'PySide', 'PySide2', 'PySide6', 'PyQt4', 'PyQt5', 'PyQt6')
+
+
+@pytest.mark.parametrize('statement', [
+    'import settings_manager',
+    'import settings_manager.ui',
+    'import settings_manager.ui.setting_widgets',
+    'from settings_manager.ui.setting_widgets import get_default_setting_widget',
+])
+def test_import_without_qt(statement):
+    _, modules = import_times(statement)
+    assert not [name for name in modules if is_qt_module(name)]
+
+
+def test_import_budget():
+    times, _ = import_times('import settings_manager')
+    assert times['settings_manager'] < IMPORT_BUDGET
+
+
+def test_lazy_attributes():
+    pytest.importorskip('Qt')
+    _, modules = import_times(
+        'from settings_manager.ui import SettingsViewer\n'
+        'from settings_manager.ui.setting_widgets import IntSetting')
+    assert 'settings_manager.ui.settings_viewer' in modules
+    assert 'settings_manager.ui.setting_widgets.int_setting' in modules
+    # Only the requested widget modules are imported
+    assert 'settings_manager.ui.setting_widgets.list_setting' not in modules
+
+    import settings_manager.ui
+    with pytest.raises(AttributeError):
+        settings_manager.ui.missing_attribute
+    assert 'SettingsViewer' in dir(settings_manager.ui)
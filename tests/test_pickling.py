@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import pickle
+
+import pytest
+
+from settings_manager import pickling
+from settings_manager.constraints import less_equal
+from settings_manager.exceptions import SettingsError
+from settings_manager.setting import Setting
+from settings_manager.settings_group import SettingsGroup
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+@pytest.fixture
+def settings():
+    return SettingsGroup({
+        'count': {'default': 3, 'minmax': (1, 5), 'widget': object},
+        'name': 'value',
+        'types': {'default': ['png'], 'choices': ['png', 'jpg']},
+    })
+
+
+@pytest.fixture
+def registered(settings):
+    schema_id = pickling.register_schema(settings)
+    yield schema_id
+    pickling.unregister_schema(schema_id)
+
+
+def get_count(settings):
+    return settings.get('count')
+
+
+def test_pickle_setting():
+    s = Setting('key', [1], minmax=(0, 2), widget=object, custom='value')
+    s.add_observer(lambda change: None)
+    s.set([2])
+    restored = pickle.loads(pickle.dumps(s))
+    assert restored.get() == [2]
+    assert restored.property('custom') == 'value'
+    # UI properties are not sent
+    assert restored.property('widget') is None
+    with pytest.raises(SettingsError):
+        restored.set([1, 2, 3])
+
+
+def test_pickle_group(settings):
+    settings.set('count', 4)
+    settings.add_observer(lambda change: None)
+    restored = pickle.loads(pickle.dumps(settings))
+    assert isinstance(restored, SettingsGroup)
+    assert restored.as_dict(values_only=True) == settings.as_dict(values_only=True)
+    assert restored.schema_id() == settings.schema_id()
+
+
+def test_pickle_threadsafe_group():
+    settings = ThreadSafeSettingsGroup({'one': 1})
+    restored = pickle.loads(pickle.dumps(settings))
+    assert isinstance(restored, ThreadSafeSettingsGroup)
+    restored.set('one', 2)
+    assert restored.snapshot() == {'one': 2}
+
+
+def test_schema_id(settings):
+    other = SettingsGroup(settings)
+    other.set('count', 1)
+    assert other.schema_id() == settings.schema_id()
+    other.setting('name').set_property('label', 'Name')
+    assert other.schema_id() != settings.schema_id()
+
+
+def test_registered_schema(settings, registered):
+    settings.set('count', 2)
+    data = pickle.dumps(settings)
+    pickling.unregister_schema(registered)
+    assert len(data) < len(pickle.dumps(settings))
+
+    with pytest.raises(SettingsError):
+        pickle.loads(data)
+    pickling.install_schemas({registered: [s._definition() for s in settings]})
+    assert pickle.loads(data).get('count') == 2
+
+
+def test_process_pool(settings, registered):
+    settings.set('count', 5)
+    with ProcessPoolExecutor(1, initializer=pickling.install_schemas,
+                             initargs=(pickling.registered_schemas(),)) as pool:
+        assert list(pool.map(get_count, [settings])) == [5]
+
+
+def test_pickle_group_constraints():
+    settings = SettingsGroup([('a', 1), ('b', 2)])
+    settings.add_constraint(less_equal('a', 'b'))
+    for copied in (pickle.loads(pickle.dumps(settings)), copy.deepcopy(settings)):
+        assert len(copied._constraints) == 1
+        with pytest.raises(SettingsError):
+            copied.set('a', 5)
+
+    # Lambdas can be copied, but not pickled
+    settings.add_constraint(lambda v: v['a'] >= 0, 'positive')
+    assert len(copy.deepcopy(settings)._constraints) == 2
+    with pytest.raises(SettingsError) as info:
+        pickle.dumps(settings)
+    assert 'positive' in str(info.value)
@@ -0,0 +1,115 @@
+import json
+import threading
+
+import pytest
+
+from settings_manager import Setting, SettingsGroup, profiling
+from settings_manager.ui import setting_widgets
+
+
+class Widget(object):
+    """ Stands in for a widget so that no QApplication is needed """
+    def __init__(self, setting, parent=None):
+        self.setting = setting
+
+
+@pytest.fixture(autouse=True)
+def clean_profiling():
+    yield
+    while profiling.is_enabled():
+        profiling.disable()
+    profiling.reset()
+
+
+def test_profile_counts(tmpdir):
+    group = SettingsGroup([{'a': {'default': 1}}, {'b': {'default': 'x'}}])
+    path = str(tmpdir.join('settings.json'))
+    with profiling.profile() as report:
+        group.setting('a').set(2)
+        group.setting('a').get()
+        group.update([{'c': {'default': 1.0}}])
+        with open(path, 'w') as f:
+            f.write(group.to_json())
+        SettingsGroup.from_json(path)
+        group.as_argparser()
+    assert report['Setting.set'].count >= 1
+    assert report['Setting.get'].count >= 1
+    assert report['SettingsGroup.update'].count >= 1
+    assert report['SettingsGroup.to_json'].count == 1
+    assert report['SettingsGroup.from_json'].count == 1
+    assert report['SettingsGroup.as_argparser'].count == 1
+    assert report['create_setting_widget'].count == 0
+    assert report['SettingsGroup.to_json'].seconds > 0
+    assert report.duration >= report['SettingsGroup.to_json'].seconds
+
+
+def test_profile_widgets():
+    setting = Setting('a', 1, widget=Widget)
+    with profiling.profile() as report:
+        widget = setting_widgets.create_setting_widget(setting)
+    assert isinstance(widget, Widget)
+    assert report['create_setting_widget'].count == 1
+
+
+def test_disabled_restores_methods():
+    get = Setting.__dict__['get']
+    from_json = SettingsGroup.__dict__['from_json']
+    create = setting_widgets.create_setting_widget
+    with profiling.profile():
+        assert Setting.__dict__['get'] is not get
+    assert Setting.__dict__['get'] is get
+    assert SettingsGroup.__dict__['from_json'] is from_json
+    assert setting_widgets.create_setting_widget is create
+
+    Setting('a', 1).get()
+    assert profiling.report_totals()['Setting.get'].count == 0
+
+
+def test_nested_profiles():
+    setting = Setting('a', 1)
+    with profiling.profile() as outer:
+        setting.set(2)
+        with profiling.profile() as inner:
+            setting.set(3)
+        assert profiling.is_enabled()
+    assert not profiling.is_enabled()
+    assert inner['Setting.set'].count == 1
+    assert outer['Setting.set'].count == 2
+
+
+def test_enable_disable():
+    profiling.enable()
+    Setting('a', 1).get()
+    profiling.disable()
+    assert profiling.report_totals()['Setting.get'].count == 1
+    profiling.reset()
+    assert profiling.report_totals()['Setting.get'].count == 0
+    with pytest.raises(RuntimeError):
+        profiling.disable()
+
+
+def test_threads():
+    setting = Setting('a', 1)
+
+    def read():
+        for _ in range(1000):
+            setting.get()
+
+    with profiling.profile() as report:
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert report['Setting.get'].count == 4000
+
+
+def test_report_json():
+    setting = Setting('a', 1)
+    with profiling.profile() as report:
+        setting.set(2)
+    data = json.loads(report.to_json())
+    assert data['operations']['Setting.set']['count'] == 1
+    assert data['duration'] == report.duration
+    assert 'Setting.get' not in data['operations']
+    assert 'Setting.set' in str(report)
@@ -0,0 +1,62 @@
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager.exceptions import SettingsError
+from settings_manager.schema import Schema
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+DEFINITION = [
+    {'samples': {'default': 4, 'minmax': (1, 64)}},
+    {'renderer': {'default': 'arnold', 'choices': ['arnold', 'redshift']}},
+    {'passes': {'default': ['beauty'], 'choices': ['beauty', 'depth'], 'minmax': (1, 2)}},
+    {'output': {'default': None, 'data_type': str, 'nullable': True}},
+]
+
+
+def test_create():
+    schema = Schema.compile(DEFINITION)
+    assert schema.names == ('samples', 'renderer', 'passes', 'output')
+    assert 'samples' in schema
+    group = schema.create()
+    assert group == SettingsGroup(DEFINITION)
+    assert group.fingerprint() == SettingsGroup(DEFINITION).fingerprint()
+    assert schema.schema_id() == group.schema_id()
+
+    group = schema.create({'samples': 16, 'passes': ['beauty', 'depth']})
+    assert group.get('samples') == 16
+    assert group.fingerprint() != schema.create().fingerprint()
+    with pytest.raises(SettingsError):
+        schema.create({'samples': 100})
+    with pytest.raises(SettingsError):
+        Schema.compile([{'samples': {'default': 4, 'minmax': (8, 1)}}])
+
+
+def test_groups_are_independent():
+    schema = Schema.compile(DEFINITION)
+    one, two = schema.create(), schema.create()
+    one.set('renderer', 'redshift')
+    one.setting('samples').set_property('label', 'Samples')
+    assert two.get('renderer') == 'arnold'
+    assert two.setting('samples').property('label') == 'samples'
+    assert schema.create().setting('samples').property('label') == 'samples'
+    assert one != two
+
+    changes = []
+    one.add_observer(changes.append)
+    two.set('samples', 2)
+    assert changes == []
+
+
+def test_create_subclass():
+    source = SettingsGroup(DEFINITION)
+    source.set('samples', 8)
+    source.add_computed('double', lambda v: v['samples'] * 2)
+    schema = Schema.compile(source)
+    group = schema.create(group_class=ThreadSafeSettingsGroup)
+    assert isinstance(group, ThreadSafeSettingsGroup)
+    assert group.snapshot()['samples'] == 8
+    assert group.get('double') == 16
+    group.set('samples', 2)
+    assert group.get('double') == 4
+    assert source.get('samples') == 8
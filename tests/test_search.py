@@ -0,0 +1,42 @@
+import pytest
+
+from settings_manager.search import SearchIndex
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add('max_count', 'max_count', 'Max Number of Items', 'Limit')
+    index.add('directory', 'directory', 'Output Directory', '')
+    index.add('filetypes', 'filetypes', 'File Types', 'Extensions to output')
+    return index
+
+
+@pytest.mark.parametrize('query, expected', (
+    ('', {'max_count', 'directory', 'filetypes'}),
+    ('o', {'max_count', 'directory', 'filetypes'}),
+    ('ma', {'max_count'}),
+    ('OUTPUT', {'directory', 'filetypes'}),
+    ('number of', {'max_count'}),
+    ('types', {'filetypes'}),
+    ('missing', set()),
+    # Fields are matched separately
+    ('limit\nmax', set()),
+))
+def test_search(index, query, expected):
+    assert index.search(query) == expected
+
+
+def test_add_replaces(index):
+    index.add('directory', 'directory', 'Folder')
+    assert index.search('output') == {'filetypes'}
+    assert index.search('folder') == {'directory'}
+    assert len(index) == 3
+
+
+def test_discard(index):
+    index.discard('filetypes')
+    index.discard('unknown')
+    assert 'filetypes' not in index
+    assert index.search('output') == {'directory'}
+    assert index.search('ty') == set()
@@ -244,3 +244,56 @@ def test_argparse(name, properties, input_string, parsed):
     parser.add_argument(flag, **args)
     p_args = parser.parse_args(input_string.split())
     assert getattr(p_args, name) == parsed
+
+
+def test_observers():
+    s = Setting('key', 1)
+    changes = []
+    s.add_observer(changes.append)
+    s.set(2)
+    s.set(2)
+    s.reset()
+    assert changes == [('key', 1, 2), ('key', 2, 1)]
+
+    s.remove_observer(changes.append)
+    s.set(3)
+    assert len(changes) == 2
+    with pytest.raises(ValueError):
+        s.remove_observer(changes.append)
+
+
+def test_observers_receive_copies():
+    s = Setting('key', ['a'])
+    changes = []
+    s.add_observer(changes.append)
+    s.set(['b'])
+    changes[0].value.append('c')
+    assert s.get() == ['b']
+
+
+def test_equality():
+    s = Setting('key', 1, choices=[1, 2])
+    other = Setting('key', 1, choices=[1, 2])
+    assert s == other
+    other.set(2)
+    assert s != other
+    other.set(1)
+    other.set_property('tooltip', 'Changed')
+    assert s != other
+    assert s == 'key'
+
+
+def test_fingerprint():
+    s = Setting('key', ['a'], choices=['a', 'b'])
+    fingerprint = s.fingerprint()
+    assert Setting('key', ['a'], choices=['a', 'b']).fingerprint() == fingerprint
+    s.set(['b'])
+    assert s.fingerprint() != fingerprint
+    s.set(['a'])
+    assert s.fingerprint() == fingerprint
+    s.set_property('label', 'Key')
+    assert s.fingerprint() != fingerprint
+
+    unpicklable = Setting('key', 1, custom=lambda: None)
+    with pytest.raises(SettingsError):
+        unpicklable.fingerprint()
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import warnings
+
 import pytest
 
 from settings_manager.exceptions import SettingsError
@@ -123,3 +127,265 @@ class TestSettingsGroup(object):
     def test_contains(self, mock_settings_config_list):
         s = SettingsGroup(mock_settings_config_list)
         assert 'one' in s
+
+
+def test_observers(mock_settings_config_flat_dict):
+    s = SettingsGroup(mock_settings_config_flat_dict)
+    all_changes, two_changes = [], []
+    s.add_observer(all_changes.append)
+    s.add_observer(two_changes.append, keys=['two'])
+    s.set('one', 'other')
+    s.set('two', 3)
+    s.add_setting('six', 6)
+    s.set('six', 7)
+    assert [c.name for c in all_changes] == ['one', 'two', 'six']
+    assert two_changes == [('two', 2, 3)]
+
+    s.remove_observer(all_changes.append)
+    s.remove_observer(two_changes.append)
+    s.set('two', 4)
+    assert len(all_changes) == 3
+    with pytest.raises(ValueError):
+        s.remove_observer(all_changes.append)
+
+
+def test_watch(mock_settings_config_flat_dict):
+    s = SettingsGroup(mock_settings_config_flat_dict)
+
+    async def consume():
+        changes = []
+        async with s.watch(['two', 'five'], maxsize=1) as stream:
+            s.set('one', 'other')
+            s.set('two', 3)
+            s.set('two', 4)
+            changes.append(await stream.__anext__())
+            # Only the latest setting is kept when the buffer is full
+            s.set('two', 5)
+            s.set('five', 6.0)
+            assert stream.dropped == 1
+            changes.append(await stream.__anext__())
+            # Changes from other threads are delivered to the loop
+            thread = threading.Thread(target=s.set, args=('two', 6))
+            thread.start()
+            changes.append(await stream.__anext__())
+            thread.join()
+            stream.close()
+            async for change in stream:
+                changes.append(change)
+        return changes
+
+    changes = asyncio.run(consume())
+    assert changes == [('two', 2, 4), ('five', 5.0, 6.0), ('two', 5, 6)]
+
+
+def test_watch_merges_changes(mock_settings_config_flat_dict):
+    s = SettingsGroup(mock_settings_config_flat_dict)
+
+    async def consume():
+        stream = s.watch()
+        s.set('two', 3)
+        s.set('one', 'other')
+        s.set('two', 2)
+        s.set('one', 'final')
+        stream.close()
+        return [change async for change in stream]
+
+    assert asyncio.run(consume()) == [('one', 'value', 'final')]
+
+
+def test_update_from_group(mock_settings_config_dict):
+    s = SettingsGroup(mock_settings_config_dict)
+    s.set('two', 5)
+    copied = SettingsGroup(s)
+    assert copied == s
+    copied.set('two', 6)
+    assert s.get('two') == 5
+
+
+def test_json_round_trip(tmpdir, mock_settings_config_dict):
+    s = SettingsGroup(mock_settings_config_dict)
+    s.set('two', 5)
+    path = str(tmpdir.join('settings.json'))
+    with open(path, 'w') as f:
+        f.write(s.to_json())
+    loaded = SettingsGroup.from_json(path)
+    assert loaded.get('two') == 5
+    assert loaded.setting('two').property('default') == 2
+    assert loaded.setting('three').property('minmax') == (1, 2)
+    assert list(loaded.as_dict(ordered=True)) == list(s.as_dict(ordered=True))
+
+
+def test_fingerprint(mock_settings_config_list):
+    s = SettingsGroup(mock_settings_config_list)
+    other = SettingsGroup(mock_settings_config_list)
+    fingerprint = s.fingerprint()
+    assert other.fingerprint() == fingerprint
+    assert s == other
+
+    s.set('two', 5)
+    assert s.fingerprint() != fingerprint
+    assert s != other
+    other.setting('two').set(5)
+    assert s == other
+
+    s.setting('one').set_property('tooltip', 'Changed')
+    assert s != other
+    s.add_setting('four', 4)
+    assert len(s) != len(other)
+    assert s.fingerprint() != other.fingerprint()
+
+
+def test_fingerprint_order():
+    # Settings are ordered, their properties are not
+    s = SettingsGroup([('a', 1), ('b', 2)])
+    assert s != SettingsGroup([('b', 2), ('a', 1)])
+    one = SettingsGroup([{'a': {'default': 1, 'label': 'A', 'tooltip': 'x'}}])
+    two = SettingsGroup([{'a': {'tooltip': 'x', 'label': 'A', 'default': 1}}])
+    assert one.fingerprint() == two.fingerprint()
+
+
+def test_equality_compares_widgets():
+    class Widget(object):
+        pass
+
+    s = SettingsGroup([('a', 1)])
+    other = SettingsGroup([('a', 1)])
+    other.setting('a').set_property('widget', Widget)
+    assert s.fingerprint() == other.fingerprint()
+    assert s != other
+
+
+def test_equality_unpicklable():
+    func = lambda: None
+    s = SettingsGroup([{'a': {'default': 1, 'custom': func}}])
+    other = SettingsGroup([{'a': {'default': 1, 'custom': func}}])
+    assert s == other
+    other.set('a', 2)
+    assert s != other
+    with pytest.raises(SettingsError):
+        s.fingerprint()
+
+
+class Counter(object):
+    """ Counts calls to a computed function """
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, values):
+        self.calls += 1
+        return self.func(values)
+
+
+def test_computed():
+    s = SettingsGroup([('root', '/jobs'), ('shot', 'sh010'), ('frames', 10)])
+    output = Counter(lambda v: v['root'] + '/' + v.get('shot'))
+    s.add_computed('output', output)
+    assert s.get('output') == '/jobs/sh010'
+    assert s['output'] == '/jobs/sh010'
+    assert output.calls == 1
+
+    # Only changes to the values it read invalidate it
+    s.set('frames', 20)
+    s.get('output')
+    assert output.calls == 1
+    s.set('shot', 'sh020')
+    assert s.get('output') == '/jobs/sh020'
+    assert output.calls == 2
+
+    with pytest.raises(SettingsError):
+        s.add_computed('shot', output)
+    with pytest.raises(SettingsError):
+        s.add_setting('output', 'value')
+    with pytest.raises(KeyError):
+        s.get('missing')
+
+
+def test_computed_dependencies():
+    s = SettingsGroup([('use_proxy', False), ('width', 1920), ('proxy_width', 960)])
+    width = Counter(lambda v: v['proxy_width'] if v['use_proxy'] else v['width'])
+    s.add_computed('render_width', width)
+    s.add_computed('budget', lambda v: v['render_width'] * 2)
+    assert s.get('budget') == 3840
+
+    # Dependencies are those read by the last evaluation
+    s.set('proxy_width', 480)
+    assert s.get('budget') == 3840
+    assert width.calls == 1
+    s.set('use_proxy', True)
+    assert s.get('budget') == 960
+    s.set('width', 1000)
+    assert s.get('budget') == 960
+    assert width.calls == 2
+
+
+def test_computed_circular():
+    s = SettingsGroup([('a', 1)])
+    s.add_computed('b', lambda v: v['c'])
+    s.add_computed('c', lambda v: v['b'])
+    with pytest.raises(SettingsError):
+        s.get('b')
+
+
+def test_computed_json(tmpdir):
+    s = SettingsGroup([('root', '/jobs')])
+    s.add_computed('output', lambda v: v['root'] + '/out')
+    assert 'output' not in s.as_dict()
+    assert s.as_dict(values_only=True, computed=True)['output'] == '/jobs/out'
+    assert 'output' not in s.to_json()
+    path = str(tmpdir.join('settings.json'))
+    with open(path, 'w') as f:
+        f.write(s.to_json(computed=True))
+    loaded = SettingsGroup.from_json(path)
+    assert [setting.name for setting in loaded] == ['root']
+
+    copied = SettingsGroup(s)
+    copied.set('root', '/other')
+    assert copied.get('output') == '/other/out'
+    assert s.get('output') == '/jobs/out'
+
+
+def test_set_many():
+    s = SettingsGroup([('low', 1), ('high', 2)])
+    s.add_constraint(lambda v: v['low'] <= v['high'])
+    s.set_many({'low': 10, 'high': 20})
+    assert s.as_dict(values_only=True) == {'low': 10, 'high': 20}
+    with pytest.raises(KeyError):
+        s.set_many({'missing': 1})
+
+
+def test_equal_values_compare_equal():
+    first = SettingsGroup([{'ratio': {'default': 0.0, 'enabled_if': {'a': 1, 'b': 2}}}])
+    second = SettingsGroup([{'ratio': {'default': -0.0, 'enabled_if': {'b': 2, 'a': 1}}}])
+    assert first == second
+    assert first.fingerprint() == second.fingerprint()
+
+
+def test_watch_outside_loop(mock_settings_config_flat_dict):
+    s = SettingsGroup(mock_settings_config_flat_dict)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        # Created before the loop is running
+        stream = s.watch(['two'])
+
+    async def consume():
+        # Waits for the change in the running loop
+        asyncio.get_running_loop().call_soon(s.set, 'two', 3)
+        return await stream.__anext__()
+
+    assert asyncio.run(consume()) == ('two', 2, 3)
+    stream.close()
+
+
+def test_fingerprint_value_modified_after_set():
+    first = SettingsGroup([('items', ['a'])])
+    second = SettingsGroup([('items', ['a'])])
+    items = ['b']
+    first.set('items', items)
+    second.set('items', list(items))
+    fingerprint = first.fingerprint()
+    items.append('c')
+    second.set('items', ['b', 'c'])
+    assert first.get('items') == ['b']
+    assert first.fingerprint() == fingerprint
+    assert first != second
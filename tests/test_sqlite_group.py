@@ -0,0 +1,221 @@
+import json
+import pickle
+import sqlite3
+
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager.choices import ChoicesProvider
+from settings_manager.constraints import less_equal
+from settings_manager.exceptions import SettingsError
+from settings_manager.schema import Schema
+from settings_manager.sqlite_group import SQLiteSettingsGroup
+
+
+DEFINITION = [
+    {'min_samples': {'default': 4, 'minmax': (1, 256)}},
+    {'max_samples': 16},
+    {'renderer': {'default': 'arnold', 'choices': ['arnold', 'redshift'],
+                  'label': 'Renderer'}},
+    {'passes': ['beauty']},
+]
+
+
+def test_group_api():
+    group = SQLiteSettingsGroup(DEFINITION)
+    expected = SettingsGroup(DEFINITION)
+    assert len(group) == 4
+    assert [s.name for s in group] == ['min_samples', 'max_samples', 'renderer', 'passes']
+    assert 'renderer' in group._contents
+    assert group['renderer'] == 'arnold'
+    assert group.setting('missing') is None
+    with pytest.raises(KeyError):
+        group.get('missing')
+    with pytest.raises(SettingsError):
+        group.set('min_samples', 1000)
+    with pytest.raises(SettingsError):
+        group.add_setting('renderer', 'x')
+    assert group.as_dict() == expected.as_dict()
+    assert group.schema_id() == expected.schema_id()
+    assert group.fingerprint() == expected.fingerprint()
+    assert group == expected
+
+    group.set('passes', ['beauty', 'depth'])
+    assert group != expected
+    copied = pickle.loads(pickle.dumps(group))
+    assert copied.get('passes') == ['beauty', 'depth']
+
+
+def test_persistence(tmpdir):
+    path = str(tmpdir.join('settings.db'))
+    group = SQLiteSettingsGroup(DEFINITION, path=path)
+    group.set('min_samples', 8)
+    setting = group.setting('renderer')
+    setting.set_property('label', 'Render engine')
+    group.close()
+
+    group = SQLiteSettingsGroup(path=path)
+    assert group.get('min_samples') == 8
+    assert group.setting('renderer').property('label') == 'Render engine'
+    assert group.setting('renderer').property('choices') == ['arnold', 'redshift']
+
+
+def test_json_storage(tmpdir):
+    path = str(tmpdir.join('settings.db'))
+    group = SQLiteSettingsGroup(DEFINITION, path=path)
+    group.add_setting('size', (1, 2), widget=SQLiteSettingsGroup, label='Size')
+    group.set('passes', ['beauty', 'depth'])
+    group.close()
+
+    connection = sqlite3.connect(path)
+    for definition, value in connection.execute('SELECT definition, value FROM settings'):
+        json.loads(definition)
+        json.loads(value)
+    # UI properties aren't stored
+    definition, = connection.execute(
+        "SELECT definition FROM settings WHERE name = 'size'").fetchone()
+    assert 'sqlite_group' not in definition
+    connection.close()
+
+    group = SQLiteSettingsGroup(path=path)
+    size = group.setting('size')
+    assert size.get() == (1, 2)
+    assert size.property('widget') is None
+    assert size.property('label') == 'Size'
+    assert group.setting('min_samples').property('minmax') == (1, 256)
+    assert group.get('passes') == ['beauty', 'depth']
+
+    # Classes are only found in imported modules, and providers can't be stored
+    with pytest.raises(SettingsError):
+        group.add_setting('cls', object(), data_type=object)
+    with pytest.raises(SettingsError):
+        group.add_setting('renderer_2', 'a', choices=ChoicesProvider(lambda: ['a']))
+    assert len(group) == 5
+    group.close()
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "UPDATE settings SET definition = replace(definition, '\"int\"', "
+        "'\"missing_module.Type\"') WHERE name = 'max_samples'")
+    connection.commit()
+    connection.close()
+    group = SQLiteSettingsGroup(path=path)
+    with pytest.raises(SettingsError):
+        group.setting('max_samples')
+
+
+def test_unsupported_database(tmpdir):
+    path = str(tmpdir.join('settings.db'))
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE settings (position INTEGER PRIMARY KEY, '
+                       'name TEXT, definition BLOB, value BLOB)')
+    connection.commit()
+    connection.close()
+    with pytest.raises(SettingsError):
+        SQLiteSettingsGroup(path=path)
+
+
+def test_fingerprint_uses_stored_digests():
+    group = SQLiteSettingsGroup(DEFINITION, cache_size=2)
+    expected = SettingsGroup(DEFINITION)
+    group.clear_cache()
+    assert group.fingerprint() == expected.fingerprint()
+    # Only the digests are read
+    assert len(group._cache) == 0
+
+    held = group.setting('passes')
+    held.set(['depth'])
+    expected.set('passes', ['depth'])
+    group.setting('renderer').set_property('label', 'Engine')
+    expected.setting('renderer').set_property('label', 'Engine')
+    assert group.fingerprint() == expected.fingerprint()
+    group.clear_cache()
+    assert group.fingerprint() == expected.fingerprint()
+    assert group == expected
+
+
+def test_lazy_cache():
+    group = SQLiteSettingsGroup([('value_{}'.format(i), i) for i in range(20)],
+                                cache_size=5)
+    assert len(group._cache) == 5
+    group.clear_cache()
+    assert group.get('value_3') == 3
+    assert list(group._cache) == ['value_3']
+
+    # Settings evicted from the cache still write their values, and the
+    # cached Setting is replaced when a held one changes
+    held = group.setting('value_0')
+    for i in range(1, 10):
+        group.get('value_{}'.format(i))
+    assert 'value_0' not in group._cache
+    held.set(100)
+    assert group.get('value_0') == 100
+    stale = group.setting('value_0')
+    held.set(101)
+    assert group.get('value_0') == 101
+    assert group.setting('value_0') is not stale
+
+    # Properties of evicted settings are written
+    held = group.setting('value_1')
+    held.set_property('label', 'First')
+    for i in range(10, 20):
+        group.get('value_{}'.format(i))
+    assert group.setting('value_1').property('label') == 'First'
+
+
+def test_set_many_and_transactions():
+    group = SQLiteSettingsGroup(DEFINITION)
+    group.add_constraint(less_equal('min_samples', 'max_samples'))
+    group.set_many({'min_samples': 64, 'max_samples': 128})
+    assert group.get('min_samples') == 64
+
+    with pytest.raises(SettingsError):
+        group.set_many({'max_samples': 1, 'renderer': 'redshift'})
+    # The whole transaction is rolled back
+    assert group.get('max_samples') == 128
+    assert group.get('renderer') == 'arnold'
+
+    with pytest.raises(SettingsError):
+        group.update([{'samples': 1}, {'renderer': 'x'}])
+    assert 'samples' not in group._contents
+    assert len(group) == 4
+
+    with pytest.raises(ValueError):
+        with group.transaction():
+            group.set('renderer', 'redshift')
+            raise ValueError('failed')
+    assert group.get('renderer') == 'arnold'
+    # Constraints still apply to settings loaded after the rollback
+    with pytest.raises(SettingsError):
+        group.set('min_samples', 200)
+
+
+def test_observers_and_computed():
+    group = SQLiteSettingsGroup(DEFINITION, cache_size=1)
+    changes = []
+    group.add_observer(changes.append)
+    group.add_computed('total', lambda v: v['min_samples'] + v['max_samples'])
+    assert group.get('total') == 20
+    group.set('min_samples', 8)
+    group.get('renderer')
+    group.set('max_samples', 32)
+    assert [c.name for c in changes] == ['min_samples', 'max_samples']
+    assert group.get('total') == 40
+
+
+def test_shared_database(tmpdir):
+    path = str(tmpdir.join('settings.db'))
+    one = SQLiteSettingsGroup(DEFINITION, path=path)
+    two = SQLiteSettingsGroup(path=path)
+    assert two.get('min_samples') == 4
+    one.set('min_samples', 8)
+    assert not one.refresh()
+    assert two.refresh()
+    assert two.get('min_samples') == 8
+
+
+def test_schema():
+    schema = Schema.compile(DEFINITION)
+    group = schema.create({'min_samples': 8}, group_class=SQLiteSettingsGroup)
+    assert isinstance(group, SQLiteSettingsGroup)
+    assert group.get('min_samples') == 8
+    assert group.as_dict() == dict(schema.create({'min_samples': 8}).as_dict())
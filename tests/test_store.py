@@ -0,0 +1,162 @@
+import os
+
+import pytest
+
+from settings_manager import SettingsGroup
+from settings_manager.constraints import less_equal
+from settings_manager.exceptions import SettingsError
+from settings_manager.store import SettingsStore
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+DEFINITION = [('min_samples', 4), ('max_samples', 16), ('label', 'beauty'),
+              ('passes', ['beauty'])]
+
+
+def read_lines(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_flush_and_load(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION)
+    store = SettingsStore(group, path)
+    store.load()
+    group.set('min_samples', 8)
+    group.set('min_samples', 9)
+    group.set('passes', ['beauty', 'depth'])
+    assert not os.path.exists(store.log_path)
+    store.flush()
+    # Only the changed settings are written, once each
+    assert len(read_lines(store.log_path)) == 3
+    store.flush()
+    assert len(read_lines(store.log_path)) == 3
+
+    loaded = SettingsGroup(DEFINITION)
+    SettingsStore(loaded, path).load()
+    assert loaded.get('min_samples') == 9
+    assert loaded.get('passes') == ['beauty', 'depth']
+    assert loaded.get('label') == 'beauty'
+
+
+def test_autosave(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = ThreadSafeSettingsGroup(DEFINITION)
+    store = SettingsStore(group, path, autosave=True)
+    with group.batch():
+        group.set('label', 'depth')
+    group.set('max_samples', 32)
+    assert len(read_lines(store.log_path)) == 3
+
+    store.close()
+    group.set('label', 'normal')
+    loaded = SettingsGroup(DEFINITION)
+    SettingsStore(loaded, path).load()
+    assert loaded.get('label') == 'depth'
+    assert loaded.get('max_samples') == 32
+
+
+def test_flush_settings(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION)
+    store = SettingsStore(group, path)
+    group.set('label', 'depth')
+    group.set('min_samples', 8)
+    store.flush([group.setting('label')])
+    assert len(read_lines(store.log_path)) == 2
+    store.flush()
+    assert len(read_lines(store.log_path)) == 3
+
+
+def test_compact(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION)
+    store = SettingsStore(group, path, autosave=True, compact_threshold=3)
+    for value in range(5, 10):
+        group.set('min_samples', value)
+    # Compacted on the fourth change, then one more line
+    assert len(read_lines(path)) == 2
+    assert len(read_lines(store.log_path)) == 2
+
+    loaded = SettingsGroup(DEFINITION)
+    loaded_store = SettingsStore(loaded, path)
+    loaded_store.load()
+    assert loaded.get('min_samples') == 9
+    assert loaded_store._generation == 1
+    assert not [name for name in os.listdir(str(tmpdir)) if name.startswith('.tmp_')]
+
+
+def test_interrupted_compaction(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION)
+    store = SettingsStore(group, path, autosave=True)
+    group.set('min_samples', 8)
+    old_log = read_lines(store.log_path)
+    group.set('min_samples', 10)
+    store.compact()
+    # A crash after the snapshot is replaced leaves the old log
+    with open(store.log_path, 'w') as f:
+        f.write('\n'.join(old_log) + '\n')
+
+    loaded = SettingsGroup(DEFINITION)
+    SettingsStore(loaded, path).load()
+    assert loaded.get('min_samples') == 10
+    assert not os.path.exists(store.log_path)
+
+
+def test_partial_line(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION)
+    store = SettingsStore(group, path, autosave=True)
+    group.set('min_samples', 8)
+    with open(store.log_path, 'a') as f:
+        f.write('["min_samples", 1')
+
+    loaded = SettingsGroup(DEFINITION)
+    SettingsStore(loaded, path).load()
+    assert loaded.get('min_samples') == 8
+
+
+def test_partial_line_truncated(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION)
+    store = SettingsStore(group, path, autosave=True)
+    group.set('min_samples', 8)
+    store.close()
+    with open(store.log_path, 'a') as f:
+        f.write('["max_samples", 2')
+
+    # Changes written after loading the torn log are kept
+    store = SettingsStore(group, path, autosave=True)
+    store.load()
+    assert len(read_lines(store.log_path)) == 2
+    group.set('label', 'depth')
+    group.set('max_samples', 32)
+
+    loaded = SettingsGroup(DEFINITION)
+    SettingsStore(loaded, path).load()
+    assert loaded.get('min_samples') == 8
+    assert loaded.get('label') == 'depth'
+    assert loaded.get('max_samples') == 32
+
+
+def test_load_skips_invalid(tmpdir):
+    path = str(tmpdir.join('settings.json'))
+    group = SettingsGroup(DEFINITION + [('removed', 1)])
+    store = SettingsStore(group, path, autosave=True)
+    group.set('removed', 2)
+    group.set('min_samples', 8)
+    group.set('label', 'depth')
+
+    loaded = SettingsGroup([{'min_samples': 4}, {'max_samples': 16},
+                            {'label': {'default': 'beauty', 'choices': ['beauty']}}])
+    loaded.add_constraint(less_equal('min_samples', 'max_samples'))
+    SettingsStore(loaded, path).load()
+    assert loaded.get('min_samples') == 8
+    assert loaded.get('label') == 'beauty'
+
+    with open(path, 'w') as f:
+        f.write('invalid')
+    with pytest.raises(SettingsError):
+        SettingsStore(loaded, path).load()
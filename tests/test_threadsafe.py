@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from settings_manager.exceptions import SettingsError
+from settings_manager.threadsafe import ThreadSafeSettingsGroup
+
+
+def test_settings_group_api():
+    s = ThreadSafeSettingsGroup({'one': 1, 'two': ['a']})
+    s.add_setting('three', 3.0)
+    assert [i.name for i in s] == ['one', 'two', 'three']
+    assert s.get('two') == ['a']
+    s.set('two', ['b'])
+    assert s.as_dict(values_only=True) == {'one': 1, 'two': ['b'], 'three': 3.0}
+    s.reset()
+    assert s.get('two') == ['a']
+    with pytest.raises(SettingsError):
+        s.set('one', 'invalid')
+    with pytest.raises(SettingsError):
+        s.update({'four': 4, 'one': 1})
+    assert 'four' not in s
+
+
+def test_batch():
+    s = ThreadSafeSettingsGroup({'low': 0, 'high': 0})
+    snapshot = s.snapshot()
+    with s.batch():
+        s.set('low', 1)
+        s.set('high', 2)
+        assert s.get('low') == 0
+    assert s.snapshot() == {'low': 1, 'high': 2}
+    # Previous snapshots are not modified
+    assert snapshot == {'low': 0, 'high': 0}
+
+
+def test_setting_changes_are_published():
+    s = ThreadSafeSettingsGroup({'one': 1})
+    changes = []
+    s.add_observer(lambda change: changes.append(s.get(change.name)))
+    s.setting('one').set(2)
+    assert s.get('one') == 2
+    assert changes == [2]
+
+
+def test_concurrent_reads():
+    s = ThreadSafeSettingsGroup({'value': 0, 'negative': 0})
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            values = s.snapshot()
+            if values['value'] != -values['negative']:
+                errors.append(dict(values))
+            # Iteration is safe while settings are added
+            for setting in s:
+                pass
+
+    def write():
+        for i in range(1, 2000):
+            with s.batch():
+                s.set('value', i)
+                s.set('negative', -i)
+            if not i % 100:
+                s.add_setting('extra_{}'.format(i), i)
+
+    readers = [threading.Thread(target=read) for _ in range(8)]
+    for thread in readers:
+        thread.start()
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert s.get('value') == 1999
+    assert len(s) == 21
+
+
+def test_fingerprint():
+    settings = ThreadSafeSettingsGroup([('count', 1)])
+    fingerprint = settings.fingerprint()
+    with settings.batch():
+        settings.set('count', 2)
+    assert settings.fingerprint() != fingerprint
+    settings.update([('name', 'a')])
+    other = ThreadSafeSettingsGroup([('count', 1), ('name', 'a')])
+    assert settings != other
+    other.set('count', 2)
+    assert settings == other
+
+
+def test_concurrent_fingerprint():
+    names = ['value_{}'.format(i) for i in range(50)]
+    s = ThreadSafeSettingsGroup([(name, 0) for name in names])
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        try:
+            while not stop.is_set():
+                s.fingerprint()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(1, 200):
+        for name in names:
+            s.setting(name).set(i)
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    # No changes were lost
+    expected = ThreadSafeSettingsGroup([(name, 0) for name in names])
+    for name in names:
+        expected.set(name, 199)
+    assert s.fingerprint() == expected.fingerprint()
+
+
+def test_computed():
+    settings = ThreadSafeSettingsGroup([('count', 1)])
+    settings.add_computed('double', lambda v: v['count'] * 2)
+    assert settings.get('double') == 2
+    with settings.batch():
+        settings.set('count', 2)
+        # Values are published when the batch exits
+        assert settings.get('double') == 2
+    assert settings.get('double') == 4
+    assert settings.as_dict(values_only=True, computed=True) == {'count': 2, 'double': 4}
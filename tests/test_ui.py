@@ -3,7 +3,13 @@ import pytest
 
 from settings_manager.setting import Setting
 from settings_manager.settings_group import SettingsGroup
+from settings_manager.ui.change_coalescer import ChangeCoalescer
+from settings_manager.ui.checkable_combo_box import CheckableComboBox
+from settings_manager.ui.modelview import (SettingDictionaryView,
+                                         SettingFilterProxyModel,
+                                         SettingModel)
 from settings_manager.ui.settings_viewer import SettingsViewer
+from settings_manager.ui.setting_widgets.list_setting import ListSettingModel
 from settings_manager.ui.setting_widgets import (StringSetting,
                                                  BoolSetting,
                                                  IntSetting,
@@ -11,7 +17,10 @@ from settings_manager.ui.setting_widgets import (StringSetting,
                                                  ListSetting,
                                                  ListChoiceSetting,
                                                  ChoiceSetting,
-                                                 get_default_setting_widget)
+                                                 get_default_setting_widget,
+                                                 get_setting_widget_class,
+                                                 register_setting_widget,
+                                                 unregister_setting_widget)
 
 
 @pytest.fixture(scope='module')
@@ -48,6 +57,194 @@ def test_create_widget(qapplication, klass, properties):
     widget.show()
 
 
+def test_widget_registry():
+    class Path(str):
+        pass
+
+    class PathSetting(StringSetting):
+        pass
+
+    # Subclasses use the widget registered for their base class
+    assert get_setting_widget_class(Path) is StringSetting
+    assert get_setting_widget_class(Path, choices=True) is ChoiceSetting
+    assert get_setting_widget_class(dict) is None
+
+    register_setting_widget(PathSetting, Path)
+    try:
+        assert get_setting_widget_class(Path) is PathSetting
+        # Choices are registered for all types, which is more specific
+        assert get_setting_widget_class(Path, choices=True) is ChoiceSetting
+        s = Setting('key', Path('/tmp'))
+        assert get_default_setting_widget(s) is PathSetting
+        assert get_default_setting_widget(Setting('key', 'abc')) is StringSetting
+        # Empty choices are no choices
+        s = Setting('key', 'abc')
+        s.set_property('choices', [])
+        assert get_default_setting_widget(s) is StringSetting
+    finally:
+        unregister_setting_widget(Path)
+    assert get_setting_widget_class(Path) is StringSetting
+
+
+def test_widget_registry_subtype():
+    class VectorSetting(ListSetting):
+        pass
+
+    register_setting_widget(VectorSetting, list, subtype=float, minmax=True)
+    try:
+        assert get_setting_widget_class(list, float, minmax=True) is VectorSetting
+        assert get_setting_widget_class(list, float) is ListSetting
+        assert get_setting_widget_class(list, int, minmax=True) is ListSetting
+        assert get_setting_widget_class(list, float, True, True) is ListChoiceSetting
+        s = Setting('key', [0.0, 1.0], minmax=(2, 2))
+        assert get_default_setting_widget(s) is VectorSetting
+    finally:
+        unregister_setting_widget(list, subtype=float, minmax=True)
+
+
+def test_list_setting_edits(qapplication):
+    s = Setting('paths', ['a', 'b', 'c', 'd', 'e'])
+    widget = ListSetting(s)
+    model = widget.list_model
+    changes = []
+    widget.settingChanged.connect(changes.append)
+
+    model.setData(model.index(1), 'B')
+    assert s.get() == ['a', 'B', 'c', 'd', 'e']
+
+    # Removing several items is a single change
+    model.remove_items([4, 0, 1])
+    assert s.get() == ['c', 'd']
+    assert len(changes) == 2
+
+    widget.add_items(['x', 'y'], row=1)
+    assert s.get() == ['c', 'x', 'y', 'd']
+    assert len(changes) == 3
+
+    widget.setValue(['z'])
+    assert s.get() == ['z']
+    assert len(changes) == 4
+
+
+def test_list_setting_model_move(qapplication):
+    source = ListSettingModel(['a', 'b', 'c', 'd', 'e'])
+
+    source.move_items([0, 1], 4)
+    assert source.items() == ['c', 'd', 'a', 'b', 'e']
+    source.move_items([4], 0)
+    assert source.items() == ['e', 'c', 'd', 'a', 'b']
+    # Moving inside itself does nothing
+    source.move_items([1, 2], 2)
+    assert source.items() == ['e', 'c', 'd', 'a', 'b']
+
+    persistent = QtCore.QPersistentModelIndex(source.index(3))  # 'a'
+    source.move_items([0, 2, 4], 5)
+    assert source.items() == ['c', 'a', 'e', 'd', 'b']
+    assert persistent.row() == 1
+
+    # Qt's drag and drop moves go through moveRows
+    assert source.moveRows(QtCore.QModelIndex(), 4, 1, QtCore.QModelIndex(), 0)
+    assert source.items() == ['b', 'c', 'a', 'e', 'd']
+
+
+def test_list_setting_minmax_and_paste(qapplication):
+    s = Setting('paths', ['a'], minmax=(1, 3))
+    widget = ListSetting(s)
+    QtWidgets.QApplication.clipboard().setText('x\n\n  y  \nz\n')
+    widget.paste()
+    # Blank lines are skipped and only two more items fit
+    assert s.get() == ['a', 'x', 'y']
+    assert not widget.add_btn.isEnabled()
+
+    widget.list_view.selectAll()
+    assert widget.sub_btn.isEnabled()
+    widget.setValue(['1', '2'])
+    assert widget.value() == ['1', '2']
+
+
+def test_checkable_combo_box(qapplication):
+    combo = CheckableComboBox()
+    combo.addItems(['a', 'b', 'c', 'd'])
+    changes = []
+    combo.itemStateChanged.connect(changes.append)
+
+    combo.setCheckedItems(['b', 'd', 'missing'])
+    assert [i.text() for i in combo.checkedItems()] == ['b', 'd']
+    assert changes == [None]
+    combo.setCheckedItems(['d', 'b'])
+    assert changes == [None]
+
+    combo.setItemChecked(0)
+    assert combo.itemChecked(0)
+    assert combo.checkedCount() == 3
+
+    # Checked rows follow the items as rows are inserted and removed
+    combo.insertItem(0, 'z')
+    assert [i.text() for i in combo.checkedItems()] == ['a', 'b', 'd']
+    combo.removeItem(2)
+    assert [i.text() for i in combo.checkedItems()] == ['a', 'd']
+    assert not combo.itemChecked(4)
+
+    # Editing the model directly is also tracked
+    combo.model().item(0).setCheckState(QtCore.Qt.Checked)
+    assert combo.checkedCount() == 3
+
+    assert combo._elided_selection_string(1000) == '(3) z, a, d'
+    combo.setCheckedItems([])
+    combo.setDefaultText('Nothing')
+    assert combo._elided_selection_string(1000) == 'Nothing'
+
+
+def test_checkable_combo_box_filter(qapplication):
+    combo = CheckableComboBox()
+    combo.addItems(['diffuse', 'specular', 'normal', 'displacement'])
+    combo.setFilterEnabled(True)
+    combo._filter_edit.setText('di')
+    view = combo.view()
+    assert [view.isRowHidden(row) for row in range(4)] == [False, True, True, False]
+    combo.setFilterEnabled(False)
+    assert not any(view.isRowHidden(row) for row in range(4))
+
+
+def test_list_choice_setting_large(qapplication):
+    choices = ['texture_{}'.format(i) for i in range(5000)]
+    s = Setting('textures', choices[:10], choices=choices, minmax=(0, 100))
+    widget = ListChoiceSetting(s)
+    assert widget.checkedCount() == 10
+    widget.setValue(choices[100:150])
+    assert s.get() == choices[100:150]
+    assert widget.value() == choices[100:150]
+
+
+def test_choice_widgets_follow_provider(qapplication):
+    choices = ['arnold', 'redshift']
+    s = Setting('renderer', 'redshift', choices=lambda: list(choices))
+    widget = ChoiceSetting(s)
+    assert widget.currentText() == 'redshift'
+
+    choices.insert(0, 'cycles')
+    s.choices_provider().refresh()
+    assert [widget.itemText(i) for i in range(widget.count())] == ['cycles', 'arnold', 'redshift']
+    assert widget.currentText() == 'redshift'
+    assert s.get() == 'redshift'
+
+    # A value that is no longer a choice isn't shown
+    choices.remove('redshift')
+    s.choices_provider().refresh()
+    assert widget.currentIndex() == -1
+    assert widget.value() is None
+    assert s.get() == 'redshift'
+    choices.append('redshift')
+
+    multi = Setting('renderers', ['arnold'], choices=lambda: list(choices), minmax=(0, 3))
+    multi_widget = ListChoiceSetting(multi)
+    choices.remove('arnold')
+    multi.choices_provider().refresh()
+    assert multi_widget.count() == 2
+    # The value is kept until it is changed
+    assert multi.get() == ['arnold']
+
+
 def test_settings_viewer(qapplication):
     s = SettingsGroup({
         'one': 'abc',
@@ -67,3 +264,464 @@ def test_settings_viewer(qapplication):
     widget.set_setting_none('four', False)
     widget.set_setting_none('five', True)
     widget.set_setting_hidden('one', True)
+
+
+def test_setting_model_lazy_population(qapplication):
+    data = {
+        'integer': 1,
+        'list': ['a', 'b'],
+        'dict': {'nested': {'value': 1.0}, 'other': 'text'},
+    }
+    model = SettingModel()
+    model.set_data(data)
+    root = QtCore.QModelIndex()
+    assert model.rowCount(root) == 3
+
+    dict_index = model.index(2, 0, root)
+    assert model.hasChildren(dict_index)
+    assert model.rowCount(dict_index) == 0
+    assert model.canFetchMore(dict_index)
+    model.fetchMore(dict_index)
+    assert model.rowCount(dict_index) == 2
+    assert not model.canFetchMore(dict_index)
+
+    # Settings are only created when requested
+    node = model.index(0, 1, root).internalPointer()
+    assert node._setting is None
+    assert node.setting.get() == 1
+
+
+def test_setting_model_fetch_batches(qapplication):
+    model = SettingModel()
+    model.fetch_batch_size = 10
+    model.set_data({'key{}'.format(i): i for i in range(25)})
+    root = QtCore.QModelIndex()
+    assert model.rowCount(root) == 10
+    while model.canFetchMore(root):
+        model.fetchMore(root)
+    assert model.rowCount(root) == 25
+    assert model.index(24, 0, root).internalPointer().name == 'key24'
+
+    # Keys removed from the dictionary after it's set don't break fetching
+    data = {'key{}'.format(i): i for i in range(25)}
+    model.set_data(data)
+    del data['key20']
+    while model.canFetchMore(root):
+        model.fetchMore(root)
+    assert model.rowCount(root) == 25
+
+
+def test_setting_model_update_data(qapplication):
+    model = SettingModel()
+    model.set_data({
+        'integer': 1,
+        'string': 'text',
+        'removed': 2.0,
+        'dict': {'nested': True},
+    })
+    root = QtCore.QModelIndex()
+    dict_index = model.index(3, 0, root)
+    model.fetchMore(dict_index)
+    nested = QtCore.QPersistentModelIndex(model.index(0, 1, dict_index))
+
+    signals = []
+    model.rowsRemoved.connect(lambda p, f, l: signals.append(('removed', f, l)))
+    model.rowsInserted.connect(lambda p, f, l: signals.append(('inserted', f, l)))
+    model.dataChanged.connect(
+        lambda f, t, *args: signals.append(('changed', f.internalPointer().name)))
+
+    model.update_data({
+        'integer': 1,
+        'string': 'other',
+        'dict': {'nested': False},
+        'added': [1],
+    })
+    assert signals == [
+        ('removed', 2, 2),
+        ('changed', 'string'),
+        ('changed', 'nested'),
+        ('inserted', 3, 3),
+    ]
+    assert [n.name for n in model.root.children] == ['integer', 'string', 'dict', 'added']
+    # Existing nodes are preserved
+    assert nested.isValid()
+    assert nested.internalPointer().value is False
+
+    # Unchanged data emits nothing
+    del signals[:]
+    model.update_data({'integer': 1, 'string': 'other',
+                       'dict': {'nested': False}, 'added': [1]})
+    assert signals == []
+
+
+@pytest.fixture
+def model_tester(monkeypatch):
+    """ Returns a function that checks a model with QAbstractItemModelTester """
+    import importlib
+    import sys
+
+    import Qt
+    tester_class = getattr(importlib.import_module(Qt.__binding__ + '.QtTest'),
+                           'QAbstractItemModelTester', None)
+    if tester_class is None:
+        pytest.skip('QAbstractItemModelTester is not available')
+
+    # Failures are reported as warnings, exceptions raised in the model's
+    # virtual methods are printed by the binding rather than raised
+    messages = []
+    previous = QtCore.qInstallMessageHandler(
+        lambda msg_type, context, msg: messages.append(msg))
+    monkeypatch.setattr(sys, 'excepthook',
+                        lambda *exc_info: messages.append(repr(exc_info[1])))
+    testers = []
+
+    def check(model):
+        testers.append(tester_class(
+            model, tester_class.FailureReportingMode.Warning))
+
+    yield check
+    QtCore.qInstallMessageHandler(previous)
+    del testers[:]
+    assert messages == []
+
+
+class ExplicitFetchModel(SettingModel):
+    """
+    Only fetches when fetch is called. QAbstractItemModelTester fetches from
+    its slots, which it then reports as changes made while another is in
+    progress.
+    """
+
+    def canFetchMore(self, parent):
+        return False
+
+    def fetchMore(self, parent):
+        pass
+
+    def fetch(self, parent):
+        return super(ExplicitFetchModel, self).fetchMore(parent)
+
+
+def test_setting_model_update_data_tester(qapplication, model_tester):
+    model = ExplicitFetchModel()
+    model.fetch_batch_size = 2
+    # The tester's slots are connected before the proxy's, so it sees the
+    # source model's changes complete before the proxy reacts to them
+    model_tester(model)
+    proxy = SettingFilterProxyModel()
+    proxy.setSourceModel(model)
+    model_tester(proxy)
+
+    def fetch_all(index):
+        while model.node_from_index(index).can_fetch_more():
+            model.fetch(index)
+        for row in range(model.rowCount(index)):
+            fetch_all(model.index(row, 0, index))
+
+    states = [
+        {'a': 1, 'b': {'c': 2, 'd': {'e': 3}}, 'f': 4, 'g': {'h': 5}},
+        # Removals and branch <-> leaf changes, including adjacent rows
+        {'b': 1, 'f': {'x': 1, 'y': 2}, 'g': {'h': 6}},
+        # Additions to fetched and partially fetched branches
+        {'a': {'b': 1}, 'b': 1, 'f': {'x': 1, 'z': {'w': 0}}, 'g': 2,
+         'i': 3, 'j': 4, 'k': 5},
+        {'k': {'a': 1}, 'a': 2},
+        {},
+        {'a': 1, 'b': {'c': 2}},
+    ]
+    for filter_text in ('', 'b'):
+        proxy.set_filter_text(filter_text, delay=0)
+        for data in states:
+            model.update_data(data)
+            fetch_all(QtCore.QModelIndex())
+            model.update_data(data)
+        model.update_data(states[0])
+        # Updates while the branches are only partially fetched
+        for data in states:
+            model.update_data(data)
+            model.fetch(QtCore.QModelIndex())
+
+    # Indexes out of range are invalid rather than raising
+    assert not model.index(100, 0).isValid()
+    assert not model.index(0, 5).isValid()
+
+
+def test_setting_model_update_data_empty(qapplication):
+    model = SettingModel()
+    model.update_data({'integer': 1, 'dict': {'nested': True}})
+    assert model.rowCount() == 2
+    assert model.index(0, 0).internalPointer().name == 'integer'
+
+    view = SettingDictionaryView()
+    view.update_data({'integer': 1})
+    assert view.model().rowCount() == 1
+
+
+def test_setting_model_set_values(qapplication):
+    data = {
+        'a.b': 1,
+        'dict': {str(i): i for i in range(10)},
+    }
+    model = SettingModel()
+    model.fetch_batch_size = 4
+    model.set_data(data)
+
+    ranges = []
+    nodes = []
+    model.dataChanged.connect(
+        lambda f, t, *args: ranges.append((f.internalPointer().key, t.internalPointer().key)))
+    model.nodesChanged.connect(nodes.append)
+
+    # Keys containing '.' and unfetched branches resolve by tuple path
+    assert model.set_value(('a.b',), 2)
+    assert data['a.b'] == 2
+    assert model.index_from_path(('dict', '9')).internalPointer().value == 9
+
+    del ranges[:], nodes[:]
+    changed = model.set_values({('dict', str(i)): i * 10 for i in range(2, 8)})
+    assert len(changed) == 6
+    assert ranges == [('2', '7')]
+    assert len(nodes) == 1
+    assert data['dict']['5'] == 50
+
+    with pytest.raises(KeyError):
+        model.set_value(('dict', 'missing'), 1)
+
+
+def test_setting_dictionary_view_set_value(qapplication):
+    data = {'a.b': {'c': 1}}
+    view = SettingDictionaryView(data)
+    changes = []
+    view.settingChanged.connect(lambda path, value: changes.append((path, value)))
+    view.set_value(('a.b', 'c'), 2)
+    assert data == {'a.b': {'c': 2}}
+    assert changes == [('a.b.c', 2)]
+
+
+def test_setting_model_display_cache(qapplication):
+    model = SettingModel()
+    model.max_display_items = 3
+    model.set_data({'list': list(range(10)), 'value': 1})
+    list_index = model.index(0, 1)
+    text = model.data(list_index)
+    assert text == '0\n1\n2\n... (7 more)\n'
+    # Cached until the value is set
+    assert model.data(list_index) is text
+    size = model.data(list_index, QtCore.Qt.SizeHintRole)
+    assert size.height() > 0
+    model.setData(list_index, [1])
+    assert model.data(list_index) == '1\n'
+    assert model.data(list_index, QtCore.Qt.SizeHintRole).height() < size.height()
+
+
+def test_setting_filter_proxy_model(qapplication):
+    model = SettingModel()
+    model.set_data({
+        'render': {'samples': 1, 'max_depth': 2},
+        'output': {'directory': '', 'max_files': 3},
+        'name': 'shot',
+        'other': {'value_{}'.format(i): i for i in range(10)},
+        'nested': {'a': {'b': {'max_size': 1}}},
+    })
+    proxy = SettingFilterProxyModel()
+    proxy.setSourceModel(model)
+    root = QtCore.QModelIndex()
+    assert proxy.rowCount(root) == 5
+
+    # Unfetched branches are searched, only the paths to the matches are
+    # fetched and parents stay visible
+    model.fetch_batch_size = 1
+    proxy.set_filter_text('MAX', delay=0)
+    assert proxy.rowCount(root) == 3
+    for row in range(2):
+        branch = proxy.index(row, 0, root)
+        assert proxy.rowCount(branch) == 1
+        assert proxy.index(0, 0, branch).data().startswith('max')
+    assert not model.root.child_by_name('other').is_fetched()
+    assert model.node_from_path(('nested', 'a', 'b', 'max_size')).value == 1
+    model.fetch_batch_size = SettingModel.fetch_batch_size
+
+    proxy.set_filter_text('directory', delay=0)
+    assert proxy.rowCount(root) == 1
+
+    # New rows are indexed as they arrive
+    model.update_data({'output': {'directory': '', 'subdirectory': ''}})
+    assert proxy.rowCount(proxy.index(0, 0, root)) == 2
+
+    proxy.set_filter_text('', delay=0)
+    assert proxy.rowCount(root) == 1
+
+
+def test_setting_dictionary_view_filter(qapplication):
+    view = SettingDictionaryView({'one': 1, 'two': {'three': 3}})
+    view.set_filter_text('thr')
+    assert view.model().rowCount() == 2
+    QtCore.QTimer.singleShot(view.model().filter_delay + 50, qapplication.quit)
+    qapplication.exec_()
+    assert view.model().rowCount() == 1
+
+
+def test_settings_viewer_filter(qapplication):
+    s = SettingsGroup({
+        'samples': 1,
+        'max_depth': {'default': 2, 'tooltip': 'Maximum ray depth'},
+        'directory': {'default': '', 'label': 'Output Path'},
+    })
+    widget = SettingsViewer(s)
+    widget.show()
+    widget.set_setting_hidden('samples', True)
+
+    widget.set_filter_text('output', delay=0)
+    assert widget.get_row('directory').widget.isVisible()
+    assert not widget.get_row('max_depth').widget.isVisible()
+
+    widget.set_filter_text('ray', delay=0)
+    assert widget.get_row('max_depth').widget.isVisible()
+    assert not widget.get_row('directory').widget.isVisible()
+
+    # Rows hidden outside of the filter stay hidden
+    widget.set_filter_text('', delay=0)
+    assert widget.get_row('directory').widget.isVisible()
+    assert not widget.get_row('samples').widget.isVisible()
+
+
+def test_change_coalescer(qapplication):
+    one, two = Setting('one', 1), Setting('two', 2)
+    coalescer = ChangeCoalescer()
+    batches = []
+    coalescer.settingsChanged.connect(batches.append)
+    for setting in (one, two, one):
+        coalescer.add(setting)
+    assert coalescer.pending() == [one, two]
+    qapplication.processEvents()
+    assert batches == [[one, two]]
+    assert coalescer.pending() == []
+
+    coalescer.flush()
+    assert len(batches) == 1
+
+
+def test_settings_viewer_coalesced_changes(qapplication):
+    s = SettingsGroup({'count': 1, 'ratio': 1.0, 'items': {
+        'default': [], 'choices': ['a', 'b', 'c']}})
+    widget = SettingsViewer(s)
+    single, batches = [], []
+    widget.settingChanged.connect(single.append)
+    widget.settingsChanged.connect(batches.append)
+
+    count_widget = widget.get_row('count').widget
+    for value in range(2, 10):
+        count_widget.setValue(value)
+    widget.get_row('ratio').widget.setValue(2.0)
+    widget.get_row('items').widget.setValue(['a', 'c'])
+    # Validation and individual signals are synchronous
+    assert s.get('count') == 9
+    assert s.get('items') == ['a', 'c']
+    assert len(single) == 10
+
+    widget.flush_changes()
+    assert [[i.name for i in batch] for batch in batches] == [['count', 'ratio', 'items']]
+    assert widget.get_row('count').label.font().bold()
+
+
+def test_settings_viewer_conditions(qapplication):
+    s = SettingsGroup([
+        {'renderer': {'default': 'arnold', 'choices': ['arnold', 'redshift']}},
+        {'gpu_count': {'default': 1, 'enabled_if': {'renderer': 'redshift'},
+                       'nullable': True}},
+        {'denoiser': {'default': 'oidn', 'visible_if': {'renderer': 'arnold'},
+                      'tooltip': 'Denoise'}},
+    ])
+    widget = SettingsViewer(s)
+    widget.show()
+    gpu_row = widget.get_row('gpu_count')
+    assert not gpu_row.widget.isEnabled()
+    assert not gpu_row.null.isEnabled()
+    assert widget.get_row('denoiser').widget.isVisible()
+
+    widget.get_row('renderer').widget.setValue('redshift')
+    widget.flush_changes()
+    assert gpu_row.widget.isEnabled()
+    assert not widget.get_row('denoiser').widget.isVisible()
+
+    # The filter doesn't show rows hidden by conditions, and rows shown by
+    # conditions respect the filter
+    widget.set_filter_text('gpu', delay=0)
+    widget.set_filter_text('', delay=0)
+    assert not widget.get_row('denoiser').widget.isVisible()
+    widget.set_filter_text('gpu', delay=0)
+    widget.get_row('renderer').widget.setValue('arnold')
+    widget.flush_changes()
+    assert not widget.get_row('denoiser').widget.isVisible()
+    widget.set_filter_text('noise', delay=0)
+    assert widget.get_row('denoiser').widget.isVisible()
+
+    # Values set outside the viewer
+    widget.set_filter_text('', delay=0)
+    s.set('renderer', 'redshift')
+    widget.flush_changes()
+    assert gpu_row.widget.isEnabled()
+    assert not widget.get_row('denoiser').widget.isVisible()
+    s.set('renderer', 'arnold')
+    widget.flush_changes()
+    assert not gpu_row.widget.isEnabled()
+    assert widget.get_row('denoiser').widget.isVisible()
+
+
+def test_settings_viewer_undo(qapplication):
+    s = SettingsGroup([('count', 1), {'label': {
+        'default': 'a', 'nullable': True}}])
+    widget = SettingsViewer(s)
+    assert not widget.undo_action.isEnabled()
+    count_widget = widget.get_row('count').widget
+    count_widget.setValue(5)
+    widget.history.checkpoint()
+    widget.set_setting_none('label', True)
+    assert s.get('label') is None
+    assert widget.undo_action.isEnabled()
+
+    changed = []
+    widget.settingChanged.connect(changed.append)
+    assert widget.undo() == ['label']
+    assert s.get('label') == 'a'
+    assert not widget.get_row('label').null.isChecked()
+    widget.undo_action.trigger()
+    assert s.get('count') == 1
+    assert count_widget.value() == 1
+    assert 'count' in [setting.name for setting in changed]
+    assert not widget.undo_action.isEnabled()
+    assert widget.redo_action.isEnabled()
+    widget.redo()
+    assert count_widget.value() == 5
+
+    # Rebuilding keeps the history of the same settings
+    history = widget.history
+    widget.rebuild_layout(s)
+    assert widget.history is history
+    widget.rebuild_layout(SettingsGroup({'count': 1}))
+    assert widget.history is not history
+    assert not widget.undo_action.isEnabled()
+
+
+def test_settings_viewer_deleted(qapplication):
+    s = SettingsGroup([('count', 1)])
+    widgets = [SettingsViewer(s) for _ in range(4)]
+    # The history and the viewer
+    assert len(s._observers) == 8
+    for widget in widgets:
+        widget.deleteLater()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    assert not s._observers
+    # Doesn't notify the deleted viewers
+    s.set('count', 2)
+
+    widget = SettingsViewer(s)
+    widget.show()
+    widget.reject()
+    assert not s._observers
+    assert widget.history is None
+    widget.show()
+    assert widget.history is not None
+    widget.get_row('count').widget.setValue(3)
+    assert widget.undo() == ['count']
+    widget.done(0)
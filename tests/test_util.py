@@ -14,3 +14,28 @@ from settings_manager.setting import Setting
 ))
 def test_class_from_string(string, expected):
     assert util.class_from_string(string) == expected
+
+
+@pytest.mark.parametrize('first, second', (
+    ({'a': 1, 'b': 2}, {'b': 2, 'a': 1}),
+    (True, 1),
+    (0.0, -0.0),
+    (2.0, 2),
+    ([{'x': {1, 2}}], [{'x': {2, 1}}]),
+))
+def test_digest_equal_values(first, second):
+    assert util.digest(first) == util.digest(second)
+
+
+def test_digest_hash_seed():
+    import os
+    import subprocess
+    import sys
+    code = ('from settings_manager import util; '
+            'print(util.digest({"abc", "def", "ghi", "jkl"}))')
+    outputs = set()
+    for seed in ('1', '2', '3'):
+        env = dict(os.environ, PYTHONHASHSEED=seed,
+                   PYTHONPATH=os.pathsep.join(sys.path))
+        outputs.add(subprocess.check_output([sys.executable, '-c', code], env=env))
+    assert len(outputs) == 1